@@ -30,11 +30,15 @@ INSTALLED_APPS = [
     'rest_framework_simplejwt',
     'corsheaders',
 
+    'core',
     'users',
     'finance',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.compression.CompressionMiddleware',
+    'core.tracing.TracingMiddleware',
     'corsheaders.middleware.CorsMiddleware',  
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware', 
@@ -42,6 +46,9 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'finance.audit.AuditMiddleware',
+    'core.profiling.ProfilingMiddleware',
+    'core.slowlog.SlowQueryMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -76,6 +83,21 @@ DATABASES = {
 
 AUTH_USER_MODEL = 'users.User'
 
+# Login fetches the user with its related rows in one query
+AUTHENTICATION_BACKENDS = ['users.backends.LoginBackend']
+
+# Optional PBKDF2 work factor override (see `manage.py bench_login`)
+PASSWORD_HASH_ITERATIONS = int(os.getenv('PASSWORD_HASH_ITERATIONS', 0)) or None
+if PASSWORD_HASH_ITERATIONS:
+    PASSWORD_HASHERS = [
+        'users.hashers.ConfigurablePBKDF2PasswordHasher',
+        'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+        'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+        'django.contrib.auth.hashers.Argon2PasswordHasher',
+        'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+        'django.contrib.auth.hashers.ScryptPasswordHasher',
+    ]
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -104,6 +126,90 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Media/static serving (core.media.serve). Content-hashed names are sent
+# as immutable; everything else is cached for MEDIA_CACHE_MAX_AGE and
+# revalidated with ETags. Set SENDFILE_BACKEND to 'x-sendfile' (Apache)
+# or 'x-accel-redirect' (nginx, with internal locations at the prefixes
+# below) to let the front-end server stream the file.
+MEDIA_CACHE_MAX_AGE = int(os.getenv('MEDIA_CACHE_MAX_AGE', 3600))
+SENDFILE_BACKEND = os.getenv('SENDFILE_BACKEND', '')
+MEDIA_ACCEL_REDIRECT_PREFIX = os.getenv('MEDIA_ACCEL_REDIRECT_PREFIX', '/protected-media/')
+STATIC_ACCEL_REDIRECT_PREFIX = os.getenv('STATIC_ACCEL_REDIRECT_PREFIX', '/protected-static/')
+
+# Profile photos are re-encoded (EXIF stripped, orientation applied) and
+# square thumbnails are generated in the background after upload.
+PROFILE_PHOTO_MAX_SIZE = int(os.getenv('PROFILE_PHOTO_MAX_SIZE', 1024))
+PROFILE_PHOTO_THUMBNAIL_SIZES = (64, 160, 320)
+
+# Prometheus metrics (core.metrics), exported at /metrics. Each process
+# dumps its series into METRICS_DIR; clear the directory on deploy.
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True') == 'True'
+METRICS_DIR = os.getenv('METRICS_DIR', os.path.join(BASE_DIR, 'var', 'metrics'))
+METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', 5))
+# Required as a Bearer token; /metrics answers 403 to everyone while unset
+METRICS_AUTH_TOKEN = os.getenv('METRICS_AUTH_TOKEN', '')
+
+# On-demand profiling (core.profiling): an admin sends `X-Profile: 1` or
+# `?_profile=1` and the report lands in PROFILE_DIR, newest PROFILE_KEEP kept.
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'True') == 'True'
+PROFILE_DIR = os.getenv('PROFILE_DIR', os.path.join(BASE_DIR, 'var', 'profiles'))
+PROFILE_KEEP = int(os.getenv('PROFILE_KEEP', 50))
+
+# Slow-query log (core.slowlog): statements slower than the threshold are
+# logged with their view, call site and (once per fingerprint) EXPLAIN plan.
+# `python manage.py slow_queries` summarises the aggregates.
+SLOW_QUERY_LOG = os.getenv('SLOW_QUERY_LOG', 'True') == 'True'
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv('SLOW_QUERY_THRESHOLD_MS', 200))
+SLOW_QUERY_EXPLAIN = os.getenv('SLOW_QUERY_EXPLAIN', 'True') == 'True'
+SLOW_QUERY_DIR = os.getenv('SLOW_QUERY_DIR', os.path.join(BASE_DIR, 'var', 'slow_queries'))
+SLOW_QUERY_FLUSH_INTERVAL = float(os.getenv('SLOW_QUERY_FLUSH_INTERVAL', 5))
+
+# Request tracing (core.tracing): spans for views, querysets, serializers,
+# services and queries, appended to TRACE_FILE. `python manage.py traces`
+# prints them as trees. Traces shorter than TRACE_MIN_DURATION_MS are dropped.
+TRACING_ENABLED = os.getenv('TRACING_ENABLED', 'False') == 'True'
+TRACE_FILE = os.getenv('TRACE_FILE', os.path.join(BASE_DIR, 'var', 'traces', 'traces.jsonl'))
+TRACE_FILE_MAX_BYTES = int(os.getenv('TRACE_FILE_MAX_BYTES', 50 * 1024 * 1024))
+TRACE_MIN_DURATION_MS = float(os.getenv('TRACE_MIN_DURATION_MS', 0))
+TRACE_MAX_SPANS = int(os.getenv('TRACE_MAX_SPANS', 2000))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'trace_id': {'()': 'core.tracing.TraceIdFilter'},
+    },
+    'formatters': {
+        'traced': {'format': '%(asctime)s %(levelname)s [trace=%(trace_id)s] %(name)s: %(message)s'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'filters': ['trace_id'], 'formatter': 'traced'},
+    },
+    'loggers': {
+        'core.slowlog': {
+            'handlers': ['console'],
+            'level': os.getenv('SLOW_QUERY_LOG_LEVEL', 'WARNING'),
+            'propagate': False,
+        },
+        'core': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+        'finance': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+        'users': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
+
+# Background jobs (core.jobs) run in a small per-process thread pool
+BACKGROUND_JOB_WORKERS = int(os.getenv('BACKGROUND_JOB_WORKERS', 2))
+BACKGROUND_JOBS_SYNC = os.getenv('BACKGROUND_JOBS_SYNC', 'False') == 'True'
+
 CORS_ALLOWED_ORIGINS = [
     "https://cbms.codoacademy.com",   
     "http://localhost:5173",          
@@ -128,18 +234,106 @@ CSRF_TRUSTED_ORIGINS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.ClaimsJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'core.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
 }
 
+# List endpoints render straight from values() rows when the serializer
+# supports it (core.serializers.ValuesSerializerMixin)
+FAST_LIST_SERIALIZATION = os.getenv('FAST_LIST_SERIALIZATION', 'True') == 'True'
+
+# ETag / Last-Modified validators and 304s on list and dashboard endpoints
+# (core.conditional)
+CONDITIONAL_GET = os.getenv('CONDITIONAL_GET', 'True') == 'True'
+
+# Upper bound on how long the pre-rendered public directory stays cached;
+# it is revalidated against the database on every request (users.directory)
+PUBLIC_DIRECTORY_CACHE_SECONDS = int(os.getenv('PUBLIC_DIRECTORY_CACHE_SECONDS', 86400))
+
+# Delta sync feed (/api/sync/, core.sync): rows per list per page, and how
+# long fresh rows are held back so late-committing transactions aren't skipped
+SYNC_PAGE_SIZE = int(os.getenv('SYNC_PAGE_SIZE', '500'))
+SYNC_MAX_PAGE_SIZE = int(os.getenv('SYNC_MAX_PAGE_SIZE', '2000'))
+SYNC_SETTLE_SECONDS = float(os.getenv('SYNC_SETTLE_SECONDS', '2'))
+# Tombstones older than this are pruned (`prune_tombstones`); cursors issued
+# before that restart from scratch with `reset`
+SYNC_TOMBSTONE_RETENTION_DAYS = int(os.getenv('SYNC_TOMBSTONE_RETENTION_DAYS', '180'))
+
+# Notification retention (`python manage.py purge_notifications`, finance.retention).
+# Read notifications are kept for the days given per type; override with e.g.
+# NOTIFICATION_RETENTION_DAYS="INFO=30,PAYMENT=730". Unread ones are kept for
+# NOTIFICATION_UNREAD_RETENTION_DAYS (0 keeps them until read). Purged rows are
+# appended to gzipped JSON Lines files in NOTIFICATION_ARCHIVE_DIR first.
+NOTIFICATION_RETENTION_DAYS = {
+    'INFO': 90,
+    'SUCCESS': 90,
+    'WARNING': 180,
+    'ERROR': 180,
+    'PAYMENT': 365,
+    'WEDDING': 365,
+    'ANNOUNCEMENT': 365,
+}
+for _item in filter(None, os.getenv('NOTIFICATION_RETENTION_DAYS', '').split(',')):
+    _type, _days = _item.split('=')
+    NOTIFICATION_RETENTION_DAYS[_type.strip().upper()] = int(_days)
+NOTIFICATION_UNREAD_RETENTION_DAYS = int(os.getenv('NOTIFICATION_UNREAD_RETENTION_DAYS', '730'))
+NOTIFICATION_ARCHIVE_DIR = os.getenv('NOTIFICATION_ARCHIVE_DIR', os.path.join(BASE_DIR, 'var', 'archive', 'notifications'))
+
+# First month of the fiscal year (1 = January, 4 = April). Used by
+# `close_fiscal_year` to find the last completed year (finance.closing).
+FISCAL_YEAR_START_MONTH = int(os.getenv('FISCAL_YEAR_START_MONTH', '1'))
+
+# Financial audit log (finance.audit): a checkpoint of every member's totals
+# is written in the background each AUDIT_CHECKPOINT_INTERVAL events (0: only
+# via `audit_checkpoint`), bounding what verification and rebuilds replay.
+AUDIT_CHECKPOINT_INTERVAL = int(os.getenv('AUDIT_CHECKPOINT_INTERVAL', '5000'))
+
+# Bank statement reconciliation (finance.reconciliation): how many days a
+# statement line's date may differ from the deposit's and still match
+RECONCILE_DATE_WINDOW_DAYS = int(os.getenv('RECONCILE_DATE_WINDOW_DAYS', '3'))
+
+# Threads for running independent parts of a request concurrently
+# (/api/bootstrap/ sections, core.parallel). PostgreSQL only; 0 disables.
+PARALLEL_QUERIES_WORKERS = int(os.getenv('PARALLEL_QUERIES_WORKERS', '4'))
+
+# JSON goes through orjson when it is installed (pip install orjson);
+# set FAST_JSON=False to force DRF's stdlib encoder.
+FAST_JSON = os.getenv('FAST_JSON', 'True') == 'True'
+
+# Response compression (core.compression), JSON API responses only. Brotli is used when the
+# `brotli` package is installed and the client accepts it, gzip otherwise.
+COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', 'True') == 'True'
+COMPRESSION_MIN_BYTES = int(os.getenv('COMPRESSION_MIN_BYTES', 1024))
+COMPRESSION_GZIP_LEVEL = int(os.getenv('COMPRESSION_GZIP_LEVEL', 6))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', 5))
+# Prefixes never compressed (BREACH): every endpoint that returns tokens,
+# and the admin
+COMPRESSION_EXCLUDE_PATHS = ('/admin/', '/api/token/', '/api/token/refresh/')
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
 }
 
+# Authenticate read-only requests from token claims (role, team, version)
+# instead of loading the user row on every request.
+JWT_CLAIMS_AUTH = os.getenv('JWT_CLAIMS_AUTH', 'False') == 'True'
+# How long a user's auth_version may be served from cache. Bounds how long
+# another worker can keep trusting claims after a role change or deactivation.
+JWT_CLAIMS_VERSION_CACHE_SECONDS = int(os.getenv('JWT_CLAIMS_VERSION_CACHE_SECONDS', 60))
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Email Configuration
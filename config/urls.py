@@ -2,14 +2,20 @@ from django.contrib import admin
 from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
-from django.views.static import serve # <--- Import this
+from core.media import serve
+from core.views import metrics_view, ProfileListView, ProfileDetailView
 from rest_framework_simplejwt.views import TokenRefreshView
 
 from users.views.auth import CustomTokenObtainPairView
 from finance.views.dashboard import DashboardStatsView, TeamStructureView
+from finance.views.teams import TeamSummaryView, TeamMembersView
+from finance.views.sync import SyncView
+from finance.views.bootstrap import BootstrapView
+from finance.views.search import SearchView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
     
     path('api/token/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
@@ -19,7 +25,21 @@ urlpatterns = [
     
     path('api/dashboard/stats/', DashboardStatsView.as_view(), name='dashboard-stats'),
     path('api/teams/', TeamStructureView.as_view(), name='team-structure'),
+    path('api/teams/summary/', TeamSummaryView.as_view(), name='team-summary'),
+    path('api/teams/<int:leader_id>/members/', TeamMembersView.as_view(), name='team-members'),
+    path('api/sync/', SyncView.as_view(), name='sync'),
+    path('api/bootstrap/', BootstrapView.as_view(), name='bootstrap'),
+    path('api/search/', SearchView.as_view(), name='search'),
+
+    path('api/profiles/', ProfileListView.as_view(), name='profile-list'),
+    path('api/profiles/<str:profile_id>/', ProfileDetailView.as_view(), name='profile-detail'),
     
-    re_path(r'^media/(?P<path>.*)$', serve, {'document_root': settings.MEDIA_ROOT}),
-    re_path(r'^static/(?P<path>.*)$', serve, {'document_root': settings.STATIC_ROOT}),
+    re_path(r'^media/(?P<path>.*)$', serve, {
+        'document_root': settings.MEDIA_ROOT,
+        'accel_prefix': settings.MEDIA_ACCEL_REDIRECT_PREFIX,
+    }),
+    re_path(r'^static/(?P<path>.*)$', serve, {
+        'document_root': settings.STATIC_ROOT,
+        'accel_prefix': settings.STATIC_ACCEL_REDIRECT_PREFIX,
+    }),
 ]
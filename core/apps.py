@@ -0,0 +1,16 @@
+from django.apps import AppConfig
+from django.conf import settings
+from django.db.backends.signals import connection_created
+
+
+class CoreConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'core'
+
+    def ready(self):
+        if settings.SLOW_QUERY_LOG:
+            from core.slowlog import install
+            connection_created.connect(install, dispatch_uid='core.slowlog.install')
+        if settings.TRACING_ENABLED:
+            from core import tracing
+            tracing.install()
@@ -0,0 +1,90 @@
+import gzip
+import re
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+# API JSON only: HTML pages (admin) mix CSRF tokens with reflected input
+COMPRESSIBLE_TYPES_RE = re.compile(r'^application/json\b')
+
+
+def _accepts(accept_encoding, coding):
+    """
+    True when `coding` is listed in Accept-Encoding without q=0.
+    """
+    for item in accept_encoding.split(','):
+        name, *params = item.split(';')
+        if name.strip().lower() != coding:
+            continue
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip() == 'q':
+                try:
+                    return float(value) > 0
+                except ValueError:
+                    return False
+        return True
+    return False
+
+
+def negotiate(accept_encoding):
+    if brotli is not None and _accepts(accept_encoding, 'br'):
+        return 'br'
+    if _accepts(accept_encoding, 'gzip'):
+        return 'gzip'
+    return None
+
+
+def compress(content, coding):
+    if coding == 'br':
+        return brotli.compress(content, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(content, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+class CompressionMiddleware:
+    """
+    Compresses JSON API responses of at least COMPRESSION_MIN_BYTES with
+    brotli (when installed and accepted) or gzip.
+
+    Only application/json is compressed; HTML (the Django admin, with its
+    CSRF tokens) and media are left alone. Paths in
+    COMPRESSION_EXCLUDE_PATHS are never compressed either: token
+    responses carry secrets next to attacker-influenced input, which is
+    what BREACH needs.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not settings.COMPRESSION_ENABLED or response.streaming or response.has_header('Content-Encoding'):
+            return response
+        if len(response.content) < settings.COMPRESSION_MIN_BYTES:
+            return response
+        if not COMPRESSIBLE_TYPES_RE.match(response.get('Content-Type', '')):
+            return response
+        if request.path.startswith(tuple(settings.COMPRESSION_EXCLUDE_PATHS)):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        coding = negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if coding is None:
+            return response
+
+        compressed = compress(response.content, coding)
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = coding
+        # The compressed body is no longer byte-identical (RFC 9110 8.8.3)
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
@@ -0,0 +1,98 @@
+"""
+Conditional GET support for API responses.
+
+A response's validators are derived from the querysets it is built from:
+row count, max(pk) and max(updated_at) of each, fetched together in a
+single UNION ALL query. Inserts move max(pk), edits move max(updated_at)
+and deletes move the count, so any change to the underlying rows changes
+the ETag. Unchanged refreshes are answered with 304 before the view does
+any serialization.
+"""
+import hashlib
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import CharField, Count, DateTimeField, Max, Value
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+CACHE_CONTROL = 'private, no-cache'
+
+
+def _stats(queryset, label):
+    try:
+        queryset.model._meta.get_field('updated_at')
+        last_modified = Max('updated_at')
+    except FieldDoesNotExist:
+        last_modified = Value(None, output_field=DateTimeField())
+    # Grouping by a constant yields exactly one row, even for no matches
+    return queryset.order_by().annotate(
+        _label=Value(label, output_field=CharField())
+    ).values('_label').annotate(
+        count=Count('pk'), max_pk=Max('pk'), last_modified=last_modified,
+    ).values_list('_label', 'count', 'max_pk', 'last_modified')
+
+
+def data_version(*querysets):
+    """
+    [(count, max pk, max updated_at)] for each queryset, from one query.
+    """
+    parts = [_stats(queryset, str(index)) for index, queryset in enumerate(querysets)]
+    combined = parts[0].union(*parts[1:], all=True) if len(parts) > 1 else parts[0]
+    rows = sorted(combined, key=lambda row: int(row[0]))
+    return [row[1:] for row in rows]
+
+
+def validators(request, *querysets, extra=(), version=None):
+    """
+    (etag, last_modified) for a response built from `querysets` (or from
+    their already fetched data_version()). The ETag also covers who is
+    asking and how (path, query string, media type), since scoping and
+    absolute URLs depend on them.
+    """
+    if version is None:
+        version = data_version(*querysets)
+    user = request.user
+    variant = (
+        getattr(user, 'pk', None), getattr(user, 'role', None), request.get_full_path(),
+        request.get_host(), getattr(request, 'accepted_media_type', ''), *extra,
+    )
+    digest = hashlib.sha1(repr((version, variant)).encode()).hexdigest()[:32]
+    timestamps = [row[2] for row in version if row[2] is not None]
+    return f'"{digest}"', max(timestamps) if timestamps else None
+
+
+def set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    response['Cache-Control'] = CACHE_CONTROL
+    patch_vary_headers(response, ('Authorization',))
+    return response
+
+
+def not_modified(request, etag, last_modified):
+    """
+    A 304 response if the client's copy is current, otherwise None.
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified is not None else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is None or response.status_code != 304:
+        return None
+    return set_validators(response, etag, last_modified)
+
+
+def respond(request, querysets, build_response, extra=(), version=None):
+    """
+    Returns 304 when the client's copy of `querysets` is current, otherwise
+    build_response() with validators attached.
+    """
+    if not settings.CONDITIONAL_GET:
+        return build_response()
+    etag, last_modified = validators(request, *querysets, extra=extra, version=version)
+    response = not_modified(request, etag, last_modified)
+    if response is not None:
+        return response
+    response = build_response()
+    if response.status_code == 200:
+        set_validators(response, etag, last_modified)
+    return response
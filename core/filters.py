@@ -0,0 +1,85 @@
+"""
+Query-string filters for list endpoints (see core.mixins.FilterListMixin).
+
+Each factory returns a function(queryset, raw value) -> queryset that
+raises ValidationError for malformed values, so bad input is a 400
+rather than an empty or unfiltered list.
+"""
+import datetime
+from decimal import Decimal
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+
+
+def parse_int(name, raw):
+    try:
+        return int(raw)
+    except (TypeError, ValueError):
+        raise ValidationError({name: 'Must be a number.'})
+
+
+def parse_day(name, raw):
+    try:
+        day = parse_date(raw)
+    except ValueError:
+        day = None
+    if day is None:
+        raise ValidationError({name: 'Must be a date (YYYY-MM-DD).'})
+    return day
+
+
+def exact(name, field):
+    def apply(queryset, raw):
+        return queryset.filter(**{field: parse_int(name, raw)})
+    return apply
+
+
+def one_of(name, field, choices):
+    """
+    `?name=A` or `?name=A,B`, each value one of the model field's choices.
+    """
+    allowed = {value for value, _ in choices}
+
+    def apply(queryset, raw):
+        values = [value.strip() for value in raw.split(',') if value.strip()]
+        unknown = [value for value in values if value not in allowed]
+        if unknown or not values:
+            raise ValidationError({name: f"Choose from: {', '.join(sorted(allowed))}."})
+        return queryset.filter(**{f'{field}__in': values})
+    return apply
+
+
+def date_from(name, field, with_time=False):
+    """
+    Rows on or after the given day. For DateTimeFields (`with_time`) the
+    bound is the start of that day in the current time zone, so the
+    column's index can be used.
+    """
+    def apply(queryset, raw):
+        day = parse_day(name, raw)
+        if with_time:
+            return queryset.filter(**{f'{field}__gte': _start_of(day)})
+        return queryset.filter(**{f'{field}__gte': day})
+    return apply
+
+
+def date_to(name, field, with_time=False):
+    """
+    Rows on or before the given day (inclusive).
+    """
+    def apply(queryset, raw):
+        day = parse_day(name, raw)
+        if with_time:
+            return queryset.filter(**{f'{field}__lt': _start_of(day + datetime.timedelta(days=1))})
+        return queryset.filter(**{f'{field}__lte': day})
+    return apply
+
+
+def _start_of(day):
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+
+def money(value):
+    # Same representation as the serializers' DecimalFields
+    return str((value or Decimal('0')).quantize(Decimal('0.01')))
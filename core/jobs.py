@@ -0,0 +1,48 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import connections, transaction
+from core import tracing
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.BACKGROUND_JOB_WORKERS,
+                thread_name_prefix='cbms-job',
+            )
+    return _executor
+
+
+def _run(func, args, kwargs, parent=None):
+    try:
+        with tracing.span(f'job {getattr(func, "__name__", func)}', kind='job', parent=parent):
+            func(*args, **kwargs)
+    except Exception:
+        logger.exception("Background job %s failed", getattr(func, '__name__', func))
+    finally:
+        # Each worker thread has its own connections; don't leak them
+        connections.close_all()
+
+
+def enqueue(func, *args, **kwargs):
+    """
+    Runs `func(*args, **kwargs)` off the request path once the current
+    transaction commits (immediately when not in a transaction).
+    With settings.BACKGROUND_JOBS_SYNC the job runs inline instead,
+    which is handy for management commands and local debugging.
+    The job's span continues the trace of the code that enqueued it.
+    """
+    if settings.BACKGROUND_JOBS_SYNC:
+        transaction.on_commit(lambda: func(*args, **kwargs))
+        return
+    parent = tracing.current_ids()
+    transaction.on_commit(lambda: _get_executor().submit(_run, func, args, kwargs, parent))
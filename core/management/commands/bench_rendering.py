@@ -0,0 +1,72 @@
+import gzip
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import resolve
+from rest_framework import renderers
+from rest_framework.test import APIRequestFactory, force_authenticate
+from core import compression
+from core.renderers import FastJSONRenderer, orjson
+from users.models import User
+
+DEFAULT_PATHS = ('/api/payments/', '/api/teams/', '/api/dashboard/stats/', '/api/users/')
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks JSON rendering (DRF vs FastJSONRenderer) and compressed "
+        "size (gzip / brotli) for the largest API responses."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', action='append', dest='paths', help="Endpoint to measure (repeatable).")
+        parser.add_argument('--user', help="Username to request as (default: first admin).")
+        parser.add_argument('--iterations', type=int, default=50)
+
+    def handle(self, *args, **options):
+        user = self.get_user(options['user'])
+        factory = APIRequestFactory()
+        drf_renderer, fast_renderer = renderers.JSONRenderer(), FastJSONRenderer()
+        iterations = options['iterations']
+
+        if orjson is None:
+            self.stdout.write(self.style.WARNING("orjson is not installed; FastJSONRenderer falls back to DRF."))
+        if compression.brotli is None:
+            self.stdout.write(self.style.WARNING("brotli is not installed; only gzip is measured."))
+
+        for path in options['paths'] or DEFAULT_PATHS:
+            request = factory.get(path)
+            force_authenticate(request, user=user)
+            match = resolve(path)
+            response = match.func(request, *match.args, **match.kwargs)
+            if response.status_code != 200:
+                self.stdout.write(self.style.ERROR(f"{path}: HTTP {response.status_code}, skipped"))
+                continue
+            data = response.data
+
+            timings = {}
+            for label, renderer in (('drf', drf_renderer), ('fast', fast_renderer)):
+                started = time.perf_counter()
+                for _ in range(iterations):
+                    body = renderer.render(data)
+                timings[label] = (time.perf_counter() - started) / iterations * 1000
+
+            sizes = {'raw': len(body), 'gzip': len(gzip.compress(body, compresslevel=6))}
+            if compression.brotli is not None:
+                sizes['br'] = len(compression.brotli.compress(body, quality=5))
+
+            self.stdout.write(self.style.MIGRATE_HEADING(path))
+            self.stdout.write(
+                f"  render  drf {timings['drf']:.2f}ms  fast {timings['fast']:.2f}ms  "
+                f"({timings['drf'] / max(timings['fast'], 1e-9):.1f}x)"
+            )
+            self.stdout.write("  bytes   " + '  '.join(
+                f"{label} {size:,}" + (f" ({size / sizes['raw']:.0%})" if label != 'raw' else '')
+                for label, size in sizes.items()
+            ))
+
+    def get_user(self, username):
+        users = User.objects.all()
+        user = users.filter(username=username).first() if username else users.filter(role='admin').first()
+        if user is None:
+            raise CommandError("No such user." if username else "No admin user found; pass --user.")
+        return user
@@ -0,0 +1,67 @@
+import datetime
+import time
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from core.middleware import QueryCounter
+from finance.models import Payment
+from finance.serializers import PaymentSerializer
+from users.models import User
+from users.serializers import UserSerializer
+
+BENCH_PREFIX = '__bench_serializers__'
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares list serialization paths on generated rows: model instances "
+        "as the viewsets used to load them, instances with select_related, and "
+        "the values() fast path. Runs inside a rolled-back transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000)
+        parser.add_argument('--users', type=int, default=200, help="Members the generated payments belong to.")
+
+    def handle(self, *args, **options):
+        rows, user_count = options['rows'], options['users']
+        with transaction.atomic():
+            users = User.objects.bulk_create([
+                User(username=f'{BENCH_PREFIX}{index}', first_name='Bench', last_name=str(index))
+                for index in range(max(user_count, rows // 10))
+            ])
+            today = datetime.date.today()
+            Payment.objects.bulk_create([
+                Payment(
+                    user=users[index % user_count], recorded_by=users[0], amount=Decimal('100.00'),
+                    date=today, time=datetime.time(12, 0), notes='bench',
+                )
+                for index in range(rows)
+            ], batch_size=2000)
+
+            payments = Payment.objects.filter(user__username__startswith=BENCH_PREFIX).order_by('-date', '-id')
+            members = User.objects.filter(username__startswith=BENCH_PREFIX).order_by('first_name')
+
+            self.stdout.write(f"{'list':<10} {'path':<16} {'rows':>7} {'ms':>9} {'queries':>8}")
+            self.compare('payments', PaymentSerializer, payments, ['user', 'recorded_by'])
+            self.compare('users', UserSerializer, members, ['responsible_member', 'terms_acknowledgement'])
+            transaction.set_rollback(True)
+
+    def compare(self, label, serializer_class, queryset, related):
+        results = {}
+        for path, run in (
+            ('instances', lambda: serializer_class(queryset.all(), many=True).data),
+            ('select_related', lambda: serializer_class(queryset.select_related(*related), many=True).data),
+            ('values', lambda: serializer_class().values_data(queryset.all())),
+        ):
+            queries = QueryCounter()
+            with connection.execute_wrapper(queries):
+                started = time.perf_counter()
+                data = run()
+                elapsed = time.perf_counter() - started
+            results[path] = data
+            self.stdout.write(
+                f"{label:<10} {path:<16} {len(data):>7} {elapsed * 1000:>9.1f} {queries.count:>8}"
+            )
+        same = [dict(item) for item in results['instances']] == results['values']
+        self.stdout.write(f"{label:<10} output identical: {same}")
@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from core import sync
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes sync tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS "
+        f"({settings.SYNC_TOMBSTONE_RETENTION_DAYS}). Clients holding older cursors resync from scratch."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000, help="Rows deleted per statement.")
+
+    def handle(self, *args, **options):
+        deleted = sync.prune_tombstones(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f"Pruned {deleted} tombstone(s)."))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from core import search
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the search documents of registered models (all by default)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('models', nargs='*', help="app_label.model_name, e.g. finance.payment")
+
+    def handle(self, *args, **options):
+        labels = [label.lower() for label in options['models']] or sorted(search.registry)
+        unknown = [label for label in labels if label not in search.registry]
+        if unknown:
+            raise CommandError(f"Not registered for search: {', '.join(unknown)}")
+        for label in labels:
+            with transaction.atomic():
+                count = search.rebuild(search.registry[label])
+            self.stdout.write(f"{label}: {count} documents")
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from core import slowlog
+
+
+class Command(BaseCommand):
+    help = (
+        "Summarises the slow-query log: one line per statement fingerprint, "
+        "sorted by total time, with the views that issued it and any tables "
+        "read by a full scan (candidates for an index)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--table', help="Only fingerprints that touch this table, e.g. finance_payment.")
+        parser.add_argument('--full-scans', action='store_true', help="Only fingerprints whose plan has a full scan.")
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument('--plans', action='store_true', help="Print the captured query plans.")
+
+    def handle(self, *args, **options):
+        slowlog.stats.flush(force=True)
+        entries = slowlog.collect()
+        if options['table']:
+            entries = {key: entry for key, entry in entries.items() if options['table'] in entry['sql']}
+        if options['full_scans']:
+            entries = {key: entry for key, entry in entries.items() if entry['full_scans']}
+
+        if not entries:
+            self.stdout.write("No slow queries recorded.")
+            return
+
+        ranked = sorted(entries.items(), key=lambda item: -item[1]['total_ms'])[:options['limit']]
+        for key, entry in ranked:
+            average = entry['total_ms'] / entry['count']
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"[{key}] {entry['count']}x  total {entry['total_ms']:.0f}ms  "
+                f"avg {average:.1f}ms  max {entry['max_ms']:.1f}ms"
+            ))
+            self.stdout.write(f"  {entry['sql'][:300]}")
+            views = ', '.join(f'{view} ({count})' for view, count in sorted(entry['views'].items(), key=lambda v: -v[1]))
+            self.stdout.write(f"  views: {views}")
+            if entry['frame']:
+                self.stdout.write(f"  at: {entry['frame']}")
+            if entry['full_scans']:
+                self.stdout.write(self.style.WARNING(f"  full scan: {', '.join(entry['full_scans'])}"))
+            if options['plans']:
+                for line in entry['plan']:
+                    self.stdout.write(f"    {line}")
@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand, CommandError
+from core import tracing
+
+
+class Command(BaseCommand):
+    help = (
+        "Prints recorded traces as span trees. Without a trace id, shows the "
+        "slowest traces whose root span matches --match (e.g. 'approve')."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('trace_id', nargs='?')
+        parser.add_argument('--match', default='', help="Substring of the root span name or view.")
+        parser.add_argument('--limit', type=int, default=3)
+        parser.add_argument('--min-ms', type=float, default=0.0, help="Hide spans faster than this.")
+
+    def handle(self, *args, **options):
+        traces = tracing.read_traces()
+        if options['trace_id']:
+            if options['trace_id'] not in traces:
+                raise CommandError(f"Trace {options['trace_id']} not found.")
+            selected = [traces[options['trace_id']]]
+        else:
+            selected = []
+            for spans in traces.values():
+                roots = self.roots(spans)
+                label = ' '.join(f"{root['name']} {root['attrs'].get('view', '')}" for root in roots)
+                if options['match'] in label:
+                    selected.append(spans)
+            selected.sort(key=lambda spans: -sum(root['duration_ms'] for root in self.roots(spans)))
+            selected = selected[:options['limit']]
+
+        if not selected:
+            self.stdout.write("No matching traces.")
+            return
+        for spans in selected:
+            self.stdout.write(self.style.MIGRATE_HEADING(f"trace {spans[0]['trace_id']}"))
+            children = {}
+            for item in spans:
+                children.setdefault(item['parent_id'], []).append(item)
+            for root in self.roots(spans):
+                self.print_tree(root, children, 1, options['min_ms'])
+
+    def roots(self, spans):
+        # Job spans point at a parent exported with the request, so a root
+        # is any span whose parent is not part of the same export
+        ids = {item['span_id'] for item in spans}
+        return sorted((item for item in spans if item['parent_id'] not in ids), key=lambda item: item['start'])
+
+    def print_tree(self, item, children, depth, min_ms):
+        if item['duration_ms'] < min_ms and depth > 1:
+            return
+        detail = item['attrs'].get('sql') or item['attrs'].get('view') or ''
+        error = self.style.ERROR(f"  !! {item['error']}") if item['error'] else ''
+        self.stdout.write(f"{'  ' * depth}{item['duration_ms']:9.2f}ms  {item['name']}  {detail[:120]}{error}")
+        for child in sorted(children.get(item['span_id'], []), key=lambda child: child['start']):
+            self.print_tree(child, children, depth + 1, min_ms)
@@ -0,0 +1,153 @@
+import mimetypes
+import os
+import re
+import stat
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_etags
+from django.views.decorators.http import require_safe
+from django.views.static import was_modified_since
+
+# Names that embed a content hash never change content, e.g.
+# "app.3f2a9c1b7d4e.css" (ManifestStaticFilesStorage, 12 digits) or a
+# sha256 file name (users.storage, 64). At least one a-f letter, so
+# numeric names (timestamps, phone numbers) that may be overwritten
+# don't qualify.
+HASHED_NAME_RE = re.compile(r'(?:^|[./_-])(?=[0-9]*[a-f])(?:[0-9a-f]{64}|[0-9a-f]{12})(?:\.[^/]*)?$')
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+def _file_range(path, start, length):
+    with open(path, 'rb') as handle:
+        handle.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = handle.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def _parse_range(header, size):
+    """
+    Returns (start, end) for a single satisfiable byte range, None when
+    the header should be ignored, or False when it is unsatisfiable.
+    Multi-range requests are answered with the full body.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+@require_safe
+def serve(request, path, document_root, accel_prefix=None):
+    """
+    Serves a file below `document_root` with validators and caching:
+
+    * strong ETag (mtime + size) and Last-Modified, answering
+      If-None-Match / If-Modified-Since with 304
+    * Cache-Control: immutable for content-hashed names
+    * single byte-range requests (206 / 416)
+    * when settings.SENDFILE_BACKEND is set, the body is handed to the
+      front-end server through X-Sendfile or X-Accel-Redirect
+    """
+    try:
+        fullpath = safe_join(document_root, path)
+    except SuspiciousFileOperation:
+        raise Http404("Not found")
+    try:
+        stats = os.stat(fullpath)
+    except OSError:
+        raise Http404("Not found")
+    if not stat.S_ISREG(stats.st_mode):
+        raise Http404("Not found")
+
+    etag = '"%x-%x"' % (stats.st_mtime_ns, stats.st_size)
+    if HASHED_NAME_RE.search(os.path.basename(path)):
+        cache_control = IMMUTABLE_CACHE_CONTROL
+    else:
+        cache_control = f'public, max-age={settings.MEDIA_CACHE_MAX_AGE}'
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(stats.st_mtime),
+        'Cache-Control': cache_control,
+        'Accept-Ranges': 'bytes',
+    }
+
+    # 1. Conditional requests (If-None-Match wins over If-Modified-Since)
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match is not None:
+        tags = parse_etags(if_none_match)
+        not_modified = '*' in tags or etag in tags or etag in {tag.removeprefix('W/') for tag in tags}
+    else:
+        not_modified = not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), stats.st_mtime)
+    if not_modified:
+        response = HttpResponseNotModified()
+        for header, value in headers.items():
+            response[header] = value
+        return response
+
+    content_type, encoding = mimetypes.guess_type(fullpath)
+    content_type = content_type or 'application/octet-stream'
+
+    # 2. Let nginx/Apache stream the bytes (they handle ranges themselves)
+    backend = settings.SENDFILE_BACKEND
+    if backend:
+        response = HttpResponse(content_type=content_type)
+        if backend == 'x-accel-redirect' and accel_prefix:
+            response['X-Accel-Redirect'] = accel_prefix.rstrip('/') + '/' + path.lstrip('/')
+        else:
+            response['X-Sendfile'] = fullpath
+        for header, value in headers.items():
+            response[header] = value
+        if encoding:
+            response['Content-Encoding'] = encoding
+        return response
+
+    # 3. Byte ranges, unless If-Range says the client's copy is stale
+    range_header = request.META.get('HTTP_RANGE')
+    if_range = request.META.get('HTTP_IF_RANGE')
+    byte_range = None
+    if range_header and (if_range is None or if_range == etag):
+        byte_range = _parse_range(range_header, stats.st_size)
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{stats.st_size}'
+        return response
+
+    if byte_range:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(_file_range(fullpath, start, length), status=206, content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{stats.st_size}'
+        response['Content-Length'] = str(length)
+    else:
+        response = FileResponse(open(fullpath, 'rb'), content_type=content_type)
+        response['Content-Length'] = str(stats.st_size)
+
+    for header, value in headers.items():
+        response[header] = value
+    if encoding:
+        response['Content-Encoding'] = encoding
+    return response
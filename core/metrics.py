@@ -0,0 +1,209 @@
+"""
+Minimal Prometheus instrumentation with no external dependencies.
+
+Every process keeps its series in memory and periodically dumps them to
+METRICS_DIR/<pid>-<start time>.json. The /metrics view merges all files, so
+counts from every gunicorn worker (including ones that have since exited)
+are exported together.
+"""
+import atexit
+import json
+import math
+import os
+import threading
+import time
+from django.conf import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# name -> (type, help text)
+METRICS = {
+    'cbms_http_request_duration_seconds': ('histogram', 'Request latency by view and action.'),
+    'cbms_http_db_queries': ('histogram', 'Database queries issued per request.'),
+    'cbms_http_db_query_duration_seconds': ('histogram', 'Total database time per request.'),
+    'cbms_http_response_size_bytes': ('histogram', 'Response body size.'),
+    'cbms_payments_recorded_total': ('counter', 'Payments recorded, by transaction type and source.'),
+    'cbms_wallet_approvals_total': ('counter', 'Wallet deposits approved.'),
+    'cbms_wallet_rejections_total': ('counter', 'Wallet deposits rejected.'),
+    'cbms_announcements_total': ('counter', 'Announcements broadcast.'),
+    'cbms_announcement_notifications_total': ('counter', 'Notifications created by announcement fan-out.'),
+    'cbms_announcements_recalled_total': ('counter', 'Broadcast announcements recalled by an admin.'),
+}
+
+
+def _label_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.pid = os.getpid()
+        self.started = time.time()
+        self.counters = {}
+        self.histograms = {}
+        self.last_flush = 0.0
+
+    def _check_fork(self):
+        # A forked worker must not re-export its parent's numbers
+        if self.pid != os.getpid():
+            self._reset()
+
+    def inc(self, name, value=1, **labels):
+        with self._lock:
+            self._check_fork()
+            key = (name, _label_key(labels))
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, buckets, **labels):
+        with self._lock:
+            self._check_fork()
+            key = (name, _label_key(labels))
+            series = self.histograms.get(key)
+            if series is None:
+                series = self.histograms[key] = {
+                    'buckets': list(buckets), 'counts': [0] * len(buckets), 'sum': 0.0, 'count': 0,
+                }
+            for index, bound in enumerate(series['buckets']):
+                if value <= bound:
+                    series['counts'][index] += 1
+                    break
+            series['sum'] += value
+            series['count'] += 1
+
+    @property
+    def path(self):
+        return os.path.join(settings.METRICS_DIR, f'{self.pid}-{int(self.started * 1000)}.json')
+
+    def flush(self, force=False):
+        """
+        Writes this process's series to its file, at most once per
+        METRICS_FLUSH_INTERVAL seconds unless forced.
+        """
+        # One writer at a time: the file is written outside _lock so
+        # inc/observe never wait on disk, but a forced flush (metrics_view)
+        # must not race a per-request one over the same temporary file
+        with self._flush_lock:
+            now = time.monotonic()
+            if not force and now - self.last_flush < settings.METRICS_FLUSH_INTERVAL:
+                return
+            with self._lock:
+                self._check_fork()
+                self.last_flush = now
+                payload = {
+                    'counters': [[name, dict(labels), value] for (name, labels), value in self.counters.items()],
+                    'histograms': [
+                        [name, dict(labels), {**series, 'counts': list(series['counts'])}]
+                        for (name, labels), series in self.histograms.items()
+                    ],
+                }
+                path = self.path
+            os.makedirs(settings.METRICS_DIR, exist_ok=True)
+            temporary = f'{path}.tmp'
+            with open(temporary, 'w') as handle:
+                json.dump(payload, handle)
+            os.replace(temporary, path)
+
+
+registry = Registry()
+
+
+def inc(name, value=1, **labels):
+    if settings.METRICS_ENABLED:
+        registry.inc(name, value, **labels)
+
+
+def observe(name, value, buckets, **labels):
+    if settings.METRICS_ENABLED:
+        registry.observe(name, value, buckets, **labels)
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        if settings.METRICS_ENABLED and (registry.counters or registry.histograms):
+            registry.flush(force=True)
+    except Exception:
+        pass
+
+
+def collect():
+    """
+    Merges the files of all processes into {(name, labels): value} maps.
+    """
+    counters, histograms = {}, {}
+    if not os.path.isdir(settings.METRICS_DIR):
+        return counters, histograms
+    for filename in os.listdir(settings.METRICS_DIR):
+        if not filename.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(settings.METRICS_DIR, filename)) as handle:
+                payload = json.load(handle)
+        except (OSError, ValueError):
+            continue  # Half-written or vanished; picked up next scrape
+        for name, labels, value in payload.get('counters', []):
+            key = (name, _label_key(labels))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, series in payload.get('histograms', []):
+            key = (name, _label_key(labels))
+            merged = histograms.get(key)
+            if merged is None:
+                histograms[key] = {**series, 'counts': list(series['counts'])}
+                continue
+            merged['counts'] = [a + b for a, b in zip(merged['counts'], series['counts'])]
+            merged['sum'] += series['sum']
+            merged['count'] += series['count']
+    return counters, histograms
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs) + '}'
+
+
+def _format_number(value):
+    if isinstance(value, float):
+        if math.isinf(value):
+            return '+Inf'
+        return repr(value)
+    return str(value)
+
+
+def render():
+    """
+    Text exposition format (version 0.0.4) for all processes.
+    """
+    counters, histograms = collect()
+    lines = []
+    names = sorted({name for name, _ in counters} | {name for name, _ in histograms})
+    for name in names:
+        metric_type, help_text = METRICS.get(name, ('untyped', ''))
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {metric_type}')
+        for (series_name, labels), value in sorted(counters.items()):
+            if series_name == name:
+                lines.append(f'{name}{_format_labels(labels)} {_format_number(value)}')
+        for (series_name, labels), series in sorted(histograms.items()):
+            if series_name != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(series['buckets'], series['counts']):
+                cumulative += count
+                lines.append(f'{name}_bucket{_format_labels(labels, [("le", _format_number(float(bound)))])} {cumulative}')
+            lines.append(f'{name}_bucket{_format_labels(labels, [("le", "+Inf")])} {series["count"]}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {_format_number(float(series["sum"]))}')
+            lines.append(f'{name}_count{_format_labels(labels)} {series["count"]}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,63 @@
+import time
+from django.conf import settings
+from django.db import connection
+from core import metrics
+
+
+class QueryCounter:
+    """
+    connection.execute_wrapper hook that counts and times every query.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - started
+
+
+class MetricsMiddleware:
+    """
+    Records latency, query count/time and response size for every request,
+    labelled by URL name (e.g. "payment-list") and viewset action.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+
+        queries = QueryCounter()
+        started = time.perf_counter()
+        with connection.execute_wrapper(queries):
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        match = getattr(request, 'resolver_match', None)
+        labels = {
+            'view': match.view_name if match else 'unmatched',
+            'action': getattr(request, '_metrics_action', '') or request.method.lower(),
+            'method': request.method,
+            'status': f'{response.status_code // 100}xx',
+        }
+        metrics.observe('cbms_http_request_duration_seconds', elapsed, metrics.LATENCY_BUCKETS, **labels)
+        metrics.observe('cbms_http_db_queries', queries.count, metrics.QUERY_COUNT_BUCKETS, **labels)
+        metrics.observe('cbms_http_db_query_duration_seconds', queries.duration, metrics.LATENCY_BUCKETS, **labels)
+        if not response.streaming:
+            metrics.observe('cbms_http_response_size_bytes', len(response.content), metrics.SIZE_BUCKETS, **labels)
+
+        metrics.registry.flush()
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # ViewSet.as_view() exposes the method -> action mapping
+        actions = getattr(view_func, 'actions', None) or {}
+        request._metrics_action = actions.get(request.method.lower(), '')
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:26
+
+from django.db import migrations, models
+
+# Full-text indexes over core_searchdocument.text (see core.search)
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE core_searchdocument_fts USING fts5("
+    "text, content='core_searchdocument', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER core_searchdocument_fts_insert AFTER INSERT ON core_searchdocument BEGIN "
+    "INSERT INTO core_searchdocument_fts(rowid, text) VALUES (new.id, new.text); END",
+    "CREATE TRIGGER core_searchdocument_fts_delete AFTER DELETE ON core_searchdocument BEGIN "
+    "INSERT INTO core_searchdocument_fts(core_searchdocument_fts, rowid, text) VALUES ('delete', old.id, old.text); END",
+    "CREATE TRIGGER core_searchdocument_fts_update AFTER UPDATE ON core_searchdocument BEGIN "
+    "INSERT INTO core_searchdocument_fts(core_searchdocument_fts, rowid, text) VALUES ('delete', old.id, old.text); "
+    "INSERT INTO core_searchdocument_fts(rowid, text) VALUES (new.id, new.text); END",
+]
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS core_searchdocument_fts_insert",
+    "DROP TRIGGER IF EXISTS core_searchdocument_fts_delete",
+    "DROP TRIGGER IF EXISTS core_searchdocument_fts_update",
+    "DROP TABLE IF EXISTS core_searchdocument_fts",
+]
+POSTGRES_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX searchdocument_text_trgm_idx ON core_searchdocument USING gin (text gin_trgm_ops)",
+    "CREATE INDEX searchdocument_text_tsv_idx ON core_searchdocument USING gin (to_tsvector('simple', text))",
+]
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS searchdocument_text_trgm_idx",
+    "DROP INDEX IF EXISTS searchdocument_text_tsv_idx",
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(help_text='app_label.model_name of the indexed row', max_length=100)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('owner_id', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('text', models.TextField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['model', 'owner_id'], name='searchdocument_owner_idx')],
+                'constraints': [models.UniqueConstraint(fields=('model', 'object_id'), name='searchdocument_object_unique')],
+            },
+        ),
+        migrations.RunPython(
+            _run({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRES_FORWARD}),
+            _run({'sqlite': SQLITE_BACKWARD, 'postgresql': POSTGRES_BACKWARD}),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_searchdocument'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tombstone',
+            name='recorder_id',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,160 @@
+from django.conf import settings
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from core import conditional
+
+READ_ACTIONS = ('list', 'retrieve')
+
+
+class SparseFieldsetMixin:
+    """
+    ViewSet mixin adding `?fields=a,b,c` to list/retrieve.
+
+    The requested names narrow the serializer output and the query: the
+    queryset is limited with only()/select_related() to the columns those
+    fields read. Lists whose serializer supports values() plans
+    (core.serializers.ValuesSerializerMixin) are rendered from values()
+    dicts without building model instances (FAST_LIST_SERIALIZATION).
+    """
+
+    fields_param = 'fields'
+
+    def get_requested_fields(self):
+        if not hasattr(self, '_requested_fields'):
+            self._requested_fields = self._parse_requested_fields()
+        return self._requested_fields
+
+    def _parse_requested_fields(self):
+        if getattr(self, 'action', None) not in READ_ACTIONS:
+            return None
+        raw = self.request.query_params.get(self.fields_param)
+        if not raw:
+            return None
+        requested = [name.strip() for name in raw.split(',') if name.strip()]
+        available = {
+            name for name, field in self.get_serializer_class()(context=self.get_serializer_context()).fields.items()
+            if not field.write_only
+        }
+        unknown = [name for name in requested if name not in available]
+        if unknown:
+            raise ValidationError({self.fields_param: f"Unknown field(s): {', '.join(unknown)}."})
+        return requested
+
+    def get_serializer(self, *args, **kwargs):
+        if 'fields' not in kwargs:
+            requested = self.get_requested_fields()
+            if requested is not None:
+                kwargs['fields'] = requested
+        return super().get_serializer(*args, **kwargs)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.get_requested_fields() is None:
+            return queryset
+        serializer = self.get_serializer()
+        if not hasattr(serializer, 'values_plan'):
+            return queryset
+        lookups = serializer.values_lookups()
+        if not lookups:
+            return queryset
+        related = {lookup.split('__')[0] for lookup in lookups if '__' in lookup}
+        return queryset.select_related(*related).only(*lookups)
+
+    def list(self, request, *args, **kwargs):
+        if not settings.FAST_LIST_SERIALIZATION:
+            return super().list(request, *args, **kwargs)
+        serializer = self.get_serializer()
+        plan = serializer.values_plan() if hasattr(serializer, 'values_plan') else None
+        if plan is None:
+            return super().list(request, *args, **kwargs)
+
+        rows = self.filter_queryset(self.get_queryset()).values(*serializer.values_lookups(plan))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(serializer.to_representation_values(page, plan))
+        return Response(serializer.to_representation_values(rows, plan))
+
+
+class ConditionalListMixin:
+    """
+    ViewSet mixin answering list requests with ETag / Last-Modified and
+    returning 304 (one aggregate query, no serialization) when the
+    client's copy of the scoped queryset is still current.
+    """
+
+    # Off for lists embedded in another response (e.g. /api/bootstrap/)
+    conditional_get = True
+
+    def get_conditional_sources(self, queryset):
+        """
+        Querysets the list is built from. Override to add related tables
+        the serializer reads from (e.g. names of the users rows point to).
+        """
+        return [queryset]
+
+    def list(self, request, *args, **kwargs):
+        if not self.conditional_get:
+            return super().list(request, *args, **kwargs)
+        return conditional.respond(
+            request, self.get_conditional_sources(self.filter_queryset(self.get_queryset())),
+            lambda: super(ConditionalListMixin, self).list(request, *args, **kwargs),
+        )
+
+
+class FilterListMixin:
+    """
+    ViewSet mixin for query-string filters on list requests.
+
+    `list_filters` maps parameter names to functions(queryset, raw value)
+    (see core.filters). With `?summary=true` the response also carries
+    get_summary() of the filtered rows, computed in one aggregate query:
+    a plain list becomes {'count', 'results', 'summary'} and a paginated
+    response gains a 'summary' key.
+    """
+
+    list_filters = {}
+    summary_param = 'summary'
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if getattr(self, 'action', None) != 'list':
+            return queryset
+        for name, apply in self.list_filters.items():
+            raw = self.request.query_params.get(name)
+            if raw not in (None, ''):
+                queryset = apply(queryset, raw)
+        return queryset
+
+    def get_summary(self, queryset):
+        return {'count': queryset.count()}
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        if request.query_params.get(self.summary_param) not in ('true', '1') or response.status_code != 200:
+            return response
+        summary = self.get_summary(self.filter_queryset(self.get_queryset()).order_by())
+        if isinstance(response.data, list):
+            response.data = {'count': len(response.data), 'results': response.data, 'summary': summary}
+        else:
+            response.data['summary'] = summary
+        return response
+
+
+class AtomicWriteMixin:
+    """
+    ViewSet mixin running create, update and destroy in one transaction,
+    so everything they write (and logs) commits or rolls back together.
+    """
+
+    def create(self, request, *args, **kwargs):
+        with transaction.atomic():
+            return super().create(request, *args, **kwargs)
+
+    def update(self, request, *args, **kwargs):
+        with transaction.atomic():
+            return super().update(request, *args, **kwargs)
+
+    def destroy(self, request, *args, **kwargs):
+        with transaction.atomic():
+            return super().destroy(request, *args, **kwargs)
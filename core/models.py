@@ -0,0 +1,49 @@
+from django.db import models
+
+
+class Tombstone(models.Model):
+    """
+    Marker left behind by a deleted row so that clients syncing
+    incrementally (core.sync) learn about the delete.
+    """
+    model = models.CharField(max_length=100, help_text="app_label.model_name of the deleted row")
+    object_id = models.PositiveBigIntegerField()
+    # User the row belonged to; limits who is told about the delete
+    owner_id = models.PositiveBigIntegerField(null=True, blank=True)
+    # User who recorded the row, for lists that also show a row to whoever
+    # recorded it (payments); null otherwise
+    recorder_id = models.PositiveBigIntegerField(null=True, blank=True)
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Keyset scan of one model's deletes since a cursor
+            models.Index(fields=['model', 'deleted_at', 'id'], name='tombstone_model_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.model} #{self.object_id} deleted {self.deleted_at}"
+
+
+class SearchDocument(models.Model):
+    """
+    Searchable text of one row of a model registered with core.search.
+    Indexed by FTS5 on SQLite and by trigram/tsvector GIN indexes on
+    PostgreSQL (see migration 0002).
+    """
+    model = models.CharField(max_length=100, help_text="app_label.model_name of the indexed row")
+    object_id = models.PositiveBigIntegerField()
+    # User the row belongs to; results are scoped by it
+    owner_id = models.PositiveBigIntegerField(null=True, blank=True)
+    text = models.TextField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['model', 'object_id'], name='searchdocument_object_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['model', 'owner_id'], name='searchdocument_owner_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.model} #{self.object_id}"
@@ -0,0 +1,9 @@
+from rest_framework.pagination import LimitOffsetPagination
+
+
+class OptionalLimitOffsetPagination(LimitOffsetPagination):
+    """
+    `?limit=&offset=` paging for lists that used to return everything:
+    without `limit` the response stays a plain list.
+    """
+    max_limit = 500
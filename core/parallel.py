@@ -0,0 +1,60 @@
+"""
+Runs independent read-only pieces of one request side by side.
+
+Each worker thread has its own database connection, so this only pays
+off on a server database (PostgreSQL). On SQLite, inside a transaction
+(other connections can't see its rows) and with PARALLEL_QUERIES_WORKERS
+set to 0, the calls simply run one after another. Workers keep their
+connections between requests (subject to CONN_MAX_AGE) like request
+threads do.
+"""
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.PARALLEL_QUERIES_WORKERS,
+                thread_name_prefix='cbms-parallel',
+            )
+    return _executor
+
+
+def enabled():
+    return (
+        settings.PARALLEL_QUERIES_WORKERS > 0
+        and connection.vendor == 'postgresql'
+        and not connection.in_atomic_block
+    )
+
+
+def _call(func):
+    close_old_connections()
+    try:
+        return func()
+    finally:
+        close_old_connections()
+
+
+def run(calls):
+    """
+    {key: func()} for {key: func}. Exceptions propagate to the caller.
+    Tracing and slow-query context carry over into the worker threads.
+    """
+    if len(calls) < 2 or not enabled():
+        return {key: func() for key, func in calls.items()}
+    executor = _get_executor()
+    futures = {
+        key: executor.submit(contextvars.copy_context().run, _call, func)
+        for key, func in calls.items()
+    }
+    return {key: future.result() for key, future in futures.items()}
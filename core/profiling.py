@@ -0,0 +1,237 @@
+import cProfile
+import json
+import os
+import pstats
+import re
+import threading
+import time
+import uuid
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from rest_framework.serializers import BaseSerializer
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_QUERY_PARAM = '_profile'
+PROFILE_ID_RE = re.compile(r'^[0-9a-f]{32}$')
+
+# Profiled requests run one at a time (cProfile sessions cannot overlap on 3.12+)
+_profiler_lock = threading.Lock()
+
+
+def _code_key(function):
+    code = function.__code__
+    return (code.co_filename, code.co_firstlineno, code.co_name)
+
+
+# Entry points every serializer goes through; their cumulative time in the
+# profile is the time spent serializing / validating.
+SERIALIZER_ENTRY_POINTS = {
+    'serialize': _code_key(BaseSerializer.data.fget),
+    'validate': _code_key(BaseSerializer.is_valid),
+}
+
+
+class SQLRecorder:
+    """
+    execute_wrapper hook that keeps every statement with its timing.
+    """
+
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.statements.append({
+                'sql': sql,
+                'params': repr(params)[:500],
+                'ms': round((time.perf_counter() - started) * 1000, 3),
+                'many': many,
+            })
+
+    def summary(self):
+        """
+        Totals plus two kinds of repetition: identical statements
+        (same SQL and parameters) and similar ones (same SQL, different
+        parameters - the classic N+1 pattern).
+        """
+        identical, similar = {}, {}
+        for statement in self.statements:
+            for groups, key in ((identical, (statement['sql'], statement['params'])), (similar, statement['sql'])):
+                group = groups.setdefault(key, {'sql': statement['sql'], 'count': 0, 'ms': 0.0})
+                group['count'] += 1
+                group['ms'] = round(group['ms'] + statement['ms'], 3)
+
+        def repeated(groups):
+            return sorted((group for group in groups.values() if group['count'] > 1), key=lambda g: -g['count'])
+
+        return {
+            'count': len(self.statements),
+            'ms': round(sum(statement['ms'] for statement in self.statements), 3),
+            'duplicates': repeated(identical),
+            'similar': repeated(similar),
+            'statements': self.statements,
+        }
+
+
+def profile_path(profile_id, extension):
+    return os.path.join(settings.PROFILE_DIR, f'{profile_id}.{extension}')
+
+
+def _top_functions(stats, limit=40):
+    base_dir = str(settings.BASE_DIR)
+    rows = []
+    for (filename, line, name), (calls, _, own, cumulative, _) in stats.stats.items():
+        if filename.startswith(base_dir):
+            filename = os.path.relpath(filename, base_dir)
+        rows.append({
+            'function': f'{filename}:{line}({name})',
+            'calls': calls,
+            'own_ms': round(own * 1000, 3),
+            'cumulative_ms': round(cumulative * 1000, 3),
+        })
+    rows.sort(key=lambda row: -row['cumulative_ms'])
+    return rows[:limit]
+
+
+def _rotate():
+    """
+    Keeps only the newest PROFILE_KEEP profiles.
+    """
+    entries = []
+    for filename in os.listdir(settings.PROFILE_DIR):
+        if filename.endswith('.json'):
+            path = os.path.join(settings.PROFILE_DIR, filename)
+            entries.append((os.path.getmtime(path), filename[:-5]))
+    entries.sort(reverse=True)
+    for _, profile_id in entries[settings.PROFILE_KEEP:]:
+        for extension in ('json', 'prof'):
+            try:
+                os.remove(profile_path(profile_id, extension))
+            except FileNotFoundError:
+                pass
+
+
+def save_profile(request, response, user, profiler, recorder, elapsed):
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    profile_id = uuid.uuid4().hex
+
+    profiler.dump_stats(profile_path(profile_id, 'prof'))
+    stats = pstats.Stats(profiler)
+    serializer_ms = {
+        label: round(stats.stats[key][3] * 1000, 3) if key in stats.stats else 0.0
+        for label, key in SERIALIZER_ENTRY_POINTS.items()
+    }
+
+    report = {
+        'id': profile_id,
+        'created_at': timezone.now().isoformat(),
+        'method': request.method,
+        'path': request.get_full_path(),
+        'status': response.status_code,
+        'user_id': user.pk,
+        'duration_ms': round(elapsed * 1000, 3),
+        'serializer_ms': serializer_ms,
+        'sql': recorder.summary(),
+        'functions': _top_functions(stats),
+    }
+    with open(profile_path(profile_id, 'json'), 'w') as handle:
+        json.dump(report, handle, default=str)
+
+    _rotate()
+    return profile_id
+
+
+def list_profiles():
+    """
+    Summaries of stored profiles, newest first.
+    """
+    if not os.path.isdir(settings.PROFILE_DIR):
+        return []
+    profiles = []
+    for filename in os.listdir(settings.PROFILE_DIR):
+        if not filename.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(settings.PROFILE_DIR, filename)) as handle:
+                report = json.load(handle)
+        except (OSError, ValueError):
+            continue
+        profiles.append({
+            'id': report['id'],
+            'created_at': report['created_at'],
+            'method': report['method'],
+            'path': report['path'],
+            'status': report['status'],
+            'duration_ms': report['duration_ms'],
+            'sql_count': report['sql']['count'],
+            'sql_ms': report['sql']['ms'],
+        })
+    profiles.sort(key=lambda profile: profile['created_at'], reverse=True)
+    return profiles
+
+
+class ProfilingMiddleware:
+    """
+    Profiles a single request on demand. An admin adds `X-Profile: 1` or
+    `?_profile=1`; the request then runs under cProfile with every SQL
+    statement recorded, the report is written to PROFILE_DIR and its id
+    is returned in the X-Profile-Id response header.
+    Requests without the flag only pay for the flag check.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not (request.META.get(PROFILE_HEADER) or PROFILE_QUERY_PARAM in request.GET):
+            return self.get_response(request)
+        if not settings.PROFILING_ENABLED:
+            return self.get_response(request)
+
+        user = self.get_admin(request)
+        if user is None:
+            return self.get_response(request)
+
+        if not _profiler_lock.acquire(blocking=False):
+            response = self.get_response(request)
+            response['X-Profile-Skipped'] = 'busy'
+            return response
+
+        try:
+            profiler = cProfile.Profile()
+            recorder = SQLRecorder()
+            started = time.perf_counter()
+            with connection.execute_wrapper(recorder):
+                profiler.enable()
+                try:
+                    response = self.get_response(request)
+                finally:
+                    profiler.disable()
+            elapsed = time.perf_counter() - started
+        finally:
+            _profiler_lock.release()
+
+        response['X-Profile-Id'] = save_profile(request, response, user, profiler, recorder, elapsed)
+        return response
+
+    def get_admin(self, request):
+        """
+        API clients authenticate with JWT inside DRF, after middleware has
+        run, so the token is checked here; admin-site sessions come
+        through request.user.
+        """
+        from users.authentication import ClaimsJWTAuthentication
+        user = getattr(request, 'user', None)
+        if user is None or not user.is_authenticated:
+            try:
+                result = ClaimsJWTAuthentication().authenticate(request)
+            except Exception:
+                return None
+            user = result[0] if result else None
+        if user is not None and getattr(user, 'role', None) == 'admin':
+            return user
+        return None
@@ -0,0 +1,61 @@
+"""
+JSON renderer/parser backed by orjson when it is installed.
+
+orjson serializes dicts, lists, strings, numbers and UUIDs natively in C;
+anything else (dates and times, Decimal, lazy strings, querysets...)
+goes through DRF's encoder, so the output matches
+rest_framework.renderers.JSONRenderer. Dates and times are passed
+through too, so their format (sub-second digits, "Z" for UTC) is
+whatever DRF's version produces rather than orjson's own.
+Without orjson both classes behave exactly like DRF's.
+"""
+from django.conf import settings
+from rest_framework import parsers, renderers
+from rest_framework.utils import encoders
+from rest_framework.exceptions import ParseError
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+_encoder = encoders.JSONEncoder()
+
+
+def _default(obj):
+    return _encoder.default(obj)
+
+
+def _orjson_enabled():
+    return orjson is not None and settings.FAST_JSON
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        # Pretty printing (browsable API, `; indent=4`) and ASCII-only output
+        # are not on the hot path
+        if (not _orjson_enabled() or self.ensure_ascii
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=_default, option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS)
+        # Keep the output a strict JavaScript subset, as DRF does
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class FastJSONParser(parsers.JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if not _orjson_enabled():
+            return super().parse(stream, media_type, parser_context)
+        try:
+            # orjson only accepts UTF-8, which is all JSON may be sent as (RFC 8259)
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
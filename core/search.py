@@ -0,0 +1,185 @@
+"""
+Indexed full-text search over registered models.
+
+Every row of a model registered with register() has one SearchDocument
+holding its searchable text; post_save/post_delete receivers keep it
+current. The text is indexed by an FTS5 table on SQLite (maintained by
+triggers) and by trigram and tsvector GIN indexes on PostgreSQL, so a
+search is one indexed query ranked by bm25 or ts_rank/word_similarity.
+Other databases fall back to unranked icontains matching.
+
+Queries match every word as a prefix: "ali 9876" finds Alice whose
+phone starts with 9876.
+"""
+import re
+from django.db import connection
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from core.models import SearchDocument
+
+WORD_RE = re.compile(r'[^\W_]+')
+
+# {label: Registration}
+registry = {}
+
+
+class Registration:
+    def __init__(self, model, text, owner, fields, private):
+        self.model = model
+        self.label = model._meta.label_lower
+        self.text = text
+        self.owner = owner
+        self.fields = set(fields) if fields is not None else None
+        self.private = private
+
+    def document(self, instance):
+        return SearchDocument(
+            model=self.label, object_id=instance.pk, owner_id=self.owner(instance),
+            text=' '.join(part for part in self.text(instance) if part),
+        )
+
+
+def register(model, text, owner=lambda instance: instance.user_id, fields=None, private=False):
+    """
+    Indexes `model` rows. `text(instance)` returns the strings to index,
+    `owner(instance)` the user the row belongs to. Saves that only touch
+    columns outside `fields` leave the document alone. `private` rows are
+    only found by their owner (and admins); others by anyone who can see
+    the owner.
+    """
+    registration = Registration(model, text, owner, fields, private)
+    registry[registration.label] = registration
+
+    def index_saved(sender, instance, raw=False, update_fields=None, using=None, **kwargs):
+        if raw:
+            return
+        if update_fields is not None and registration.fields is not None and not set(update_fields) & registration.fields:
+            return
+        index_objects(registration, [instance], using=using)
+
+    def unindex_deleted(sender, instance, using=None, **kwargs):
+        SearchDocument.objects.using(using).filter(model=registration.label, object_id=instance.pk).delete()
+
+    uid = f'core.search.{registration.label}'
+    post_save.connect(index_saved, sender=model, weak=False, dispatch_uid=uid)
+    post_delete.connect(unindex_deleted, sender=model, weak=False, dispatch_uid=uid)
+    return registration
+
+
+def index_objects(registration, instances, using=None):
+    """
+    Writes (inserts or replaces) the documents of `instances`.
+    """
+    SearchDocument.objects.using(using).bulk_create(
+        [registration.document(instance) for instance in instances],
+        update_conflicts=True, unique_fields=['model', 'object_id'], update_fields=['owner_id', 'text'],
+    )
+
+
+def unindex(model, ids, using=None):
+    """
+    Drops the documents of `model` rows deleted in bulk (without signals).
+    """
+    SearchDocument.objects.using(using).filter(model=model._meta.label_lower, object_id__in=ids).delete()
+
+
+def words(query):
+    return [word.lower() for word in WORD_RE.findall(query or '')]
+
+
+def _scope_sql(scopes):
+    # "model = x [AND owner_id IN (...)] OR ..." for {label: owner ids or None}
+    clauses, params = [], []
+    for label, owners in scopes.items():
+        if owners is None:
+            clauses.append('d.model = %s')
+            params.append(label)
+        else:
+            placeholders = ', '.join(['%s'] * len(owners))
+            clauses.append(f'(d.model = %s AND d.owner_id IN ({placeholders}))')
+            params.extend([label, *owners])
+    return ' OR '.join(clauses), params
+
+
+def _search_sqlite(terms, scopes, limit):
+    scope, scope_params = _scope_sql(scopes)
+    sql = (
+        "SELECT d.model, d.object_id, -bm25(core_searchdocument_fts) AS score "
+        "FROM core_searchdocument_fts JOIN core_searchdocument d ON d.id = core_searchdocument_fts.rowid "
+        f"WHERE core_searchdocument_fts MATCH %s AND ({scope}) "
+        "ORDER BY bm25(core_searchdocument_fts) LIMIT %s"
+    )
+    match = ' '.join(f'"{term}"*' for term in terms)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [match, *scope_params, limit])
+        return cursor.fetchall()
+
+
+def _search_postgres(terms, scopes, limit):
+    scope, scope_params = _scope_sql(scopes)
+    like = ' AND '.join(['d.text ILIKE %s'] * len(terms))
+    sql = (
+        "SELECT d.model, d.object_id, "
+        "ts_rank(to_tsvector('simple', d.text), to_tsquery('simple', %s)) + word_similarity(%s, d.text) AS score "
+        "FROM core_searchdocument d "
+        f"WHERE (to_tsvector('simple', d.text) @@ to_tsquery('simple', %s) OR ({like})) AND ({scope}) "
+        "ORDER BY score DESC LIMIT %s"
+    )
+    # Prefix tsquery for whole words, trigram ILIKE for fragments
+    tsquery = ' & '.join(f'{term}:*' for term in terms)
+    params = [tsquery, ' '.join(terms), tsquery, *[f'%{term}%' for term in terms], *scope_params, limit]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def _search_fallback(terms, scopes, limit):
+    scope = Q()
+    for label, owners in scopes.items():
+        scope |= Q(model=label) if owners is None else Q(model=label, owner_id__in=owners)
+    documents = SearchDocument.objects.filter(scope)
+    for term in terms:
+        documents = documents.filter(text__icontains=term)
+    return [(model, object_id, 0.0) for model, object_id in documents.values_list('model', 'object_id')[:limit]]
+
+
+def search(query, scopes, limit=20):
+    """
+    Best matches for `query` as [(label, object_id, score)], highest score
+    first. `scopes` maps each label to search to the owner ids whose rows
+    may be returned (None: any owner).
+    """
+    terms = words(query)
+    scopes = {label: owners for label, owners in scopes.items() if owners is None or owners}
+    if not terms or not scopes:
+        return []
+    if connection.vendor == 'sqlite':
+        return _search_sqlite(terms, scopes, limit)
+    if connection.vendor == 'postgresql':
+        return _search_postgres(terms, scopes, limit)
+    return _search_fallback(terms, scopes, limit)
+
+
+def matching_ids(model, query, limit=1000):
+    """
+    Ids of `model` rows matching `query`, best first (e.g. for admin search).
+    """
+    label = model._meta.label_lower
+    return [object_id for _, object_id, _ in search(query, {label: None}, limit=limit)]
+
+
+def rebuild(registration, batch_size=2000):
+    """
+    Re-indexes every row of a registered model. Returns the row count.
+    """
+    SearchDocument.objects.filter(model=registration.label).delete()
+    count, batch = 0, []
+    for instance in registration.model._default_manager.order_by('pk').iterator(chunk_size=batch_size):
+        batch.append(instance)
+        if len(batch) >= batch_size:
+            index_objects(registration, batch)
+            count, batch = count + len(batch), []
+    if batch:
+        index_objects(registration, batch)
+        count += len(batch)
+    return count
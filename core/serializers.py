@@ -0,0 +1,137 @@
+"""
+Serializer mixins for sparse fieldsets and values()-based list rendering.
+
+A serializer mixing in ValuesSerializerMixin can describe every readable
+field as a set of ORM lookups plus a conversion of the resulting values()
+row. With that "values plan" a list is rendered straight from dicts:
+no model instances, no related-object descriptors and no per-row
+queries, while the output stays identical to `serializer.data`.
+
+Plain columns, foreign keys (as ids), files (as URLs) and
+`relation.column` / `relation.get_full_name` sources are planned
+automatically. Anything else (SerializerMethodField, custom sources)
+must be listed in `values_fields` or the serializer falls back to the
+regular instance path.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from rest_framework import serializers
+
+# Marks a field the instance path would omit (DRF raises SkipField when a
+# read-only dotted source crosses a null relation)
+SKIP = object()
+
+
+def full_name(first_name, last_name):
+    # Same as AbstractUser.get_full_name
+    return ('%s %s' % (first_name, last_name)).strip()
+
+
+class SparseFieldsMixin:
+    """
+    Accepts `fields=[...]` and drops every other field from the output.
+    """
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class ValuesSerializerMixin(SparseFieldsMixin):
+    # {field name: (lookups, function(serializer, row) -> value)}
+    values_fields = {}
+
+    def _plan_field(self, field):
+        if field.field_name in self.values_fields:
+            return self.values_fields[field.field_name]
+
+        model = self.Meta.model
+        attrs = field.source_attrs
+        if not attrs:
+            return None
+        try:
+            model_field = model._meta.get_field(attrs[0])
+        except FieldDoesNotExist:
+            return None
+        name = model_field.name
+
+        # 1. Column on the model itself
+        if len(attrs) == 1 and model_field.concrete:
+            if model_field.is_relation:
+                if isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None:
+                    return (name,), lambda serializer, row: row[name]
+                return None
+            if isinstance(model_field, models.FileField):
+                return (name,), lambda serializer, row: serializer._file_url(field, model_field, row[name])
+            return (name,), lambda serializer, row: None if row[name] is None else field.to_representation(row[name])
+
+        # 2. `relation.column` and `relation.get_full_name`
+        if len(attrs) == 2 and model_field.is_relation and (model_field.many_to_one or model_field.one_to_one):
+            related = model_field.related_model
+            key = f'{name}__{related._meta.pk.name}'
+            if attrs[1] == 'get_full_name' and hasattr(related, 'first_name'):
+                first, last = f'{name}__first_name', f'{name}__last_name'
+                return (key, first, last), lambda serializer, row: (
+                    SKIP if row[key] is None else full_name(row[first], row[last])
+                )
+            try:
+                related._meta.get_field(attrs[1])
+            except FieldDoesNotExist:
+                return None
+            column = f'{name}__{attrs[1]}'
+            return (key, column), lambda serializer, row: (
+                SKIP if row[key] is None else (None if row[column] is None else field.to_representation(row[column]))
+            )
+        return None
+
+    def _file_url(self, field, model_field, name):
+        # Mirrors serializers.FileField.to_representation
+        if not name:
+            return None
+        if not getattr(field, 'use_url', True):
+            return name
+        url = model_field.storage.url(name)
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request is not None else url
+
+    def values_plan(self):
+        """
+        [(field name, lookups, convert)] for every readable field, or None
+        if some field cannot be produced from a values() row.
+        """
+        plan = []
+        for field in self._readable_fields:
+            planned = self._plan_field(field)
+            if planned is None:
+                return None
+            lookups, convert = planned
+            plan.append((field.field_name, lookups, convert))
+        return plan
+
+    def values_lookups(self, plan=None):
+        plan = plan or self.values_plan() or []
+        return list(dict.fromkeys(lookup for _, lookups, _ in plan for lookup in lookups))
+
+    def to_representation_values(self, rows, plan=None):
+        plan = plan or self.values_plan()
+        data = []
+        for row in rows:
+            item = {}
+            for name, _, convert in plan:
+                value = convert(self, row)
+                if value is not SKIP:
+                    item[name] = value
+            data.append(item)
+        return data
+
+    def values_data(self, queryset):
+        """
+        List representation of `queryset` built from values() rows, or the
+        regular serializer output when the fields can't all be planned.
+        """
+        plan = self.values_plan()
+        if plan is None:
+            return type(self)(queryset, many=True, context=self.context, fields=list(self.fields)).data
+        return self.to_representation_values(queryset.values(*self.values_lookups(plan)), plan)
@@ -0,0 +1,273 @@
+"""
+Slow-query log.
+
+Every database connection gets an execute wrapper (installed from the
+connection_created signal) that times each statement. Statements slower than
+SLOW_QUERY_THRESHOLD_MS are logged with the view that issued them and the
+innermost project stack frame. The first time a statement shape is seen its
+plan is captured with EXPLAIN (Postgres) / EXPLAIN QUERY PLAN (SQLite), and
+full table scans are flagged.
+
+Statistics are aggregated per fingerprint (the SQL with literals and IN
+lists collapsed) and dumped per process into SLOW_QUERY_DIR, where the
+`slow_queries` management command reads them.
+"""
+import atexit
+import contextvars
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import traceback
+from django.conf import settings
+from django.db import DatabaseError, transaction
+
+logger = logging.getLogger(__name__)
+
+# "finance.payment-list / list", set for the duration of a request
+current_view = contextvars.ContextVar('slow_query_view', default='')
+_explaining = contextvars.ContextVar('slow_query_explaining', default=False)
+
+_IN_LIST_RE = re.compile(r'\bIN\s*\((?:\s*(?:%s|\?|\d+|\'[^\']*\')\s*,?)+\)', re.IGNORECASE)
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_SPACE_RE = re.compile(r'\s+')
+
+# SQLite: "SCAN finance_payment" (no index); Postgres: "Seq Scan on finance_payment"
+_SQLITE_SCAN_RE = re.compile(r'^SCAN (?:TABLE )?"?(\w+)"?(?! USING)(?:\s|$)')
+_POSTGRES_SCAN_RE = re.compile(r'Seq Scan on "?(\w+)"?')
+
+_PROJECT_ROOT = str(settings.BASE_DIR)
+# Middleware wraps every request, so it is never the interesting call site
+_SKIP_FRAME_PATHS = (
+    os.sep + 'site-packages' + os.sep,
+    os.path.join('core', 'slowlog.py'),
+    os.path.join('core', 'middleware.py'),
+    os.path.join('core', 'profiling.py'),
+    'manage.py',
+)
+
+
+def normalize(sql):
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    return _SPACE_RE.sub(' ', sql).strip()
+
+
+def fingerprint(normalized_sql):
+    return hashlib.sha1(normalized_sql.encode()).hexdigest()[:12]
+
+
+def project_frame():
+    """
+    The innermost stack frame that belongs to this project's code.
+    """
+    for frame in reversed(traceback.extract_stack()):
+        filename = frame.filename
+        if not filename.startswith(_PROJECT_ROOT) or any(part in filename for part in _SKIP_FRAME_PATHS):
+            continue
+        return f'{os.path.relpath(filename, _PROJECT_ROOT)}:{frame.lineno} in {frame.name}'
+    return ''
+
+
+def explain(connection, sql, params):
+    """
+    Returns (plan lines, tables scanned without an index). Runs inside a
+    savepoint so a failing EXPLAIN cannot break the caller's transaction.
+    """
+    if connection.vendor == 'sqlite':
+        prefix, scan_re = 'EXPLAIN QUERY PLAN ', _SQLITE_SCAN_RE
+    elif connection.vendor == 'postgresql':
+        prefix, scan_re = 'EXPLAIN ', _POSTGRES_SCAN_RE
+    else:
+        return [], []
+
+    token = _explaining.set(True)
+    try:
+        with transaction.atomic(using=connection.alias):
+            with connection.cursor() as cursor:
+                cursor.execute(prefix + sql, params)
+                rows = cursor.fetchall()
+    except DatabaseError:
+        logger.debug("EXPLAIN failed for %s", sql, exc_info=True)
+        return [], []
+    finally:
+        _explaining.reset(token)
+
+    # SQLite rows are (id, parent, notused, detail); Postgres rows are (line,)
+    plan = [str(row[-1]) for row in rows]
+    scans = sorted({match.group(1) for line in plan for match in [scan_re.search(line.strip())] if match})
+    return plan, scans
+
+
+class SlowQueryStats:
+    """
+    Per-process aggregates keyed by fingerprint.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.pid = os.getpid()
+        self.started = time.time()
+        self.entries = {}
+        self.last_flush = 0.0
+
+    def record(self, key, normalized_sql, duration_ms, view, frame):
+        """
+        Adds one occurrence; returns True the first time the fingerprint
+        is seen (the caller then captures its plan).
+        """
+        with self._lock:
+            if self.pid != os.getpid():
+                self._reset()
+            entry = self.entries.get(key)
+            first = entry is None
+            if first:
+                entry = self.entries[key] = {
+                    'sql': normalized_sql, 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                    'views': {}, 'frame': frame, 'plan': [], 'full_scans': [],
+                }
+            entry['count'] += 1
+            entry['total_ms'] += duration_ms
+            entry['max_ms'] = max(entry['max_ms'], duration_ms)
+            entry['views'][view] = entry['views'].get(view, 0) + 1
+            entry['last_seen'] = time.time()
+            return first
+
+    def set_plan(self, key, plan, scans):
+        with self._lock:
+            if key in self.entries:
+                self.entries[key]['plan'] = plan
+                self.entries[key]['full_scans'] = scans
+
+    @property
+    def path(self):
+        return os.path.join(settings.SLOW_QUERY_DIR, f'{self.pid}-{int(self.started * 1000)}.json')
+
+    def flush(self, force=False):
+        now = time.monotonic()
+        if not self.entries or (not force and now - self.last_flush < settings.SLOW_QUERY_FLUSH_INTERVAL):
+            return
+        with self._lock:
+            self.last_flush = now
+            payload = json.dumps(self.entries)
+        os.makedirs(settings.SLOW_QUERY_DIR, exist_ok=True)
+        temporary = f'{self.path}.tmp'
+        with open(temporary, 'w') as handle:
+            handle.write(payload)
+        os.replace(temporary, self.path)
+
+
+stats = SlowQueryStats()
+
+
+def collect():
+    """
+    Merges the files of all processes into {fingerprint: entry}.
+    """
+    merged = {}
+    if not os.path.isdir(settings.SLOW_QUERY_DIR):
+        return merged
+    for filename in os.listdir(settings.SLOW_QUERY_DIR):
+        if not filename.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(settings.SLOW_QUERY_DIR, filename)) as handle:
+                entries = json.load(handle)
+        except (OSError, ValueError):
+            continue
+        for key, entry in entries.items():
+            target = merged.get(key)
+            if target is None:
+                merged[key] = {**entry, 'views': dict(entry['views'])}
+                continue
+            target['count'] += entry['count']
+            target['total_ms'] += entry['total_ms']
+            target['max_ms'] = max(target['max_ms'], entry['max_ms'])
+            for view, count in entry['views'].items():
+                target['views'][view] = target['views'].get(view, 0) + count
+            if not target['plan'] and entry['plan']:
+                target['plan'], target['full_scans'] = entry['plan'], entry['full_scans']
+    return merged
+
+
+def slow_query_wrapper(execute, sql, params, many, context):
+    if _explaining.get():
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    result = execute(sql, params, many, context)
+    duration_ms = (time.perf_counter() - started) * 1000
+    if duration_ms < settings.SLOW_QUERY_THRESHOLD_MS:
+        return result
+
+    connection = context['connection']
+    normalized_sql = normalize(sql)
+    key = fingerprint(normalized_sql)
+    view = current_view.get() or '-'
+    frame = project_frame()
+    first = stats.record(key, normalized_sql, duration_ms, view, frame)
+
+    plan, scans = [], []
+    head = sql.lstrip()[:6].upper()
+    is_select = head.startswith('SELECT') or head.startswith('WITH')
+    if first and settings.SLOW_QUERY_EXPLAIN and not many and is_select:
+        plan, scans = explain(connection, sql, params)
+        stats.set_plan(key, plan, scans)
+
+    logger.warning(
+        "Slow query %.1fms [%s] view=%s at %s%s: %s%s",
+        duration_ms, key, view, frame or '?',
+        f" full scan on {', '.join(scans)}" if scans else '',
+        sql,
+        ''.join(f'\n    {line}' for line in plan),
+    )
+    stats.flush()
+    return result
+
+
+def install(sender, connection, **kwargs):
+    """
+    connection_created receiver. Django reuses one wrapper object per
+    thread and fires the signal on every reconnect, hence the check.
+    """
+    if slow_query_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(slow_query_wrapper)
+
+
+class SlowQueryMiddleware:
+    """
+    Makes the current view name available to the slow-query log.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = current_view.set('')
+        try:
+            return self.get_response(request)
+        finally:
+            current_view.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        match = request.resolver_match
+        actions = getattr(view_func, 'actions', None) or {}
+        action = actions.get(request.method.lower())
+        name = match.view_name if match else request.path
+        current_view.set(f'{name} / {action}' if action else name)
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        stats.flush(force=True)
+    except Exception:
+        pass
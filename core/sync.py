@@ -0,0 +1,280 @@
+"""
+Delta sync: what changed in a set of API lists since a cursor.
+
+Each section of a feed is read through the viewset that serves the
+corresponding list endpoint (its get_queryset() and serializer), so the
+feed is scoped by exactly the same role rules. Rows are walked in
+(updated_at, id) order; deletes come from core.models.Tombstone rows
+left by the post_delete receivers installed with track_deletes(). The
+opaque cursor holds the last position of both streams per section.
+
+updated_at is assigned before commit, so a slow transaction can commit
+a row behind a position that was already handed out. Rows younger than
+SYNC_SETTLE_SECONDS are therefore held back until a later sync.
+
+A client's scope can also change without any of its rows changing
+(e.g. a team move). The cursor carries a fingerprint of the sections'
+audiences; when it no longer matches, the feed restarts from the
+beginning and says so with `reset`, and the client drops its copy.
+The same happens to cursors issued before SYNC_TOMBSTONE_RETENTION_DAYS,
+since the tombstones they would need may have been pruned.
+"""
+import base64
+import binascii
+import datetime
+import hashlib
+import json
+from django.conf import settings
+from django.db.models import Q
+from django.db.models.signals import post_delete
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from core.models import Tombstone
+
+CURSOR_VERSION = 1
+
+
+def model_label(model):
+    return model._meta.label_lower
+
+
+def track_deletes(model, owner=lambda instance: instance.user_id, recorder=None):
+    """
+    Leaves a Tombstone for every deleted `model` row. `owner(instance)`
+    is the user the row belonged to, `recorder(instance)` (optional) the
+    user who recorded it.
+    """
+    label = model_label(model)
+
+    def record_delete(sender, instance, using, **kwargs):
+        Tombstone.objects.using(using).create(
+            model=label, object_id=instance.pk, owner_id=owner(instance),
+            recorder_id=recorder(instance) if recorder else None,
+        )
+
+    post_delete.connect(record_delete, sender=model, weak=False, dispatch_uid=f'core.sync.{label}')
+
+
+def record_deletes(model, rows, using=None):
+    """
+    Tombstones for rows deleted in bulk without post_delete signals;
+    `rows` are (object_id, owner_id) or (object_id, owner_id, recorder_id).
+    """
+    label = model_label(model)
+    Tombstone.objects.using(using).bulk_create([
+        Tombstone(model=label, object_id=row[0], owner_id=row[1], recorder_id=row[2] if len(row) > 2 else None)
+        for row in rows
+    ])
+
+
+def tombstone_horizon():
+    return timezone.now() - datetime.timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+
+
+def prune_tombstones(before=None, chunk_size=5000):
+    """
+    Deletes tombstones older than `before` (the retention horizon by
+    default) in chunks. Returns the number deleted.
+    """
+    before = before or tombstone_horizon()
+    deleted = 0
+    while True:
+        ids = list(Tombstone.objects.filter(deleted_at__lt=before).order_by().values_list('id', flat=True)[:chunk_size])
+        if not ids:
+            return deleted
+        deleted += Tombstone.objects.filter(id__in=ids).delete()[0]
+
+
+def _after(queryset, time_field, position):
+    if position is None:
+        return queryset
+    moment, pk = position
+    return queryset.filter(Q(**{f'{time_field}__gt': moment}) | Q(**{time_field: moment, 'id__gt': pk}))
+
+
+def _position(moment, pk):
+    return [moment.isoformat(), pk]
+
+
+class Section:
+    """
+    One list of a feed: `model` rows as served by `viewset`. `audience`
+    works like the feed's (see Feed) for lists the viewset scopes
+    differently; by default the section uses the feed's.
+    """
+
+    def __init__(self, name, model, viewset, audience=None, recorder=None):
+        self.name = name
+        self.model = model
+        self.viewset = viewset
+        self.audience = audience
+        # recorder(request): user whose recorded rows the viewset lists
+        # regardless of owner, or None
+        self.recorder = recorder
+
+    def get_view(self, request):
+        return self.viewset(request=request, action='list', args=(), kwargs={}, format_kwarg=None)
+
+    def get_queryset(self, request):
+        return self.get_view(request).get_queryset()
+
+    def upserts(self, request, position, until, limit):
+        """
+        (data, last position, more) for rows inserted or updated after
+        `position`, in (updated_at, id) order.
+        """
+        view = self.get_view(request)
+        queryset = _after(view.get_queryset().filter(updated_at__lte=until), 'updated_at', position)
+        queryset = queryset.order_by('updated_at', 'id')
+        serializer = view.get_serializer_class()(context=view.get_serializer_context())
+
+        plan = serializer.values_plan() if hasattr(serializer, 'values_plan') else None
+        if plan is not None:
+            lookups = list(dict.fromkeys([*serializer.values_lookups(plan), 'id', 'updated_at']))
+            rows = list(queryset.values(*lookups)[:limit + 1])
+            more = len(rows) > limit
+            rows = rows[:limit]
+            data = serializer.to_representation_values(rows, plan)
+            last = (rows[-1]['updated_at'], rows[-1]['id']) if rows else None
+        else:
+            instances = list(queryset[:limit + 1])
+            more = len(instances) > limit
+            instances = instances[:limit]
+            data = [serializer.to_representation(instance) for instance in instances]
+            last = (instances[-1].updated_at, instances[-1].id) if instances else None
+        return data, (_position(*last) if last else None), more
+
+    def deletes(self, owners, position, until, limit, recorder=None):
+        """
+        (ids, last position, more) for rows deleted after `position`.
+        `owners` limits them to rows of those users (None: everyone's),
+        plus rows recorded by `recorder`.
+        """
+        queryset = Tombstone.objects.filter(model=model_label(self.model), deleted_at__lte=until)
+        if owners is not None:
+            visible = Q(owner_id__in=owners)
+            if recorder is not None:
+                visible |= Q(recorder_id=recorder)
+            queryset = queryset.filter(visible)
+        queryset = _after(queryset, 'deleted_at', position).order_by('deleted_at', 'id')
+        rows = list(queryset.values_list('deleted_at', 'id', 'object_id')[:limit + 1])
+        more = len(rows) > limit
+        rows = rows[:limit]
+        last = _position(rows[-1][0], rows[-1][1]) if rows else None
+        return [object_id for _, _, object_id in rows], last, more
+
+
+class Feed:
+    """
+    A set of sections synced together. `audience(request)` returns the
+    ids of the users whose rows the requester can see, or None when
+    they can see everything; it scopes tombstones and fingerprints the
+    cursor.
+    """
+
+    def __init__(self, sections, audience):
+        self.sections = {section.name: section for section in sections}
+        self.audience = audience
+
+    def audiences(self, request):
+        """
+        {section name: owners} for every section, whichever are synced.
+        """
+        owners = self.audience(request)
+        return {
+            name: section.audience(request) if section.audience else owners
+            for name, section in self.sections.items()
+        }
+
+    def scope(self, audiences):
+        if all(owners is None for owners in audiences.values()):
+            return 'all'
+        joined = ';'.join(
+            f"{name}:{'*' if owners is None else ','.join(str(pk) for pk in sorted(owners))}"
+            for name, owners in sorted(audiences.items())
+        )
+        return hashlib.sha1(joined.encode()).hexdigest()[:16]
+
+    def encode_cursor(self, scope, positions):
+        payload = {'v': CURSOR_VERSION, 'scope': scope, 'at': int(timezone.now().timestamp()), 'sections': positions}
+        payload = json.dumps(payload, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, raw):
+        """
+        (scope, issued at, {section: {'updated': position, 'deleted': position}}).
+        """
+        if not raw:
+            return None, None, {}
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(raw + '=' * (-len(raw) % 4)))
+            if payload.get('v') != CURSOR_VERSION:
+                raise ValueError
+            positions = {}
+            for name, streams in payload['sections'].items():
+                if name not in self.sections:
+                    continue
+                positions[name] = {}
+                for stream, position in streams.items():
+                    if position is None:
+                        continue
+                    moment = parse_datetime(position[0])
+                    if moment is None or not isinstance(position[1], int):
+                        raise ValueError
+                    positions[name][stream] = [position[0], position[1]]
+            issued = payload.get('at')
+            if issued is not None:
+                issued = datetime.datetime.fromtimestamp(int(issued), tz=datetime.timezone.utc)
+            return payload['scope'], issued, positions
+        except (ValueError, TypeError, KeyError, AttributeError, IndexError, binascii.Error, OverflowError, OSError):
+            raise ValidationError({'cursor': 'Invalid cursor.'})
+
+    def changes(self, request, cursor=None, names=None, limit=None):
+        """
+        Everything that changed since `cursor` in the sections `names`
+        (all by default), at most `limit` upserts and `limit` deletes per
+        section. Feed the returned cursor back to continue; `has_more`
+        means another page is ready right away.
+        """
+        limit = limit or settings.SYNC_PAGE_SIZE
+        names = names or list(self.sections)
+        unknown = [name for name in names if name not in self.sections]
+        if unknown:
+            raise ValidationError({'sections': f"Unknown section(s): {', '.join(unknown)}."})
+
+        audiences = self.audiences(request)
+        scope = self.scope(audiences)
+        cursor_scope, issued, positions = self.decode_cursor(cursor)
+        # Audience changed, or deletes may have been pruned since
+        reset = cursor_scope is not None and (
+            cursor_scope != scope or (issued is not None and issued < tombstone_horizon())
+        )
+        if reset:
+            positions = {}
+
+        until = timezone.now() - datetime.timedelta(seconds=settings.SYNC_SETTLE_SECONDS)
+        changes, has_more = {}, False
+        for name in names:
+            section = self.sections[name]
+            current = positions.setdefault(name, {})
+            updated, deleted = (
+                [parse_datetime(current[stream][0]), current[stream][1]] if stream in current else None
+                for stream in ('updated', 'deleted')
+            )
+            data, last_updated, more_updated = section.upserts(request, updated, until, limit)
+            recorder = section.recorder(request) if section.recorder else None
+            ids, last_deleted, more_deleted = section.deletes(audiences[name], deleted, until, limit, recorder)
+            if last_updated:
+                current['updated'] = last_updated
+            if last_deleted:
+                current['deleted'] = last_deleted
+            changes[name] = {'upserted': data, 'deleted': ids}
+            has_more = has_more or more_updated or more_deleted
+
+        return {
+            'cursor': self.encode_cursor(scope, positions),
+            'has_more': has_more,
+            'reset': reset,
+            'changes': changes,
+        }
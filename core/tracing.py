@@ -0,0 +1,268 @@
+"""
+Lightweight request tracing with a local JSONL exporter.
+
+A trace is a tree of spans kept in a context variable. The root span is
+opened by TracingMiddleware (or by a background job / service call made
+outside a request); when it ends, the whole trace is appended to
+TRACE_FILE as one JSON object per span. `python manage.py traces` prints
+traces as trees.
+
+install() (called from CoreConfig.ready when TRACING_ENABLED) adds spans for
+APIView.dispatch, per-view get_queryset, serializer output/validation and
+every database query. Service functions opt in with @traced.
+"""
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_current_span = contextvars.ContextVar('trace_span', default=None)
+_export_lock = threading.Lock()
+
+
+class Span:
+    __slots__ = ('trace', 'trace_id', 'span_id', 'parent_id', 'name', 'kind', 'attrs', 'started_at', '_started', 'duration_ms', 'error')
+
+    def __init__(self, trace, trace_id, parent_id, name, kind, attrs):
+        self.trace = trace
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attrs = attrs
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self.duration_ms = None
+        self.error = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def as_dict(self):
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'kind': self.kind,
+            'start': self.started_at,
+            'duration_ms': self.duration_ms,
+            'attrs': self.attrs,
+            'error': self.error,
+        }
+
+
+def current_ids():
+    """
+    (trace_id, span_id) of the active span, or None. Hand this to work that
+    runs elsewhere (e.g. a background job) to continue the trace there.
+    """
+    span = _current_span.get()
+    return (span.trace_id, span.span_id) if span else None
+
+
+def current_trace_id():
+    span = _current_span.get()
+    return span.trace_id if span else ''
+
+
+class span:
+    """
+    Context manager for one span. Without an active trace it starts a new
+    one, unless `root=False`, in which case nothing is recorded. `parent`
+    is a (trace_id, span_id) pair from current_ids() to continue a trace.
+    """
+
+    __slots__ = ('name', 'kind', 'attrs', 'root', 'parent', 'span', '_token')
+
+    def __init__(self, name, kind='internal', root=True, parent=None, **attrs):
+        self.name = name
+        self.kind = kind
+        self.attrs = attrs
+        self.root = root
+        self.parent = parent
+        self.span = None
+        self._token = None
+
+    def __enter__(self):
+        if not settings.TRACING_ENABLED:
+            return None
+        active = _current_span.get()
+        if active is not None:
+            trace = active.trace
+            if len(trace) >= settings.TRACE_MAX_SPANS:
+                return None
+            self.span = Span(trace, active.trace_id, active.span_id, self.name, self.kind, self.attrs)
+        elif self.root:
+            trace_id, parent_id = self.parent or (uuid.uuid4().hex, None)
+            self.span = Span([], trace_id, parent_id, self.name, self.kind, self.attrs)
+        else:
+            return None
+        self._token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        current = self.span
+        if current is None:
+            return False
+        current.duration_ms = round((time.perf_counter() - current._started) * 1000, 3)
+        if exc_type is not None:
+            current.error = f'{exc_type.__name__}: {exc}'
+        _current_span.reset(self._token)
+        current.trace.append(current)
+        if _current_span.get() is None and current.duration_ms >= settings.TRACE_MIN_DURATION_MS:
+            # Root finished: ship the whole trace
+            export(current.trace)
+        return False
+
+
+def traced(func=None, *, name=None):
+    """
+    Decorator giving a function its own span, e.g. @traced on service
+    functions. Costs one settings lookup when tracing is off.
+    """
+    def decorate(func):
+        span_name = name or f'{func.__module__}.{func.__qualname__}'
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not settings.TRACING_ENABLED:
+                return func(*args, **kwargs)
+            with span(span_name, kind='function'):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorate(func) if func is not None else decorate
+
+
+def export(spans):
+    """
+    Appends a finished trace to TRACE_FILE, rotating it to `.1` once it
+    grows past TRACE_FILE_MAX_BYTES.
+    """
+    lines = ''.join(json.dumps(item.as_dict(), default=str) + '\n' for item in spans)
+    path = settings.TRACE_FILE
+    try:
+        with _export_lock:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if os.path.exists(path) and os.path.getsize(path) > settings.TRACE_FILE_MAX_BYTES:
+                os.replace(path, f'{path}.1')
+            with open(path, 'a') as handle:
+                handle.write(lines)
+    except OSError:
+        logger.warning("Could not export trace", exc_info=True)
+
+
+def read_traces(path=None):
+    """
+    {trace_id: [span dicts]} from the exporter file (and its rotation).
+    """
+    path = path or settings.TRACE_FILE
+    traces = {}
+    for filename in (f'{path}.1', path):
+        if not os.path.exists(filename):
+            continue
+        with open(filename) as handle:
+            for line in handle:
+                try:
+                    item = json.loads(line)
+                except ValueError:
+                    continue
+                traces.setdefault(item['trace_id'], []).append(item)
+    return traces
+
+
+class TraceIdFilter(logging.Filter):
+    """
+    Adds `trace_id` to every log record so log lines can be matched to traces.
+    """
+
+    def filter(self, record):
+        record.trace_id = current_trace_id() or '-'
+        return True
+
+
+class TracingMiddleware:
+    """
+    Opens the root span of every request and returns its id in X-Trace-Id.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.TRACING_ENABLED:
+            return self.get_response(request)
+        with span(f'{request.method} {request.path}', kind='http', method=request.method, path=request.path) as root:
+            response = self.get_response(request)
+            match = getattr(request, 'resolver_match', None)
+            root.set(view=match.view_name if match else '', status=response.status_code)
+        response['X-Trace-Id'] = root.trace_id
+        return response
+
+
+def _db_span_wrapper(execute, sql, params, many, context):
+    with span('db.query', kind='db', root=False, sql=sql[:500], many=many):
+        return execute(sql, params, many, context)
+
+
+def _install_db_wrapper(sender, connection, **kwargs):
+    if _db_span_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_db_span_wrapper)
+
+
+def install():
+    """
+    Patches DRF and the database layer. Only called when tracing is on, so
+    a disabled tracer leaves the request path untouched.
+    """
+    from django.db.backends.signals import connection_created
+    from rest_framework.serializers import BaseSerializer
+    from rest_framework.views import APIView
+
+    original_dispatch = APIView.dispatch
+
+    def dispatch(self, request, *args, **kwargs):
+        view_name = type(self).__name__
+        action = getattr(self, 'action_map', {}).get(request.method.lower(), '')
+        # get_queryset is overridden without super() in most views, so it is
+        # wrapped on the instance rather than on GenericAPIView
+        get_queryset = getattr(self, 'get_queryset', None)
+        if get_queryset is not None:
+            def traced_get_queryset():
+                with span(f'{view_name}.get_queryset', kind='view', root=False):
+                    return get_queryset()
+            self.get_queryset = traced_get_queryset
+        with span(f'{view_name}.dispatch', kind='view', root=False, action=action):
+            return original_dispatch(self, request, *args, **kwargs)
+
+    APIView.dispatch = functools.wraps(original_dispatch)(dispatch)
+
+    # Spanning every nested to_representation call would produce one span
+    # per field per row, so the top-level entry points are wrapped instead:
+    # `.data` (which runs to_representation) and `is_valid` (run_validation).
+    original_data = BaseSerializer.data.fget
+
+    def data(self):
+        with span(f'{type(self).__name__}.to_representation', kind='serializer', root=False):
+            return original_data(self)
+
+    BaseSerializer.data = property(functools.wraps(original_data)(data))
+
+    original_is_valid = BaseSerializer.is_valid
+
+    def is_valid(self, *args, **kwargs):
+        with span(f'{type(self).__name__}.validate', kind='serializer', root=False):
+            return original_is_valid(self, *args, **kwargs)
+
+    BaseSerializer.is_valid = functools.wraps(original_is_valid)(is_valid)
+
+    connection_created.connect(_install_db_wrapper, dispatch_uid='core.tracing.db')
@@ -0,0 +1,56 @@
+import os
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_safe
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from core import metrics, profiling
+
+
+def _metrics_allowed(request):
+    # Fail closed: behind a local proxy every request comes from loopback,
+    # so the address proves nothing; without a token nobody may scrape
+    token = settings.METRICS_AUTH_TOKEN
+    if not token:
+        return False
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    return constant_time_compare(header, f'Bearer {token}')
+
+
+@require_safe
+def metrics_view(request):
+    if not _metrics_allowed(request):
+        return HttpResponseForbidden()
+    metrics.registry.flush(force=True)
+    return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class ProfileListView(APIView):
+    """
+    Admin-only: stored request profiles (see core.profiling).
+    """
+
+    def get(self, request):
+        if request.user.role != 'admin':
+            return Response({'error': 'Authorized personnel only.'}, status=403)
+        return Response(profiling.list_profiles())
+
+
+class ProfileDetailView(APIView):
+    """
+    Admin-only: the JSON report of one profile, or with ?download=prof the
+    raw pstats dump (for snakeviz / pstats).
+    """
+
+    def get(self, request, profile_id):
+        if request.user.role != 'admin':
+            return Response({'error': 'Authorized personnel only.'}, status=403)
+        if not profiling.PROFILE_ID_RE.match(profile_id):
+            raise Http404("Not found")
+        extension = 'prof' if request.query_params.get('download') == 'prof' else 'json'
+        path = profiling.profile_path(profile_id, extension)
+        if not os.path.exists(path):
+            raise Http404("Not found")
+        content_type = 'application/json' if extension == 'json' else 'application/octet-stream'
+        return FileResponse(open(path, 'rb'), as_attachment=True, filename=f'{profile_id}.{extension}', content_type=content_type)
@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import Payment, FundRequest, Notification
+from django.db.models import Q
+from core import search
+from users.models import User
+from .models import Payment, FundRequest, Notification, FiscalClose, FinancialEvent
 
 @admin.register(Payment)
 class PaymentAdmin(admin.ModelAdmin):
@@ -7,9 +10,60 @@ class PaymentAdmin(admin.ModelAdmin):
     list_filter = ['transaction_type', 'date']
     search_fields = ['user__username', 'user__first_name']
 
+    def get_search_results(self, request, queryset, search_term):
+        # Member names and notes come from the search index (core.search)
+        # instead of unindexed icontains scans
+        if not search_term.strip():
+            return queryset, False
+        matches = (
+            Q(pk__in=search.matching_ids(Payment, search_term)) |
+            Q(user_id__in=search.matching_ids(User, search_term))
+        )
+        return queryset.filter(matches), False
+
+    def has_change_permission(self, request, obj=None):
+        # Opening balances belong to the fiscal year close (finance.closing)
+        if obj is not None and obj.is_opening_balance:
+            return False
+        return super().has_change_permission(request, obj)
+
+    def has_delete_permission(self, request, obj=None):
+        if obj is not None and obj.is_opening_balance:
+            return False
+        return super().has_delete_permission(request, obj)
+
 @admin.register(FundRequest)
 class FundRequestAdmin(admin.ModelAdmin):
     list_display = ['user', 'amount', 'status', 'payment_status']
     list_filter = ['status', 'payment_status']
 
-admin.site.register(Notification)
\ No newline at end of file
+admin.site.register(Notification)
+
+@admin.register(FiscalClose)
+class FiscalCloseAdmin(admin.ModelAdmin):
+    list_display = ['through', 'closed_at', 'closed_by', 'archived_count', 'collected', 'disbursed']
+
+    def has_add_permission(self, request):
+        # Closes are made with `manage.py close_fiscal_year`
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+@admin.register(FinancialEvent)
+class FinancialEventAdmin(admin.ModelAdmin):
+    list_display = ['sequence', 'created_at', 'action', 'model', 'object_id', 'owner_id', 'actor_id']
+    list_filter = ['action', 'model']
+
+    # Append-only (see finance.audit)
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
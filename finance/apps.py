@@ -4,3 +4,29 @@ from django.apps import AppConfig
 class FinanceConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'finance'
+
+    def ready(self):
+        from core import search
+        from core.sync import track_deletes
+        from finance import audit
+        from finance.models import Payment, FundRequest, WalletTransaction, Notification
+        # Payments are also listed to whoever recorded them (PaymentViewSet)
+        track_deletes(Payment, recorder=lambda payment: payment.recorded_by_id)
+        for model in (FundRequest, WalletTransaction, Notification):
+            track_deletes(model)
+
+        # Every change to these columns lands in the audit log
+        audit.track(Payment, ['user', 'amount', 'transaction_type', 'date', 'is_opening_balance'])
+        audit.track(FundRequest, ['user', 'amount', 'status', 'payment_status', 'paid_amount', 'scheduled_payment_date'])
+        audit.track(WalletTransaction, ['user', 'amount', 'transaction_type', 'payment_method', 'transaction_id', 'status'])
+
+        search.register(Payment, lambda payment: [payment.notes], fields=['user', 'notes'])
+        search.register(
+            FundRequest, lambda request: [request.reason, request.detailed_reason],
+            fields=['user', 'reason', 'detailed_reason'],
+        )
+        # Wallet rows are only listed to their owner (see WalletTransactionViewSet)
+        search.register(
+            WalletTransaction, lambda transaction: [transaction.transaction_id, transaction.notes],
+            fields=['user', 'transaction_id', 'notes'], private=True,
+        )
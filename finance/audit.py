@@ -0,0 +1,389 @@
+"""
+Append-only, hash-chained log of financial changes (FinancialEvent).
+
+Every create, update and delete of a tracked model appends one event in
+the same transaction as the change: the row's tracked fields before and
+after, the member it belongs to, who made the change (the request's
+user, or acting_as()), and a SHA-256 hash over all of that and the
+previous event's hash. Editing, removing or reordering any event breaks
+every hash after it (`verify_audit_log`).
+
+Appends lock the single AuditChainHead row, which holds the last
+sequence number and hash, so the chain stays linear; the lock is held
+until the writing transaction commits, so keep those short. Code that
+writes tracked rows without signals (bulk_create, _raw_delete) must log
+them with record_created() / record_deleted().
+
+AuditCheckpoint rows hold every member's payment totals at a point of
+the chain. Verifying the chain or rebuilding balances at a moment
+replays only the events after the nearest checkpoint. A checkpoint is
+written in the background every AUDIT_CHECKPOINT_INTERVAL events, and
+`audit_checkpoint` writes one on demand.
+"""
+import contextlib
+import contextvars
+import datetime
+import hashlib
+import json
+from collections import defaultdict
+from decimal import Decimal
+from django.conf import settings
+from django.db import IntegrityError, connections, models, transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.utils import timezone
+from core import jobs
+from finance.models import AuditChainHead, AuditCheckpoint, FinancialEvent, Payment
+
+GENESIS_HASH = '0' * 64
+LEDGER = 'finance.payment'
+
+# {label: Tracked}
+registry = {}
+
+_request = contextvars.ContextVar('audit_request', default=None)
+_actor = contextvars.ContextVar('audit_actor', default=None)
+
+
+class AuditMiddleware:
+    """
+    Makes the request's user the actor of events logged while serving it.
+    The user is read when an event is written, after DRF authentication.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _request.set(request)
+        try:
+            return self.get_response(request)
+        finally:
+            _request.reset(token)
+
+
+@contextlib.contextmanager
+def acting_as(user):
+    """
+    Attributes events logged inside the block to `user` (commands, jobs).
+    """
+    token = _actor.set(user)
+    try:
+        yield
+    finally:
+        _actor.reset(token)
+
+
+def current_actor_id():
+    actor = _actor.get()
+    if actor is None:
+        actor = getattr(_request.get(), 'user', None)
+    if actor is None or not getattr(actor, 'is_authenticated', False):
+        return None
+    return actor.pk
+
+
+def _plain(field, value):
+    # JSON-safe and stable: the same value always hashes the same way
+    if value is None:
+        return None
+    value = field.to_python(value)
+    if isinstance(field, models.DecimalField):
+        return str(value.quantize(Decimal(1).scaleb(-field.decimal_places)))
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return value
+
+
+class Tracked:
+    def __init__(self, model, fields, owner):
+        self.model = model
+        self.label = model._meta.label_lower
+        self.fields = [model._meta.get_field(name) for name in fields]
+        self.attnames = [field.attname for field in self.fields]
+        self.owner = owner
+
+    def state(self, instance):
+        return {field.attname: _plain(field, getattr(instance, field.attname)) for field in self.fields}
+
+    def state_of_row(self, row):
+        return {field.attname: _plain(field, row[field.attname]) for field in self.fields}
+
+    def entry(self, object_id, action, before, after):
+        return {
+            'model': self.label, 'object_id': object_id, 'action': action,
+            'owner_id': (after or before).get(self.owner), 'before': before, 'after': after,
+        }
+
+
+def track(model, fields, owner='user_id'):
+    """
+    Logs every change to `fields` of `model` rows. `owner` is the
+    attname holding the member the row belongs to.
+    """
+    tracked = Tracked(model, fields, owner)
+    registry[tracked.label] = tracked
+
+    def load_previous(sender, instance, raw=False, using=None, update_fields=None, **kwargs):
+        # The row as stored, locked until commit when inside a transaction
+        instance._audit_state = None
+        if raw or instance.pk is None:
+            return
+        if update_fields is not None and not set(update_fields) & {field.name for field in tracked.fields}:
+            instance._audit_state = False
+            return
+        rows = model._base_manager.using(using).filter(pk=instance.pk)
+        if connections[using or 'default'].in_atomic_block:
+            rows = rows.select_for_update()
+        row = rows.values(*tracked.attnames).first()
+        instance._audit_state = tracked.state_of_row(row) if row else None
+
+    def log_saved(sender, instance, created, raw=False, using=None, **kwargs):
+        before = getattr(instance, '_audit_state', None)
+        if raw or before is False:
+            return
+        after = tracked.state(instance)
+        if before != after:
+            action = FinancialEvent.Action.CREATE if before is None else FinancialEvent.Action.UPDATE
+            append_many([tracked.entry(instance.pk, action, before, after)], using=using)
+
+    def log_deleted(sender, instance, using=None, **kwargs):
+        append_many([tracked.entry(instance.pk, FinancialEvent.Action.DELETE, tracked.state(instance), None)], using=using)
+
+    uid = f'finance.audit.{tracked.label}'
+    pre_save.connect(load_previous, sender=model, weak=False, dispatch_uid=uid)
+    post_save.connect(log_saved, sender=model, weak=False, dispatch_uid=uid)
+    post_delete.connect(log_deleted, sender=model, weak=False, dispatch_uid=uid)
+    return tracked
+
+
+def record_created(model, instances, using=None):
+    """
+    Logs rows inserted with bulk_create().
+    """
+    tracked = registry[model._meta.label_lower]
+    append_many(
+        [tracked.entry(instance.pk, FinancialEvent.Action.CREATE, None, tracked.state(instance)) for instance in instances],
+        using=using,
+    )
+
+
+def record_updated(model, instances, using=None, **changes):
+    """
+    Logs a queryset .update() of `instances` (as loaded before it) to
+    `changes`, and applies the changes to the instances.
+    """
+    tracked = registry[model._meta.label_lower]
+    entries = []
+    for instance in instances:
+        before = tracked.state(instance)
+        for name, value in changes.items():
+            setattr(instance, name, value)
+        entries.append(tracked.entry(instance.pk, FinancialEvent.Action.UPDATE, before, tracked.state(instance)))
+    append_many(entries, using=using)
+
+
+def record_deleted(model, rows, action=None, using=None):
+    """
+    Logs rows deleted without signals; `rows` are values() dicts holding
+    the id and every tracked field.
+    """
+    tracked = registry[model._meta.label_lower]
+    action = action or FinancialEvent.Action.DELETE
+    append_many([tracked.entry(row['id'], action, tracked.state_of_row(row), None) for row in rows], using=using)
+
+
+def event_hash(event):
+    payload = json.dumps([
+        event.sequence, event.created_at.isoformat(), event.model, event.object_id, event.action,
+        event.owner_id, event.actor_id, event.before, event.after, event.previous_hash,
+    ], separators=(',', ':'), sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def append_many(entries, using=None):
+    """
+    Appends events for `entries` (model, object_id, action, owner_id,
+    before, after) to the chain, in order. Returns the events.
+    """
+    if not entries:
+        return []
+    # No savepoint: a failed append must fail the change it records
+    with transaction.atomic(using=using, savepoint=False):
+        head = AuditChainHead.objects.using(using).select_for_update().get()
+        # Never let the clock run backwards along the chain
+        now = max(timezone.now(), head.at)
+        actor_id = current_actor_id()
+        events, sequence, previous = [], head.sequence, head.hash
+        for entry in entries:
+            sequence += 1
+            event = FinancialEvent(sequence=sequence, created_at=now, actor_id=actor_id, previous_hash=previous, **entry)
+            event.hash = previous = event_hash(event)
+            events.append(event)
+        FinancialEvent.objects.using(using).bulk_create(events)
+        interval = settings.AUDIT_CHECKPOINT_INTERVAL
+        if interval and sequence // interval > head.sequence // interval:
+            jobs.enqueue(write_checkpoint)
+        head.sequence, head.hash, head.at = sequence, previous, now
+        head.save(update_fields=['sequence', 'hash', 'at'])
+    return events
+
+
+class ChainError(Exception):
+    pass
+
+
+def apply(balances, event):
+    """
+    Adds a payment event to `balances` ({member id: {type: Decimal}}).
+    """
+    if event.model != LEDGER:
+        return
+    for state, sign in ((event.before, -1), (event.after, 1)):
+        if state:
+            balances[str(state['user_id'])][state['transaction_type']] += sign * Decimal(state['amount'])
+
+
+def _balances(stored=None):
+    balances = defaultdict(lambda: defaultdict(Decimal))
+    for member, totals in (stored or {}).items():
+        for transaction_type, amount in totals.items():
+            balances[member][transaction_type] = Decimal(amount)
+    return balances
+
+
+def _stored(balances):
+    cent = Decimal('0.01')
+    return {
+        member: {transaction_type: str(amount.quantize(cent)) for transaction_type, amount in sorted(totals.items()) if amount}
+        for member, totals in sorted(balances.items(), key=lambda item: int(item[0]))
+        if any(totals.values())
+    }
+
+
+class Position:
+    """
+    A point of the chain being replayed: last sequence and hash, and the
+    payment totals up to there.
+    """
+
+    def __init__(self, sequence, hash, balances):
+        self.sequence = sequence
+        self.hash = hash
+        self.balances = balances
+        self.last = None
+
+    @classmethod
+    def at(cls, checkpoint):
+        return cls(checkpoint.sequence, checkpoint.event_hash, _balances(checkpoint.balances))
+
+
+def replay(position, until=None, check=True, visit=None):
+    """
+    Advances `position` over the following events (up to sequence
+    `until`). With `check` every link and hash is verified and
+    ChainError raised at the first bad one; `visit(event, position)` is
+    called after each event.
+    """
+    events = FinancialEvent.objects.filter(sequence__gt=position.sequence).order_by('sequence')
+    if until is not None:
+        events = events.filter(sequence__lte=until)
+    for event in events.iterator(chunk_size=2000):
+        if check:
+            if event.sequence != position.sequence + 1:
+                raise ChainError(f"Event #{position.sequence + 1} is missing (next is #{event.sequence}).")
+            if event.previous_hash != position.hash:
+                raise ChainError(f"Event #{event.sequence} does not follow #{position.sequence}.")
+            if event.hash != event_hash(event):
+                raise ChainError(f"Event #{event.sequence} was altered.")
+        apply(position.balances, event)
+        position.sequence, position.hash, position.last = event.sequence, event.hash, event
+        if visit is not None:
+            visit(event, position)
+    return position
+
+
+def latest_checkpoint():
+    return AuditCheckpoint.objects.order_by('-sequence').first()
+
+
+def write_checkpoint():
+    """
+    Checkpoints the chain at its current head (verifying the events since
+    the previous checkpoint on the way). Returns the checkpoint.
+    """
+    start = latest_checkpoint()
+    position = replay(Position.at(start))
+    if position.last is None:
+        return start
+    try:
+        with transaction.atomic():
+            return AuditCheckpoint.objects.create(
+                sequence=position.sequence, event_hash=position.hash, as_of=position.last.created_at,
+                balances=_stored(position.balances),
+            )
+    except IntegrityError:
+        # Another worker checkpointed the same position
+        return AuditCheckpoint.objects.get(sequence=position.sequence)
+
+
+def live_balances():
+    balances = _balances()
+    rows = Payment.objects.order_by().values('user_id', 'transaction_type').annotate(total=models.Sum('amount'))
+    for row in rows:
+        balances[str(row['user_id'])][row['transaction_type']] += row['total']
+    return _stored(balances)
+
+
+def verify(full=False):
+    """
+    Checks the chain from the latest checkpoint (from the first, and
+    every checkpoint on the way, with `full`), that the head is the last
+    event, and that the totals rebuilt from the log equal the live
+    Payment totals. Returns the number of events checked; raises
+    ChainError.
+    """
+    checkpoints = list(AuditCheckpoint.objects.order_by('sequence'))
+    if not checkpoints:
+        raise ChainError("No checkpoint to start from (migrations not applied?).")
+    start = checkpoints[0] if full else checkpoints[-1]
+    later = {checkpoint.sequence: checkpoint for checkpoint in checkpoints if checkpoint.sequence > start.sequence}
+    if start.sequence:
+        event = FinancialEvent.objects.filter(sequence=start.sequence).first()
+        if event is None or event.hash != start.event_hash:
+            raise ChainError(f"{start} does not match event #{start.sequence}.")
+
+    def compare(event, position):
+        checkpoint = later.get(event.sequence)
+        if checkpoint is not None and (
+            checkpoint.event_hash != event.hash or checkpoint.balances != _stored(position.balances)
+        ):
+            raise ChainError(f"{checkpoint} does not match the events before it.")
+
+    # 1. The bulk of the chain, without blocking writers
+    position = replay(Position.at(start), visit=compare)
+
+    # 2. The tail, with appends held off so the live totals are comparable
+    with transaction.atomic():
+        head = AuditChainHead.objects.select_for_update().get()
+        replay(position, until=head.sequence, visit=compare)
+        if (head.sequence, head.hash) != (position.sequence, position.hash):
+            raise ChainError(f"Chain head (#{head.sequence}) does not match the last event (#{position.sequence}).")
+        if _stored(position.balances) != live_balances():
+            raise ChainError("Payment totals differ from the totals rebuilt from the log.")
+    return position.sequence - start.sequence
+
+
+def balances_at(moment):
+    """
+    Every member's payment totals as of `moment`: the nearest earlier
+    checkpoint plus the events logged up to `moment`.
+    """
+    checkpoint = AuditCheckpoint.objects.filter(as_of__lte=moment).order_by('-sequence').first()
+    if checkpoint is None:
+        raise ChainError("The log starts after that moment.")
+    last = (
+        FinancialEvent.objects.filter(created_at__lte=moment, sequence__gt=checkpoint.sequence)
+        .order_by('-sequence').values_list('sequence', flat=True).first()
+    )
+    position = replay(Position.at(checkpoint), until=last or checkpoint.sequence, check=False)
+    return _stored(position.balances)
@@ -0,0 +1,194 @@
+"""
+Fiscal year close.
+
+Closing a period moves every Payment dated on or before its last day
+into PaymentArchive and writes, per member, one COLLECT and one DISBURSE
+opening balance holding the archived sums. Every total computed from
+Payment (dashboard, team rollups, member totals) is unchanged, while
+the live table only holds the open period plus a couple of rows per
+member.
+
+A close runs in one transaction and is rolled back unless the ledger
+still reconciles (ledger_mismatches) when it is done. Payments dated
+in a closed period can no longer be recorded or changed; a wallet
+deposit made in one and approved later is recorded on the first open
+day (services.approve_wallet_deposits).
+"""
+import datetime
+from collections import defaultdict
+from decimal import Decimal
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum
+from core import search
+from core.sync import record_deletes
+from finance import audit
+from finance.models import FinancialEvent, FiscalClose, Payment, PaymentArchive
+
+ARCHIVE_FIELDS = [
+    'id', 'user_id', 'recorded_by_id', 'amount', 'transaction_type', 'date', 'time', 'notes',
+    'is_opening_balance', 'fiscal_close_id', 'created_at', 'updated_at',
+]
+OPENING_TIME = datetime.time(23, 59, 59)
+LOCKED_MESSAGE = "Opening balances are written by the fiscal year close and can't be changed."
+
+
+class CloseError(Exception):
+    pass
+
+
+def fiscal_year_start(day):
+    """
+    First day of the fiscal year `day` falls in.
+    """
+    start_month = settings.FISCAL_YEAR_START_MONTH
+    year = day.year if day.month >= start_month else day.year - 1
+    return datetime.date(year, start_month, 1)
+
+
+def is_year_end(day):
+    following = day + datetime.timedelta(days=1)
+    return fiscal_year_start(following) == following
+
+
+def last_completed_year_end(today=None):
+    return fiscal_year_start(today or datetime.date.today()) - datetime.timedelta(days=1)
+
+
+def closed_through():
+    """
+    Last day of the most recently closed period, or None.
+    """
+    return FiscalClose.objects.aggregate(through=Max('through'))['through']
+
+
+def closed_message(through):
+    return f"The books are closed through {through}."
+
+
+def _totals(queryset):
+    # {(user_id, transaction_type): amount}
+    rows = queryset.order_by().values('user_id', 'transaction_type').annotate(total=Sum('amount'))
+    return {(row['user_id'], row['transaction_type']): row['total'] for row in rows}
+
+
+def _differences(expected, actual):
+    zero = Decimal('0')
+    return [
+        (key, expected.get(key, zero), actual.get(key, zero))
+        for key in sorted(set(expected) | set(actual))
+        if expected.get(key, zero) != actual.get(key, zero)
+    ]
+
+
+def ledger_mismatches():
+    """
+    Per member and type, live totals against the full history (archived
+    and live payments, opening balances excluded). Returns
+    [((user_id, type), live, history)] for every difference.
+    """
+    live = _totals(Payment.objects.all())
+    history = defaultdict(Decimal)
+    for queryset in (Payment.objects.filter(is_opening_balance=False),
+                     PaymentArchive.objects.filter(is_opening_balance=False)):
+        for key, total in _totals(queryset).items():
+            history[key] += total
+    return _differences(live, dict(history))
+
+
+def close_mismatches(fiscal_close):
+    """
+    Problems with one close: its archived rows against the opening
+    balances it wrote (wherever those are now), and against its stored
+    totals.
+    """
+    archived = _totals(fiscal_close.archived_payments.all())
+    opening = defaultdict(Decimal)
+    for model in (Payment, PaymentArchive):
+        for key, total in _totals(model.objects.filter(is_opening_balance=True, fiscal_close=fiscal_close)).items():
+            opening[key] += total
+
+    problems = [
+        f"member {user_id} {transaction_type}: archived {archived_total}, opening balance {opening_total}"
+        for (user_id, transaction_type), archived_total, opening_total in _differences(archived, dict(opening))
+    ]
+    stored = fiscal_close.archived_payments.aggregate(
+        count=Count('id'),
+        collected=Sum('amount', filter=Q(transaction_type=Payment.TransactionType.COLLECT)),
+        disbursed=Sum('amount', filter=Q(transaction_type=Payment.TransactionType.DISBURSE)),
+    )
+    for name in ('collected', 'disbursed'):
+        # Filtered sums come back unrounded on some backends (SQLite)
+        total = Decimal(stored[name] or 0).quantize(Decimal('0.01'))
+        if total != getattr(fiscal_close, name):
+            problems.append(f"{name}: archived {total}, recorded {getattr(fiscal_close, name)}")
+    if stored['count'] != fiscal_close.archived_count:
+        problems.append(f"rows: archived {stored['count']}, recorded {fiscal_close.archived_count}")
+    return problems
+
+
+def _archive_batch(fiscal_close, rows):
+    ids = [row['id'] for row in rows]
+    PaymentArchive.objects.bulk_create([PaymentArchive(archived_by=fiscal_close, **row) for row in rows])
+    # Nothing references Payment, so the rows are deleted without the
+    # collector; tombstones, search documents and the audit log are
+    # handled here instead
+    Payment.objects.filter(id__in=ids)._raw_delete(Payment.objects.db)
+    record_deletes(Payment, [(row['id'], row['user_id'], row['recorded_by_id']) for row in rows])
+    search.unindex(Payment, ids)
+    audit.record_deleted(Payment, rows, action=FinancialEvent.Action.ARCHIVE)
+
+
+def close(through, closed_by=None, batch_size=2000):
+    """
+    Closes every period up to and including `through`. Returns the
+    FiscalClose.
+    """
+    with transaction.atomic():
+        latest = closed_through()
+        if latest is not None and through <= latest:
+            raise CloseError(f"Already closed through {latest}.")
+        fiscal_close = FiscalClose.objects.create(through=through, closed_by=closed_by)
+
+        # 1. Move the period's rows to the archive, in id order batches
+        totals = defaultdict(Decimal)
+        last_id = 0
+        while True:
+            rows = list(
+                Payment.objects.filter(date__lte=through, id__gt=last_id)
+                .order_by('id').values(*ARCHIVE_FIELDS)[:batch_size]
+            )
+            if not rows:
+                break
+            for row in rows:
+                totals[(row['user_id'], row['transaction_type'])] += row['amount']
+            _archive_batch(fiscal_close, rows)
+            fiscal_close.archived_count += len(rows)
+            last_id = rows[-1]['id']
+
+        # 2. One opening balance per member and type, dated the last closed day
+        openings = Payment.objects.bulk_create([
+            Payment(
+                user_id=user_id, recorded_by=closed_by, amount=amount, transaction_type=transaction_type,
+                date=through, time=OPENING_TIME, notes=f"Opening balance: payments through {through}",
+                is_opening_balance=True, fiscal_close=fiscal_close,
+            )
+            for (user_id, transaction_type), amount in sorted(totals.items())
+            if amount
+        ])
+        search.index_objects(search.registry[Payment._meta.label_lower], openings)
+        audit.record_created(Payment, openings)
+
+        fiscal_close.collected = sum(
+            (amount for (_, kind), amount in totals.items() if kind == Payment.TransactionType.COLLECT), Decimal('0')
+        )
+        fiscal_close.disbursed = sum(
+            (amount for (_, kind), amount in totals.items() if kind == Payment.TransactionType.DISBURSE), Decimal('0')
+        )
+        fiscal_close.save(update_fields=['archived_count', 'collected', 'disbursed'])
+
+        # 3. Totals must be exactly what they were, or nothing happened
+        mismatches = ledger_mismatches()
+        if mismatches:
+            raise CloseError(f"Ledger does not reconcile after the close ({len(mismatches)} difference(s)).")
+        return fiscal_close
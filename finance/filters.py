@@ -0,0 +1,73 @@
+"""
+List filters and summary totals for the payment and wallet endpoints.
+"""
+from django.db.models import Count, Max, Min, Q, Sum
+from core import filters
+from finance.models import Payment, WalletTransaction
+from users.hierarchy import subtree_ids
+
+
+def leader(name, field):
+    """
+    Rows of everyone in a leader's team (the leader included, any depth).
+    """
+    def apply(queryset, raw):
+        return queryset.filter(**{f'{field}__in': subtree_ids(filters.parse_int(name, raw))})
+    return apply
+
+
+PAYMENT_FILTERS = {
+    'date_from': filters.date_from('date_from', 'date'),
+    'date_to': filters.date_to('date_to', 'date'),
+    'transaction_type': filters.one_of('transaction_type', 'transaction_type', Payment.TransactionType.choices),
+    'member': filters.exact('member', 'user_id'),
+    'leader': leader('leader', 'user_id'),
+    'recorded_by': filters.exact('recorded_by', 'recorded_by_id'),
+}
+
+WALLET_FILTERS = {
+    'date_from': filters.date_from('date_from', 'date', with_time=True),
+    'date_to': filters.date_to('date_to', 'date', with_time=True),
+    'transaction_type': filters.one_of('transaction_type', 'transaction_type', WalletTransaction.TransactionType.choices),
+    'status': filters.one_of('status', 'status', WalletTransaction.Status.choices),
+    'payment_method': filters.one_of('payment_method', 'payment_method', WalletTransaction.PaymentMethod.choices),
+    'member': filters.exact('member', 'user_id'),
+    'leader': leader('leader', 'user_id'),
+}
+
+
+def payment_summary(queryset):
+    totals = queryset.aggregate(
+        count=Count('id'),
+        collected=Sum('amount', filter=Q(transaction_type=Payment.TransactionType.COLLECT)),
+        disbursed=Sum('amount', filter=Q(transaction_type=Payment.TransactionType.DISBURSE)),
+        first_date=Min('date'),
+        last_date=Max('date'),
+    )
+    return {
+        'count': totals['count'],
+        'collected': filters.money(totals['collected']),
+        'disbursed': filters.money(totals['disbursed']),
+        'net': filters.money((totals['collected'] or 0) - (totals['disbursed'] or 0)),
+        'first_date': totals['first_date'],
+        'last_date': totals['last_date'],
+    }
+
+
+def wallet_summary(queryset):
+    totals = queryset.aggregate(
+        count=Count('id'),
+        deposits=Sum('amount', filter=Q(transaction_type=WalletTransaction.TransactionType.DEPOSIT)),
+        withdrawals=Sum('amount', filter=Q(transaction_type=WalletTransaction.TransactionType.WITHDRAWAL)),
+        pending=Count('id', filter=Q(status=WalletTransaction.Status.PENDING)),
+        first_date=Min('date'),
+        last_date=Max('date'),
+    )
+    return {
+        'count': totals['count'],
+        'deposits': filters.money(totals['deposits']),
+        'withdrawals': filters.money(totals['withdrawals']),
+        'pending': totals['pending'],
+        'first_date': totals['first_date'],
+        'last_date': totals['last_date'],
+    }
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from finance import audit
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds members' payment totals as of a moment from the audit log "
+        "(nearest checkpoint plus the events after it)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--at', required=True, help="Moment, e.g. 2025-03-31T23:59:59 (default time zone if naive).")
+        parser.add_argument('--member', help="Username or id; all members by default.")
+
+    def handle(self, *args, **options):
+        moment = parse_datetime(options['at'])
+        if moment is None:
+            raise CommandError("--at must be a date and time (YYYY-MM-DDTHH:MM[:SS]).")
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+
+        try:
+            balances = audit.balances_at(moment)
+        except audit.ChainError as error:
+            raise CommandError(str(error))
+
+        if options['member']:
+            lookup = {'pk': options['member']} if options['member'].isdigit() else {'username': options['member']}
+            member = User.objects.filter(**lookup).first()
+            if member is None:
+                raise CommandError(f"No member {options['member']}.")
+            balances = {str(member.pk): balances.get(str(member.pk), {})}
+
+        names = dict(User.objects.filter(pk__in=[int(pk) for pk in balances]).values_list('pk', 'username'))
+        self.stdout.write(f"{'member':<24} {'collected':>14} {'disbursed':>14}")
+        for pk, totals in balances.items():
+            self.stdout.write(
+                f"{names.get(int(pk), pk):<24} {totals.get('COLLECT', '0.00'):>14} {totals.get('DISBURSE', '0.00'):>14}"
+            )
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand, CommandError
+from finance import audit
+
+
+class Command(BaseCommand):
+    help = (
+        "Writes an audit log checkpoint at the current end of the chain, "
+        "verifying the events since the previous checkpoint on the way."
+    )
+
+    def handle(self, *args, **options):
+        try:
+            checkpoint = audit.write_checkpoint()
+        except audit.ChainError as error:
+            raise CommandError(str(error))
+        self.stdout.write(self.style.SUCCESS(f"{checkpoint} ({len(checkpoint.balances)} member(s))."))
@@ -0,0 +1,52 @@
+import datetime
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from finance import audit, closing
+from finance.models import Payment
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Closes the books through the end of a fiscal year: payments dated on "
+        "or before that day move to the archive and each member gets opening "
+        "balances carrying their totals. Defaults to the last completed year."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--through', help="Last day of the fiscal year to close (YYYY-MM-DD).")
+        parser.add_argument('--closed-by', help="Username recorded as closing the books.")
+        parser.add_argument('--batch-size', type=int, default=2000, help="Payments archived per batch.")
+        parser.add_argument('--dry-run', action='store_true', help="Show what would be archived without closing.")
+
+    def handle(self, *args, **options):
+        through = parse_date(options['through']) if options['through'] else closing.last_completed_year_end()
+        if through is None:
+            raise CommandError("--through must be a date (YYYY-MM-DD).")
+        if not closing.is_year_end(through):
+            raise CommandError(f"{through} is not the last day of a fiscal year (FISCAL_YEAR_START_MONTH).")
+        if through >= datetime.date.today():
+            raise CommandError(f"The fiscal year ending {through} has not finished yet.")
+
+        closed_by = None
+        if options['closed_by']:
+            closed_by = User.objects.filter(username=options['closed_by']).first()
+            if closed_by is None:
+                raise CommandError(f"No user named {options['closed_by']}.")
+
+        if options['dry_run']:
+            count = Payment.objects.filter(date__lte=through).count()
+            self.stdout.write(f"{count} payment(s) dated on or before {through} would be archived.")
+            return
+
+        try:
+            with audit.acting_as(closed_by):
+                fiscal_close = closing.close(through, closed_by=closed_by, batch_size=options['batch_size'])
+        except closing.CloseError as error:
+            raise CommandError(str(error))
+        openings = fiscal_close.opening_balances.count()
+        self.stdout.write(self.style.SUCCESS(
+            f"Closed through {through}: archived {fiscal_close.archived_count} payment(s) "
+            f"(collected {fiscal_close.collected}, disbursed {fiscal_close.disbursed}), "
+            f"wrote {openings} opening balance(s)."
+        ))
@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from finance import retention
+from finance.models import Notification
+
+
+class Command(BaseCommand):
+    help = (
+        "Archives and deletes notifications past their retention "
+        "(NOTIFICATION_RETENTION_DAYS). Rows are removed oldest first in "
+        "small chunks, each in its own short transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help="Rows deleted per transaction.")
+        parser.add_argument('--sleep', type=float, default=0.1, help="Seconds to pause between chunks.")
+        parser.add_argument('--archive-dir', help=f"Where archives are written (default {settings.NOTIFICATION_ARCHIVE_DIR}).")
+        parser.add_argument('--no-archive', action='store_true', help="Delete without writing an archive.")
+        parser.add_argument('--dry-run', action='store_true', help="Count expired notifications without deleting them.")
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError("--chunk-size must be at least 1.")
+
+        if options['dry_run']:
+            total = 0
+            for notification_type in Notification.Type.values:
+                count = retention.expired(notification_type).count()
+                total += count
+                self.stdout.write(f"{notification_type}: {count} expired")
+            self.stdout.write(self.style.SUCCESS(f"{total} notification(s) would be purged."))
+            return
+
+        counts = retention.purge(
+            chunk_size=options['chunk_size'], pause=options['sleep'],
+            archive_dir=options['archive_dir'], archive=not options['no_archive'],
+        )
+        for notification_type, count in counts.items():
+            self.stdout.write(f"{notification_type}: {count} purged")
+        self.stdout.write(self.style.SUCCESS(f"Purged {sum(counts.values())} notification(s)."))
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+from finance import audit, reconciliation
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Matches a bank statement (CSV or OFX) against pending wallet deposits "
+        "and approves the exact matches. Partial matches are listed for review."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Statement file.")
+        parser.add_argument('--format', choices=['csv', 'ofx'], help="Statement format (default: from the file).")
+        parser.add_argument('--window', type=int, help="Date window in days (default: RECONCILE_DATE_WINDOW_DAYS).")
+        parser.add_argument('--approved-by', help="Username recorded as approving the deposits.")
+        parser.add_argument('--dry-run', action='store_true', help="Report matches without approving them.")
+
+    def handle(self, *args, **options):
+        approved_by = None
+        if options['approved_by']:
+            approved_by = User.objects.filter(username=options['approved_by']).first()
+            if approved_by is None:
+                raise CommandError(f"No user named {options['approved_by']}.")
+
+        try:
+            with open(options['path'], 'rb') as statement:
+                lines = reconciliation.read_statement(statement, options['format'], options['path'])
+                report = reconciliation.reconcile(lines, options['window'])
+        except OSError as error:
+            raise CommandError(str(error))
+        except reconciliation.StatementError as error:
+            raise CommandError(str(error))
+
+        for line, candidates in report['review']:
+            self.stdout.write(f"Line {line.number}: {line.date} {line.amount} {line.text}")
+            for candidate in candidates:
+                self.stdout.write(
+                    f"    deposit {candidate['id']} (member {candidate['user']}, {candidate['date']}, "
+                    f"{candidate['amount']}, ref {candidate['transaction_id']}): {candidate['reason']}"
+                )
+
+        matched = report['matched']
+        if options['dry_run']:
+            approved = []
+        else:
+            with audit.acting_as(approved_by):
+                approved = reconciliation.approve_matches(matched, approved_by)
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['lines']} credit line(s): {len(matched)} matched, {len(approved)} approved, "
+            f"{len(report['review'])} to review, {report['unmatched']} unmatched."
+        ))
@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Case, When
+from finance import references
+from finance.models import WalletTransaction
+
+
+class Command(BaseCommand):
+    help = (
+        "Lists wallet transactions sharing a UPI/bank reference within a payment "
+        "method, flagging references approved (paid) more than once."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--include-rejected', action='store_true', help="Also list rejected transactions.")
+        parser.add_argument(
+            '--fill-keys', action='store_true',
+            help="Give the reference key back to one row of each reference no active row holds "
+                 "(after its holder was rejected).",
+        )
+        parser.add_argument('--chunk-size', type=int, default=5000, help="Rows read per query.")
+
+    def handle(self, *args, **options):
+        groups = references.duplicate_groups(
+            WalletTransaction, include_rejected=options['include_rejected'], chunk_size=options['chunk_size'],
+        )
+        paid_twice = 0
+        for (payment_method, key), rows in sorted(groups.items()):
+            approved = sum(row['status'] == WalletTransaction.Status.APPROVED for row in rows)
+            paid_twice += approved > 1
+            flag = f" ({approved} approved)" if approved > 1 else ""
+            self.stdout.write(f"{payment_method} {key}{flag}:")
+            for row in rows:
+                self.stdout.write(
+                    f"    #{row['id']} {row['status']} member {row['user_id']} {row['amount']} "
+                    f"{row['date']:%Y-%m-%d} ref {row['transaction_id']}"
+                )
+
+        filled = self.fill_keys(options['chunk_size']) if options['fill_keys'] else 0
+        summary = f"{len(groups)} duplicated reference(s), {paid_twice} approved more than once."
+        if options['fill_keys']:
+            summary += f" Keyed {filled} row(s)."
+        self.stdout.write(self.style.WARNING(summary) if groups else self.style.SUCCESS(summary))
+
+    def fill_keys(self, chunk_size):
+        # Active rows left without a key (duplicates at the time the keys
+        # were backfilled) whose reference no active row holds any more;
+        # approved rows first, as when the keys were backfilled
+        filled = 0
+        unkeyed = (
+            WalletTransaction.objects.filter(reference_key__isnull=True)
+            .exclude(transaction_id='').exclude(status=WalletTransaction.Status.REJECTED)
+            .order_by(Case(When(status=WalletTransaction.Status.APPROVED, then=0), default=1), 'id')
+            .values_list('id', 'payment_method', 'transaction_id')
+        )
+        for pk, payment_method, transaction_id in unkeyed.iterator(chunk_size=chunk_size):
+            key = references.reference_key(transaction_id)
+            if key is None or references.duplicates(WalletTransaction, payment_method, transaction_id).exists():
+                continue
+            filled += WalletTransaction.objects.filter(pk=pk).update(reference_key=key)
+        return filled
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+from finance import closing
+from finance.models import FiscalClose
+
+
+class Command(BaseCommand):
+    help = (
+        "Checks that every fiscal close reconciles: archived rows against the "
+        "opening balances written for them, and live totals per member against "
+        "the full archived plus live history."
+    )
+
+    def handle(self, *args, **options):
+        failed = False
+        for fiscal_close in FiscalClose.objects.order_by('through'):
+            problems = closing.close_mismatches(fiscal_close)
+            if problems:
+                failed = True
+                self.stdout.write(self.style.ERROR(f"{fiscal_close}: {len(problems)} problem(s)"))
+                for problem in problems:
+                    self.stdout.write(f"  {problem}")
+            else:
+                self.stdout.write(
+                    f"{fiscal_close}: {fiscal_close.archived_count} archived payment(s) reconcile "
+                    f"(collected {fiscal_close.collected}, disbursed {fiscal_close.disbursed})"
+                )
+
+        mismatches = closing.ledger_mismatches()
+        for (user_id, transaction_type), live, history in mismatches:
+            self.stdout.write(f"  member {user_id} {transaction_type}: live {live}, history {history}")
+        if mismatches:
+            failed = True
+            self.stdout.write(self.style.ERROR(f"Ledger: {len(mismatches)} member total(s) differ from history."))
+        else:
+            self.stdout.write("Ledger: live totals match the archived and live history.")
+
+        if failed:
+            raise CommandError("Fiscal close verification failed.")
+        self.stdout.write(self.style.SUCCESS("All fiscal closes reconcile."))
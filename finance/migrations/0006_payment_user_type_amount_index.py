@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0005_wallettransaction_status'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['user', 'transaction_type', 'amount'], name='payment_user_type_amount_idx'),
+        ),
+    ]
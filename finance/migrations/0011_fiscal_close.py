@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0010_notification_retention_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='is_opening_balance',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name='FiscalClose',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('through', models.DateField(help_text='Last day of the closed period', unique=True)),
+                ('closed_at', models.DateTimeField(auto_now_add=True)),
+                ('archived_count', models.PositiveIntegerField(default=0)),
+                ('collected', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('disbursed', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('closed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='fiscal_closes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-through'],
+            },
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='fiscal_close',
+            field=models.ForeignKey(blank=True, help_text='The close that wrote this opening balance', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='opening_balances', to='finance.fiscalclose'),
+        ),
+        migrations.CreateModel(
+            name='PaymentArchive',
+            fields=[
+                ('id', models.BigIntegerField(help_text="The row's id in Payment", primary_key=True, serialize=False)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('transaction_type', models.CharField(choices=[('COLLECT', 'Collection (In)'), ('DISBURSE', 'Disbursement (Out)')], max_length=10)),
+                ('date', models.DateField()),
+                ('time', models.TimeField()),
+                ('notes', models.TextField(blank=True)),
+                ('is_opening_balance', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_by', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_payments', to='finance.fiscalclose')),
+                ('fiscal_close', models.ForeignKey(blank=True, help_text='For opening balances: the close that wrote them', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='finance.fiscalclose')),
+                ('recorded_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_payments', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-date', '-time'],
+                'indexes': [models.Index(fields=['user', 'date'], name='paymentarchive_user_date_idx')],
+            },
+        ),
+    ]
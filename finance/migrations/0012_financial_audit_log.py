@@ -0,0 +1,118 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:38
+
+from decimal import Decimal
+from django.db import migrations, models
+
+GENESIS_HASH = '0' * 64
+
+# finance_financialevent is append-only
+SQLITE_FORWARD = [
+    "CREATE TRIGGER finance_financialevent_no_update BEFORE UPDATE ON finance_financialevent "
+    "BEGIN SELECT RAISE(ABORT, 'financial events are append-only'); END",
+    "CREATE TRIGGER finance_financialevent_no_delete BEFORE DELETE ON finance_financialevent "
+    "BEGIN SELECT RAISE(ABORT, 'financial events are append-only'); END",
+]
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS finance_financialevent_no_update",
+    "DROP TRIGGER IF EXISTS finance_financialevent_no_delete",
+]
+POSTGRES_FORWARD = [
+    "CREATE FUNCTION finance_financialevent_append_only() RETURNS trigger AS $$ "
+    "BEGIN RAISE EXCEPTION 'financial events are append-only'; END $$ LANGUAGE plpgsql",
+    "CREATE TRIGGER finance_financialevent_append_only BEFORE UPDATE OR DELETE OR TRUNCATE "
+    "ON finance_financialevent FOR EACH STATEMENT EXECUTE FUNCTION finance_financialevent_append_only()",
+]
+POSTGRES_BACKWARD = [
+    "DROP TRIGGER IF EXISTS finance_financialevent_append_only ON finance_financialevent",
+    "DROP FUNCTION IF EXISTS finance_financialevent_append_only()",
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+def start_chain(apps, schema_editor):
+    """
+    Empty chain, and a first checkpoint holding the payment totals the
+    log starts from.
+    """
+    from django.utils import timezone
+    Payment = apps.get_model('finance', 'Payment')
+    now = timezone.now()
+    balances = {}
+    rows = Payment.objects.order_by().values('user_id', 'transaction_type').annotate(total=models.Sum('amount'))
+    for row in rows.order_by('user_id', 'transaction_type'):
+        if row['total']:
+            balances.setdefault(str(row['user_id']), {})[row['transaction_type']] = str(row['total'].quantize(Decimal('0.01')))
+    apps.get_model('finance', 'AuditChainHead').objects.create(sequence=0, hash=GENESIS_HASH, at=now)
+    apps.get_model('finance', 'AuditCheckpoint').objects.create(
+        sequence=0, event_hash=GENESIS_HASH, as_of=now, balances=balances,
+    )
+
+
+def drop_chain(apps, schema_editor):
+    apps.get_model('finance', 'AuditChainHead').objects.all().delete()
+    apps.get_model('finance', 'AuditCheckpoint').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0011_fiscal_close'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditChainHead',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sequence', models.PositiveBigIntegerField(default=0)),
+                ('hash', models.CharField(max_length=64)),
+                ('at', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AuditCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sequence', models.PositiveBigIntegerField(unique=True)),
+                ('event_hash', models.CharField(help_text='Hash of the event at `sequence`', max_length=64)),
+                ('as_of', models.DateTimeField(help_text='Time of the event at `sequence`')),
+                ('balances', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-sequence'],
+            },
+        ),
+        migrations.CreateModel(
+            name='FinancialEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sequence', models.PositiveBigIntegerField(unique=True)),
+                ('created_at', models.DateTimeField()),
+                ('model', models.CharField(help_text='app_label.model_name of the changed row', max_length=100)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('action', models.CharField(choices=[('create', 'Created'), ('update', 'Updated'), ('delete', 'Deleted'), ('archive', 'Archived by a fiscal close')], max_length=10)),
+                ('owner_id', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('actor_id', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('before', models.JSONField(blank=True, null=True)),
+                ('after', models.JSONField(blank=True, null=True)),
+                ('previous_hash', models.CharField(max_length=64)),
+                ('hash', models.CharField(max_length=64)),
+            ],
+            options={
+                'ordering': ['sequence'],
+                'indexes': [models.Index(fields=['model', 'object_id'], name='financialevent_object_idx'), models.Index(fields=['created_at'], name='financialevent_created_idx')],
+            },
+        ),
+        migrations.RunPython(start_chain, drop_chain),
+        migrations.RunPython(
+            _run({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRES_FORWARD}),
+            _run({'sqlite': SQLITE_BACKWARD, 'postgresql': POSTGRES_BACKWARD}),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:45
+
+import re
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_reference_keys(apps, schema_editor):
+    """
+    Keys every existing row. Where rows (not REJECTED) already share a
+    reference, only the first keeps the key, an APPROVED one if any, so
+    approving one of the others is still caught; the rest stay null for
+    scan_duplicate_references to report.
+    """
+    WalletTransaction = apps.get_model('finance', 'WalletTransaction')
+    rows = WalletTransaction.objects.exclude(transaction_id='').values_list('id', 'payment_method', 'transaction_id', 'status')
+    taken = set()
+    keyed = []
+    for pk, payment_method, transaction_id, status in sorted(rows.iterator(chunk_size=5000), key=lambda row: (row[3] != 'APPROVED', row[0])):
+        key = re.sub(r'[^0-9A-Za-z]+', '', transaction_id).upper()[:100]
+        if not key:
+            continue
+        if status != 'REJECTED':
+            if (payment_method, key) in taken:
+                continue
+            taken.add((payment_method, key))
+        keyed.append(WalletTransaction(id=pk, reference_key=key))
+    WalletTransaction.objects.bulk_update(keyed, ['reference_key'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0012_financial_audit_log'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wallettransaction',
+            name='reference_key',
+            field=models.CharField(blank=True, editable=False, max_length=100, null=True),
+        ),
+        migrations.RunPython(fill_reference_keys, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='wallettransaction',
+            constraint=models.UniqueConstraint(condition=models.Q(('reference_key__isnull', False), models.Q(('status', 'REJECTED'), _negated=True)), fields=('payment_method', 'reference_key'), name='wallet_unique_reference', violation_error_message='This transaction reference has already been submitted.'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+import re
+from django.db import migrations
+
+
+def rekey_references(apps, schema_editor):
+    """
+    Recomputes reference_key now that a leading payment rail name
+    (UPI/NEFT/IMPS/RTGS before a number) is dropped. References that only
+    differed by it now collide; as in 0013, only the first row (an
+    APPROVED one if any) keeps the key.
+    """
+    WalletTransaction = apps.get_model('finance', 'WalletTransaction')
+    rows = WalletTransaction.objects.values_list('id', 'payment_method', 'transaction_id', 'status', 'reference_key')
+    taken = set()
+    changed = []
+    for pk, payment_method, transaction_id, status, current in sorted(
+        rows.iterator(chunk_size=5000), key=lambda row: (row[3] != 'APPROVED', row[0])
+    ):
+        key = re.sub(r'[^0-9A-Za-z]+', '', transaction_id).upper()
+        key = re.sub(r'^(?:UPI|NEFT|IMPS|RTGS)(?=\d)', '', key)[:100] or None
+        if key is not None and status != 'REJECTED':
+            if (payment_method, key) in taken:
+                key = None
+            else:
+                taken.add((payment_method, key))
+        if key != current:
+            changed.append(WalletTransaction(id=pk, reference_key=key))
+    # Clear first, so no row briefly holds a key another still has
+    for start in range(0, len(changed), 1000):
+        WalletTransaction.objects.filter(id__in=[row.id for row in changed[start:start + 1000]]).update(reference_key=None)
+    WalletTransaction.objects.bulk_update(
+        [row for row in changed if row.reference_key is not None], ['reference_key'], batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0013_wallet_reference_key'),
+    ]
+
+    operations = [
+        migrations.RunPython(rekey_references, migrations.RunPython.noop),
+    ]
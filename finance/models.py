@@ -2,6 +2,7 @@ from django.db import models
 from django.conf import settings
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
+from finance.references import DUPLICATE_MESSAGE, reference_key
 
 class Payment(models.Model):
     class TransactionType(models.TextChoices):
@@ -34,16 +35,110 @@ class Payment(models.Model):
     time = models.TimeField(default=timezone.now)
     notes = models.TextField(blank=True)
     
+    # Carried-forward totals written by a fiscal year close (finance.closing)
+    is_opening_balance = models.BooleanField(default=False)
+    fiscal_close = models.ForeignKey(
+        'FiscalClose',
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='opening_balances',
+        help_text="The close that wrote this opening balance"
+    )
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-date', '-time']
+        indexes = [
+            # Per-member totals (team pages) can be summed from the index alone
+            models.Index(fields=['user', 'transaction_type', 'amount'], name='payment_user_type_amount_idx'),
+            # Delta sync walks rows in (updated_at, id) order (core.sync)
+            models.Index(fields=['updated_at', 'id'], name='payment_updated_idx'),
+            # List filters (finance.filters): date ranges by type, per member/team
+            models.Index(fields=['transaction_type', 'date'], name='payment_type_date_idx'),
+            models.Index(fields=['user', 'date'], name='payment_user_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.get_transaction_type_display()} - {self.user.username} - {self.amount}"
 
 
+class FiscalClose(models.Model):
+    """
+    A closed fiscal period: every payment dated on or before `through`
+    was moved to PaymentArchive and replaced by per-member opening
+    balances (see finance.closing).
+    """
+    through = models.DateField(unique=True, help_text="Last day of the closed period")
+    closed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='fiscal_closes'
+    )
+    closed_at = models.DateTimeField(auto_now_add=True)
+
+    # Totals of the archived rows, re-checked by `verify_fiscal_close`
+    archived_count = models.PositiveIntegerField(default=0)
+    collected = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    disbursed = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ['-through']
+
+    def __str__(self):
+        return f"Closed through {self.through}"
+
+
+class PaymentArchive(models.Model):
+    """
+    A Payment row moved out of the live table by a fiscal year close,
+    kept with its original id and values.
+    """
+    id = models.BigIntegerField(primary_key=True, help_text="The row's id in Payment")
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.PROTECT,
+        related_name='archived_payments'
+    )
+    recorded_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='+'
+    )
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    transaction_type = models.CharField(max_length=10, choices=Payment.TransactionType.choices)
+    date = models.DateField()
+    time = models.TimeField()
+    notes = models.TextField(blank=True)
+    is_opening_balance = models.BooleanField(default=False)
+    fiscal_close = models.ForeignKey(
+        FiscalClose,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='+',
+        help_text="For opening balances: the close that wrote them"
+    )
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+
+    archived_by = models.ForeignKey(FiscalClose, on_delete=models.PROTECT, related_name='archived_payments')
+
+    class Meta:
+        ordering = ['-date', '-time']
+        indexes = [
+            models.Index(fields=['user', 'date'], name='paymentarchive_user_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_transaction_type_display()} - {self.user_id} - {self.amount} (archived)"
+
+
 class FundRequest(models.Model):
     class Status(models.TextChoices):
         PENDING = 'PENDING', _('Pending')
@@ -92,6 +187,13 @@ class FundRequest(models.Model):
         default=PaymentStatus.PENDING
     )
     paid_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0.00)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Delta sync walks rows in (updated_at, id) order (core.sync)
+            models.Index(fields=['updated_at', 'id'], name='fundrequest_updated_idx'),
+        ]
 
     def __str__(self):
         return f"Request by {self.user.username} - {self.status}"
@@ -135,6 +237,8 @@ class WalletTransaction(models.Model):
         default=PaymentMethod.BANK_TRANSFER
     )
     transaction_id = models.CharField(max_length=100, blank=True)
+    # Normalized transaction_id (finance.references), set on save
+    reference_key = models.CharField(max_length=100, null=True, blank=True, editable=False)
     notes = models.TextField(blank=True)
     
     # Timestamps
@@ -157,10 +261,35 @@ class WalletTransaction(models.Model):
         ordering = ['-date']
         verbose_name = "Wallet Transaction"
         verbose_name_plural = "Wallet Transactions"
+        indexes = [
+            # Delta sync walks rows in (updated_at, id) order (core.sync)
+            models.Index(fields=['updated_at', 'id'], name='wallet_updated_idx'),
+            # List filters (finance.filters): approval queue by date, per member/team
+            models.Index(fields=['status', 'date'], name='wallet_status_date_idx'),
+            models.Index(fields=['user', 'date'], name='wallet_user_date_idx'),
+        ]
+        constraints = [
+            # A UPI/bank reference can be submitted (and paid) once per method;
+            # a rejected row frees it for resubmission
+            models.UniqueConstraint(
+                fields=['payment_method', 'reference_key'],
+                condition=models.Q(reference_key__isnull=False) & ~models.Q(status='REJECTED'),
+                name='wallet_unique_reference',
+                violation_error_message=DUPLICATE_MESSAGE,
+            ),
+        ]
 
     def __str__(self):
         return f"{self.get_transaction_type_display()} - {self.user.username} - {self.amount}"
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'transaction_id' in update_fields:
+            self.reference_key = reference_key(self.transaction_id)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'reference_key'}
+        super().save(*args, **kwargs)
+
     @property
     def is_deposit(self):
         return self.transaction_type == self.TransactionType.DEPOSIT
@@ -197,10 +326,86 @@ class Notification(models.Model):
     
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     #  Link notification to a specific object
     related_object_id = models.PositiveIntegerField(null=True, blank=True)
     related_object_type = models.CharField(max_length=50, null=True, blank=True)
 
     class Meta:
-        ordering = ['-created_at']
\ No newline at end of file
+        ordering = ['-created_at']
+        indexes = [
+            # Per-user validator for conditional GETs (count / max id / max updated_at)
+            models.Index(fields=['user', 'updated_at'], name='notification_user_updated_idx'),
+            # Inbox listing (NotificationViewSet orders by -created_at)
+            models.Index(fields=['user', '-created_at'], name='notification_user_created_idx'),
+            # Retention scans, oldest first per type (finance.retention)
+            models.Index(fields=['notification_type', 'created_at'], name='notification_type_created_idx'),
+        ]
+
+class FinancialEvent(models.Model):
+    """
+    One entry of the append-only, hash-chained log of changes to
+    payments, fund requests and wallet transactions (finance.audit).
+    """
+    class Action(models.TextChoices):
+        CREATE = 'create', _('Created')
+        UPDATE = 'update', _('Updated')
+        DELETE = 'delete', _('Deleted')
+        ARCHIVE = 'archive', _('Archived by a fiscal close')
+
+    sequence = models.PositiveBigIntegerField(unique=True)
+    created_at = models.DateTimeField()
+    model = models.CharField(max_length=100, help_text="app_label.model_name of the changed row")
+    object_id = models.PositiveBigIntegerField()
+    action = models.CharField(max_length=10, choices=Action.choices)
+    # Member the row belongs to, and the user who made the change. Plain
+    # ids: the log must outlive (and never cascade from) user rows.
+    owner_id = models.PositiveBigIntegerField(null=True, blank=True)
+    actor_id = models.PositiveBigIntegerField(null=True, blank=True)
+    # Tracked fields before and after the change (null on create / delete)
+    before = models.JSONField(null=True, blank=True)
+    after = models.JSONField(null=True, blank=True)
+    previous_hash = models.CharField(max_length=64)
+    hash = models.CharField(max_length=64)
+
+    class Meta:
+        ordering = ['sequence']
+        indexes = [
+            # History of one row
+            models.Index(fields=['model', 'object_id'], name='financialevent_object_idx'),
+            # Balance rebuilds replay events up to a moment
+            models.Index(fields=['created_at'], name='financialevent_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.sequence} {self.action} {self.model} #{self.object_id}"
+
+
+class AuditChainHead(models.Model):
+    """
+    The last appended FinancialEvent (single row). Appends lock it, which
+    keeps the chain linear across concurrent transactions.
+    """
+    sequence = models.PositiveBigIntegerField(default=0)
+    hash = models.CharField(max_length=64)
+    at = models.DateTimeField()
+
+
+class AuditCheckpoint(models.Model):
+    """
+    Every member's payment totals as of FinancialEvent `sequence`, so
+    verification and balance rebuilds only replay later events.
+    """
+    sequence = models.PositiveBigIntegerField(unique=True)
+    event_hash = models.CharField(max_length=64, help_text="Hash of the event at `sequence`")
+    as_of = models.DateTimeField(help_text="Time of the event at `sequence`")
+    # {"<member id>": {"COLLECT": "0.00", "DISBURSE": "0.00"}}
+    balances = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-sequence']
+
+    def __str__(self):
+        return f"Checkpoint at #{self.sequence}"
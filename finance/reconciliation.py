@@ -0,0 +1,361 @@
+"""
+Bank statement reconciliation for wallet deposits.
+
+A statement (CSV or OFX) is read as a stream of credit lines. PENDING
+deposits are loaded once and indexed in dicts by normalized reference
+and by amount, so each line is matched with a few lookups instead of a
+scan of every pending deposit.
+
+A line matches a deposit exactly when one of its references (the
+reference column, or reference-like tokens in the description) equals
+the deposit's transaction id, the amounts are equal, and the dates are
+within RECONCILE_DATE_WINDOW_DAYS. Exact matches can be approved in
+bulk (finance.services.approve_wallet_deposits). Lines that only match
+partially (reference with a different amount or date, or amount and
+date without a reference) are returned as candidates for review.
+"""
+import csv
+import datetime
+import io
+import re
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+from django.conf import settings
+from django.utils import timezone
+from finance.models import WalletTransaction
+from finance.references import normalize_reference
+
+MAX_CANDIDATES = 5
+HEADER_SCAN_ROWS = 30
+
+_NON_ALNUM_RE = re.compile(r'[^0-9A-Za-z]+')
+_TOKEN_RE = re.compile(r'[0-9A-Za-z]*\d[0-9A-Za-z]*')
+_OFX_TAG_RE = re.compile(r'<(/?)([A-Za-z0-9.]+)>([^<]*)')
+
+# Normalized header name -> column role
+CSV_COLUMNS = {
+    'date': ('date', 'transaction date', 'txn date', 'tran date', 'value date', 'posted date', 'posting date'),
+    'amount': ('amount', 'transaction amount', 'txn amount', 'amount inr'),
+    'credit': ('credit', 'credits', 'deposit', 'deposits', 'credit amount', 'deposit amount', 'cr'),
+    'debit': ('debit', 'debits', 'withdrawal', 'withdrawals', 'debit amount', 'withdrawal amount', 'dr'),
+    'reference': (
+        'reference', 'ref', 'ref no', 'reference no', 'reference number', 'utr', 'utr no', 'utr number',
+        'transaction id', 'txn id', 'cheque no', 'chq no', 'chq ref no', 'cheque ref no',
+    ),
+    'description': ('description', 'narration', 'particulars', 'remarks', 'details', 'memo', 'transaction details'),
+    'type': ('type', 'cr dr', 'dr cr', 'transaction type'),
+}
+_HEADERS = {name: role for role, names in CSV_COLUMNS.items() for name in names}
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%d/%m/%y', '%d-%m-%y', '%d-%b-%Y', '%d %b %Y', '%d-%b-%y', '%d.%m.%Y')
+
+
+class StatementError(ValueError):
+    pass
+
+
+def reference_keys(value):
+    """
+    Lookup keys for a reference: its normalized form (the same one
+    WalletTransaction.reference_key holds), or none when it is empty.
+    """
+    normalized = normalize_reference(value)
+    return {normalized} if normalized else set()
+
+
+class StatementLine:
+    __slots__ = ('number', 'date', 'amount', 'references', 'text')
+
+    def __init__(self, number, date, amount, references, text):
+        self.number = number
+        self.date = date
+        self.amount = amount
+        self.references = references
+        self.text = text
+
+    def as_dict(self):
+        return {'line': self.number, 'date': self.date, 'amount': str(self.amount), 'text': self.text}
+
+
+def _line_references(reference, description):
+    keys = set(reference_keys(reference))
+    for token in _TOKEN_RE.findall(description or ''):
+        if len(token) >= 6:
+            keys |= reference_keys(token)
+    return frozenset(keys)
+
+
+def _amount(raw):
+    raw = (raw or '').strip()
+    negative = raw.startswith('(') and raw.endswith(')')
+    cleaned = re.sub(r'[^0-9.\-]', '', raw)
+    if not cleaned or cleaned in ('-', '.'):
+        return None
+    try:
+        value = Decimal(cleaned)
+    except InvalidOperation:
+        return None
+    return -value if negative else value
+
+
+class _DateParser:
+    # Remembers the format that worked; statements use one throughout
+    def __init__(self):
+        self.format = None
+
+    def __call__(self, raw):
+        words = (raw or '').split()
+        if not words:
+            return None
+        # "05/01/2026", "05/01/2026 10:32:11", "05 Jan 2026"
+        texts = (' '.join(words), words[0], ' '.join(words[:3]))
+        formats = (self.format, *DATE_FORMATS) if self.format else DATE_FORMATS
+        for date_format in formats:
+            for text in texts:
+                try:
+                    day = datetime.datetime.strptime(text, date_format).date()
+                except ValueError:
+                    continue
+                self.format = date_format
+                return day
+        return None
+
+
+def _header_roles(row):
+    roles = {}
+    for index, cell in enumerate(row):
+        role = _HEADERS.get(_NON_ALNUM_RE.sub(' ', cell).strip().lower())
+        if role and role not in roles:
+            roles[role] = index
+    if 'date' in roles and ('amount' in roles or 'credit' in roles):
+        return roles
+    return None
+
+
+def read_csv(stream):
+    """
+    Credit lines of a CSV statement (text stream). Rows before the header
+    row (account details etc.) are skipped.
+    """
+    rows = csv.reader(stream)
+    roles = None
+    for number, row in enumerate(rows, start=1):
+        roles = _header_roles(row)
+        if roles:
+            break
+        if number >= HEADER_SCAN_ROWS:
+            break
+    if not roles:
+        raise StatementError("No header row with date and amount/credit columns found.")
+
+    parse_date = _DateParser()
+
+    def cell(row, role):
+        index = roles.get(role)
+        return row[index] if index is not None and index < len(row) else ''
+
+    for number, row in enumerate(rows, start=number + 1):
+        day = parse_date(cell(row, 'date'))
+        if day is None:
+            continue
+        if 'credit' in roles:
+            amount = _amount(cell(row, 'credit'))
+        else:
+            amount = _amount(cell(row, 'amount'))
+            kind = cell(row, 'type').strip().upper()
+            if amount is not None and kind.startswith('D'):
+                amount = -amount
+        if amount is None or amount <= 0:
+            continue
+        description = cell(row, 'description').strip()
+        yield StatementLine(number, day, amount, _line_references(cell(row, 'reference'), description), description)
+
+
+def _ofx_tags(stream, chunk_size=65536):
+    buffer = ''
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        buffer += chunk
+        # Only tags followed by another '<' are known to be complete
+        cut = buffer.rfind('<')
+        if cut <= 0:
+            continue
+        yield from _OFX_TAG_RE.finditer(buffer, 0, cut)
+        buffer = buffer[cut:]
+    yield from _OFX_TAG_RE.finditer(buffer)
+
+
+def read_ofx(stream):
+    """
+    Credit lines (<STMTTRN> with a positive TRNAMT) of an OFX statement,
+    SGML (1.x) or XML (2.x).
+    """
+    number, fields = 0, None
+    for match in _ofx_tags(stream):
+        closing, tag, value = match.group(1), match.group(2).upper(), match.group(3).strip()
+        if tag == 'STMTTRN':
+            if not closing:
+                number, fields = number + 1, {}
+                continue
+            if fields is not None:
+                line = _ofx_line(number, fields)
+                if line is not None:
+                    yield line
+            fields = None
+        elif fields is not None and not closing and value:
+            fields[tag] = value
+
+
+def _ofx_line(number, fields):
+    amount = _amount(fields.get('TRNAMT'))
+    posted = fields.get('DTPOSTED', '')[:8]
+    try:
+        day = datetime.datetime.strptime(posted, '%Y%m%d').date()
+    except ValueError:
+        return None
+    if amount is None or amount <= 0:
+        return None
+    description = ' '.join(filter(None, (fields.get('NAME'), fields.get('MEMO'))))
+    references = set(_line_references(fields.get('REFNUM'), description))
+    for tag in ('FITID', 'CHECKNUM'):
+        references |= reference_keys(fields.get(tag))
+    return StatementLine(number, day, amount, frozenset(references), description)
+
+
+def read_statement(stream, statement_format=None, name=''):
+    """
+    Credit lines of a statement given as a seekable binary stream; the
+    format is taken from `statement_format`, the file name, or the content.
+    """
+    if statement_format is None:
+        if name.lower().endswith(('.ofx', '.qfx')):
+            statement_format = 'ofx'
+        elif name.lower().endswith('.csv'):
+            statement_format = 'csv'
+        else:
+            start = stream.read(1024).upper()
+            stream.seek(0)
+            statement_format = 'ofx' if b'OFXHEADER' in start or b'<OFX>' in start else 'csv'
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', errors='replace', newline='')
+    if statement_format == 'ofx':
+        return read_ofx(text)
+    if statement_format == 'csv':
+        return read_csv(text)
+    raise StatementError(f"Unknown statement format: {statement_format}.")
+
+
+class Deposit:
+    __slots__ = ('id', 'user_id', 'amount', 'day', 'transaction_id', 'matched_line')
+
+    def __init__(self, row):
+        self.id = row['id']
+        self.user_id = row['user_id']
+        self.amount = row['amount']
+        self.day = timezone.localtime(row['date']).date()
+        self.transaction_id = row['transaction_id']
+        self.matched_line = None
+
+    def as_dict(self, reason):
+        return {
+            'id': self.id, 'user': self.user_id, 'amount': str(self.amount), 'date': self.day,
+            'transaction_id': self.transaction_id, 'reason': reason,
+        }
+
+
+class Matcher:
+    """
+    Matches statement lines to PENDING deposits through dict indexes.
+    Each deposit is matched to at most one line.
+    """
+
+    def __init__(self, window_days=None):
+        window_days = settings.RECONCILE_DATE_WINDOW_DAYS if window_days is None else window_days
+        self.window = datetime.timedelta(days=window_days)
+        self.by_reference = defaultdict(list)
+        self.by_amount = defaultdict(list)
+        pending = WalletTransaction.objects.filter(
+            status=WalletTransaction.Status.PENDING, transaction_type=WalletTransaction.TransactionType.DEPOSIT,
+        ).values('id', 'user_id', 'amount', 'date', 'transaction_id')
+        for row in pending.iterator(chunk_size=5000):
+            deposit = Deposit(row)
+            for key in reference_keys(deposit.transaction_id):
+                self.by_reference[key].append(deposit)
+            self.by_amount[deposit.amount].append(deposit)
+
+    def _within(self, deposit, line):
+        return abs(deposit.day - line.date) <= self.window
+
+    def match(self, line):
+        """
+        ('matched', deposit) | ('review', [candidate dicts]) | ('unmatched', None)
+        """
+        by_reference = {}
+        for key in line.references:
+            for deposit in self.by_reference.get(key, ()):
+                by_reference[deposit.id] = deposit
+
+        exact = [
+            deposit for deposit in by_reference.values()
+            if deposit.matched_line is None and deposit.amount == line.amount and self._within(deposit, line)
+        ]
+        if len(exact) == 1:
+            exact[0].matched_line = line.number
+            return 'matched', exact[0]
+
+        candidates = []
+        for deposit in by_reference.values():
+            if deposit.matched_line is not None:
+                reason = f"reference already matched to line {deposit.matched_line}"
+            elif deposit.amount != line.amount:
+                reason = "reference matches, amount differs"
+            elif not self._within(deposit, line):
+                reason = "reference matches, date outside window"
+            else:
+                reason = "reference matches more than one deposit"
+            candidates.append(deposit.as_dict(reason))
+        if not candidates:
+            nearby = [
+                deposit for deposit in self.by_amount.get(line.amount, ())
+                if deposit.matched_line is None and self._within(deposit, line)
+            ]
+            nearby.sort(key=lambda deposit: abs(deposit.day - line.date))
+            candidates = [deposit.as_dict("same amount and date, no reference") for deposit in nearby[:MAX_CANDIDATES]]
+        if candidates:
+            return 'review', candidates[:MAX_CANDIDATES]
+        return 'unmatched', None
+
+
+def reconcile(lines, window_days=None):
+    """
+    Runs `lines` through a Matcher. Returns a report dict: line count,
+    exact matches [(line, deposit)], review [(line, candidates)] and
+    the number of unmatched lines.
+    """
+    matcher = Matcher(window_days)
+    report = {'lines': 0, 'matched': [], 'review': [], 'unmatched': 0}
+    for line in lines:
+        report['lines'] += 1
+        outcome, found = matcher.match(line)
+        if outcome == 'matched':
+            report['matched'].append((line, found))
+        elif outcome == 'review':
+            report['review'].append((line, found))
+        else:
+            report['unmatched'] += 1
+    return report
+
+
+def approve_matches(matched, approved_by, batch_size=1000):
+    """
+    Approves the deposits of exact matches, one transaction per batch.
+    Returns the ids approved (deposits approved meanwhile are skipped).
+    """
+    from finance.services import approve_wallet_deposits
+
+    ids = [deposit.id for _, deposit in matched]
+    approved = []
+    for start in range(0, len(ids), batch_size):
+        batch = [WalletTransaction(pk=pk) for pk in ids[start:start + batch_size]]
+        approved += [wallet_tx.pk for wallet_tx in approve_wallet_deposits(batch, approved_by)]
+    return approved
@@ -0,0 +1,66 @@
+"""
+Payment references (UPI/bank transaction ids) in the one form they are
+compared in.
+
+WalletTransaction keeps the normalized reference in `reference_key`,
+unique per payment method among rows that aren't REJECTED (the
+`wallet_unique_reference` constraint), so a duplicate is found with one
+index lookup when a deposit is submitted or approved. Rows recorded
+before the constraint that duplicate an earlier reference have no key;
+`scan_duplicate_references` finds them.
+"""
+import re
+from collections import defaultdict
+
+_NON_ALNUM_RE = re.compile(r'[^0-9A-Za-z]+')
+# Only when a number follows: "NEFTN0123..." keeps its bank prefix
+_RAIL_PREFIX_RE = re.compile(r'^(?:UPI|NEFT|IMPS|RTGS)(?=\d)')
+DUPLICATE_MESSAGE = "This transaction reference has already been submitted."
+
+
+def normalize_reference(value):
+    """
+    Reference as compared everywhere: letters and digits only, upper case,
+    without a leading payment rail name ("UPI-123456789" is 123456789;
+    banks and members often add or drop it).
+    """
+    return _RAIL_PREFIX_RE.sub('', _NON_ALNUM_RE.sub('', value or '').upper())
+
+
+def reference_key(value):
+    # None rather than '' so rows without a reference stay out of the constraint
+    return normalize_reference(value)[:100] or None
+
+
+def duplicates(model, payment_method, transaction_id, exclude_pk=None):
+    """
+    Other rows, not REJECTED, holding the same reference for the method.
+    """
+    key = reference_key(transaction_id)
+    if key is None:
+        return model.objects.none()
+    queryset = model.objects.filter(payment_method=payment_method, reference_key=key).exclude(
+        status=model.Status.REJECTED,
+    )
+    if exclude_pk is not None:
+        queryset = queryset.exclude(pk=exclude_pk)
+    return queryset
+
+
+def duplicate_groups(model, include_rejected=False, chunk_size=5000):
+    """
+    One pass over the table: {(payment_method, key): [row dicts]} for every
+    reference held by more than one row (not REJECTED, unless
+    `include_rejected`), rows in id order.
+    """
+    queryset = model.objects.order_by('id').values(
+        'id', 'user_id', 'amount', 'date', 'payment_method', 'transaction_id', 'reference_key', 'status',
+    )
+    if not include_rejected:
+        queryset = queryset.exclude(status=model.Status.REJECTED)
+    groups = defaultdict(list)
+    for row in queryset.iterator(chunk_size=chunk_size):
+        key = reference_key(row['transaction_id'])
+        if key is not None:
+            groups[(row['payment_method'], key)].append(row)
+    return {group: rows for group, rows in groups.items() if len(rows) > 1}
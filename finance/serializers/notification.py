@@ -1,7 +1,8 @@
 from rest_framework import serializers
 from finance.models import Notification
+from core.serializers import ValuesSerializerMixin
 
-class NotificationSerializer(serializers.ModelSerializer):
+class NotificationSerializer(ValuesSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Notification
         fields = [
@@ -1,8 +1,10 @@
 from rest_framework import serializers
+from finance import closing
 from finance.models import Payment
 from django.utils import timezone
+from core.serializers import ValuesSerializerMixin
 
-class PaymentSerializer(serializers.ModelSerializer):
+class PaymentSerializer(ValuesSerializerMixin, serializers.ModelSerializer):
 
     request_id = serializers.IntegerField(required=False, write_only=True)
     # Flatten these fields so frontend gets names directly
@@ -14,10 +16,10 @@ class PaymentSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'user', 'user_name', 'amount', 'transaction_type', 
             'date', 'time', 'recorded_by', 'recorded_by_name', 
-            'notes', 'created_at', 'request_id' 
+            'notes', 'created_at', 'request_id', 'is_opening_balance'
         ]
 
-        read_only_fields = ['recorded_by']
+        read_only_fields = ['recorded_by', 'is_opening_balance']
         extra_kwargs = {
             'time': {'required': False} 
         }
@@ -29,6 +31,16 @@ class PaymentSerializer(serializers.ModelSerializer):
         """
         request_user = self.context['request'].user
         target_user_id = data.get('user')
+
+        # Nothing may be recorded into (or changed within) a closed fiscal year
+        if self.instance is not None and self.instance.is_opening_balance:
+            raise serializers.ValidationError({'error': closing.LOCKED_MESSAGE})
+        through = closing.closed_through()
+        if through is not None:
+            if data.get('date') and data['date'] <= through:
+                raise serializers.ValidationError({'date': closing.closed_message(through)})
+            if self.instance is not None and self.instance.date <= through:
+                raise serializers.ValidationError({'error': closing.closed_message(through)})
         
         # For disbursement transactions, get user from the request if not provided
         if data.get('transaction_type') == 'DISBURSE' and not target_user_id:
@@ -79,13 +91,13 @@ class PaymentSerializer(serializers.ModelSerializer):
         if request_user.role == 'admin':
             return data
 
-        # Responsible Member Logic
-        if request_user.role == 'responsible_member':
+        # Responsible Member / Coordinator Logic
+        if request_user.role in User.LEADER_ROLES:
+            from users.hierarchy import is_in_subtree
             is_self = target_user == request_user
             
-            is_assigned = False
-            if hasattr(target_user, 'responsible_member'):
-                is_assigned = target_user.responsible_member == request_user
+            # Anyone below the leader, at any depth
+            is_assigned = is_in_subtree(target_user.pk, request_user.pk)
             
             if not (is_self or is_assigned):
                 raise serializers.ValidationError(
@@ -1,7 +1,8 @@
 from rest_framework import serializers
 from finance.models import FundRequest
+from core.serializers import ValuesSerializerMixin
 
-class FundRequestSerializer(serializers.ModelSerializer):
+class FundRequestSerializer(ValuesSerializerMixin, serializers.ModelSerializer):
     user_name = serializers.ReadOnlyField(source='user.get_full_name')
     reviewed_by_name = serializers.ReadOnlyField(source='reviewed_by.get_full_name')
 
@@ -1,8 +1,11 @@
 from rest_framework import serializers
 from finance.models import WalletTransaction
 from django.utils import timezone
+from core.serializers import ValuesSerializerMixin
+from finance import references
 
-class WalletTransactionSerializer(serializers.ModelSerializer):
+
+class WalletTransactionSerializer(ValuesSerializerMixin, serializers.ModelSerializer):
     user_name = serializers.ReadOnlyField(source='user.get_full_name')
     recorded_by_name = serializers.ReadOnlyField(source='recorded_by.get_full_name')
 
@@ -27,5 +30,12 @@ class WalletTransactionSerializer(serializers.ModelSerializer):
         # Set current time if not provided
         if not data.get('date'):
             data['date'] = timezone.now()
+
+        # A reference can only be submitted once per payment method
+        instance = self.instance
+        payment_method = data.get('payment_method', instance.payment_method if instance else WalletTransaction.PaymentMethod.BANK_TRANSFER)
+        transaction_id = data.get('transaction_id', instance.transaction_id if instance else '')
+        if references.duplicates(WalletTransaction, payment_method, transaction_id, instance and instance.pk).exists():
+            raise serializers.ValidationError({'transaction_id': references.DUPLICATE_MESSAGE})
             
         return data
\ No newline at end of file
@@ -2,10 +2,14 @@ import time
 import random
 from django.db import transaction
 from django.utils import timezone
-from datetime import datetime 
+from datetime import datetime, timedelta
 from users.models import User  # <--- Imported correctly from users app
 from .models import Payment, Notification, WalletTransaction # <--- Imported from current finance app
+from .references import reference_key
+from core import metrics
+from core.tracing import traced
 
+@traced
 def process_fund_approval(fund_request, user, payment_date=None):
     """
     Handles the approval logic: Updates status only.
@@ -40,6 +44,7 @@ def process_fund_approval(fund_request, user, payment_date=None):
             priority=Notification.Priority.HIGH
         )
 
+@traced
 def process_fund_rejection(fund_request, user, reason):
     """
     Handles the rejection logic: Updates status, Notifies User.
@@ -60,6 +65,7 @@ def process_fund_rejection(fund_request, user, reason):
             priority=Notification.Priority.MEDIUM
         )
 
+@traced
 def process_payment_recording(payment, user):
     """
     Handles payment recording notifications.
@@ -76,6 +82,7 @@ def process_payment_recording(payment, user):
         priority=Notification.Priority.LOW
     )
 
+@traced
 def process_wallet_transaction(wallet_transaction, user):
     """
     Handles wallet transaction notifications.
@@ -92,6 +99,7 @@ def process_wallet_transaction(wallet_transaction, user):
         priority=Notification.Priority.LOW
     )
 
+@traced
 def create_wedding_announcement(admin_user, title, message, priority='HIGH'):
     """
     Broadcasts an announcement to ALL users with a unique Batch ID.
@@ -116,4 +124,93 @@ def create_wedding_announcement(admin_user, title, message, priority='HIGH'):
             )
         )
     
-    Notification.objects.bulk_create(notifications)
\ No newline at end of file
+    Notification.objects.bulk_create(notifications)
+    metrics.inc('cbms_announcements_total')
+    metrics.inc('cbms_announcement_notifications_total', len(notifications))
+
+@traced
+def approve_wallet_deposits(wallet_transactions, approved_by):
+    """
+    Approves PENDING wallet deposits in bulk: marks them APPROVED, records
+    the Payment that makes each count in Dashboard/Team stats, and
+    notifies the members. Rows no longer pending, or whose reference is
+    already approved, are skipped. Returns the approved transactions.
+    """
+    from core import search
+    from finance import audit, closing
+
+    ids = [wallet_transaction.pk for wallet_transaction in wallet_transactions]
+    with transaction.atomic():
+        # 1. Lock the rows, so a concurrent approval can't pay them twice
+        pending = list(
+            WalletTransaction.objects.select_for_update().select_related('user')
+            .filter(pk__in=ids, status=WalletTransaction.Status.PENDING).order_by('pk')
+        )
+        # 2. A reference is paid once: skip rows whose reference is already
+        #    approved, or approved earlier in this batch. Locking the keyed
+        #    rows too serializes approvals of rows sharing a reference
+        keys = {reference_key(wallet_tx.transaction_id) for wallet_tx in pending} - {None}
+        holders = (
+            WalletTransaction.objects.select_for_update()
+            .filter(reference_key__in=keys).exclude(status=WalletTransaction.Status.REJECTED)
+            .values_list('payment_method', 'reference_key', 'status')
+        )
+        paid = {
+            (payment_method, key) for payment_method, key, status in holders
+            if status == WalletTransaction.Status.APPROVED
+        }
+        approvable = []
+        for wallet_tx in pending:
+            reference = (wallet_tx.payment_method, reference_key(wallet_tx.transaction_id))
+            if reference[1] is not None:
+                if reference in paid:
+                    continue
+                paid.add(reference)
+            approvable.append(wallet_tx)
+        pending = approvable
+        if not pending:
+            return []
+        now = timezone.now()
+        WalletTransaction.objects.filter(pk__in=[wallet_tx.pk for wallet_tx in pending]).update(
+            status=WalletTransaction.Status.APPROVED, updated_at=now,
+        )
+        audit.record_updated(WalletTransaction, pending, status=WalletTransaction.Status.APPROVED, updated_at=now)
+
+        # 3. The official Payment records. A deposit made in a closed
+        #    period is recorded on the first open day (finance.closing)
+        through = closing.closed_through()
+        first_open_day = through + timedelta(days=1) if through else None
+        payments = []
+        for wallet_tx in pending:
+            date, notes = wallet_tx.date.date(), f"Wallet Deposit Approved (Ref: {wallet_tx.transaction_id})"
+            if first_open_day and date < first_open_day:
+                notes += f"; deposited {date}, books closed through {through}"
+                date = first_open_day
+            payments.append(Payment(
+                user=wallet_tx.user,
+                amount=wallet_tx.amount,
+                transaction_type=Payment.TransactionType.COLLECT,
+                date=date,
+                time=wallet_tx.date.time(),
+                recorded_by=approved_by,
+                notes=notes
+            ))
+        payments = Payment.objects.bulk_create(payments)
+        search.index_objects(search.registry[Payment._meta.label_lower], payments)
+        audit.record_created(Payment, payments)
+
+        # 4. Notify the members
+        Notification.objects.bulk_create([
+            Notification(
+                user=wallet_tx.user,
+                title="Deposit Approved ✅",
+                message=f"Your deposit of ₹{wallet_tx.amount} has been verified and added to your total.",
+                notification_type=Notification.Type.SUCCESS,
+                priority=Notification.Priority.MEDIUM
+            )
+            for wallet_tx in pending
+        ])
+
+    metrics.inc('cbms_wallet_approvals_total', len(pending))
+    metrics.inc('cbms_payments_recorded_total', len(pending), transaction_type='COLLECT', source='wallet')
+    return pending
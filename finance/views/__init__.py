@@ -1,3 +1,4 @@
 from .payments import PaymentViewSet
 from .requests import FundRequestViewSet
-from .dashboard import DashboardStatsView, TeamStructureView, NotificationViewSet
\ No newline at end of file
+from .dashboard import DashboardStatsView, TeamStructureView, NotificationViewSet
+from .teams import TeamSummaryView, TeamMembersView
\ No newline at end of file
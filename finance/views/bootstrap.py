@@ -0,0 +1,57 @@
+from rest_framework import views, permissions
+from rest_framework.response import Response
+from core import parallel
+from finance.views.dashboard import (
+    NotificationViewSet, calculate_individual_target, dashboard_stats, member_counts,
+    team_rollups, team_structure,
+)
+from users import directory
+from users.serializers import UserSerializer
+
+SECTIONS = ('me', 'dashboard', 'teams', 'notifications', 'public_users')
+
+
+class BootstrapView(views.APIView):
+    """
+    Everything the app loads on launch in one response: the same payloads
+    as users/me, dashboard/stats, teams, notifications and
+    users/all_public. `?sections=me,notifications` picks a subset.
+
+    Figures the dashboard and the team structure share (head counts,
+    team rollups) are computed once; the sections themselves run
+    concurrently where the database allows it (core.parallel).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        requested = request.query_params.get('sections')
+        if requested:
+            names = [name.strip() for name in requested.split(',') if name.strip()]
+            unknown = [name for name in names if name not in SECTIONS]
+            if unknown:
+                return Response({'sections': f"Unknown section(s): {', '.join(unknown)}."}, status=400)
+        else:
+            names = list(SECTIONS)
+
+        # 1. Shared intermediates
+        counts = rollups = individual_target = None
+        if 'dashboard' in names or 'teams' in names:
+            counts = member_counts()
+            individual_target = calculate_individual_target(counts['total'])
+            rollups = team_rollups(individual_target)
+
+        # 2. Sections
+        builders = {
+            'me': lambda: UserSerializer(request.user, context={'request': request}).data,
+            'dashboard': lambda: dashboard_stats(request, counts, rollups),
+            'teams': lambda: team_structure(individual_target, rollups),
+            'notifications': lambda: self.notifications(request),
+            'public_users': directory.entries,
+        }
+        return Response(parallel.run({name: builders[name] for name in names}))
+
+    def notifications(self, request):
+        view = NotificationViewSet(
+            request=request, action='list', args=(), kwargs={}, format_kwarg=None, conditional_get=False,
+        )
+        return view.list(request).data
@@ -1,32 +1,51 @@
 from rest_framework import viewsets, permissions
+from rest_framework.response import Response
 from django.db.models import Q
 from decimal import Decimal # Required for accurate financial math
+from finance import closing
 from finance.models import Payment, FundRequest
 from finance.serializers import PaymentSerializer
 from finance.services import process_payment_recording
+from core import metrics
+from core.mixins import AtomicWriteMixin, ConditionalListMixin, FilterListMixin, SparseFieldsetMixin
+from core.pagination import OptionalLimitOffsetPagination
+from finance.filters import PAYMENT_FILTERS, payment_summary
+from users.hierarchy import subtree_ids
+from users.models import User
 
-class PaymentViewSet(viewsets.ModelViewSet):
+class PaymentViewSet(AtomicWriteMixin, ConditionalListMixin, FilterListMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     serializer_class = PaymentSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = OptionalLimitOffsetPagination
+    list_filters = PAYMENT_FILTERS
 
     def get_queryset(self):
         user = self.request.user
         if user.role == 'admin':
             return Payment.objects.all()
-        if user.role == 'responsible_member':
+        if user.role in User.LEADER_ROLES:
+            # Whole subtree via the closure table (covers coordinators too)
             return Payment.objects.filter(
                 Q(recorded_by=user) |
-                Q(user__responsible_member=user) |
+                Q(user__in=subtree_ids(user)) |
                 Q(user=user)
             )
         return Payment.objects.filter(user=user)
 
+    def get_summary(self, queryset):
+        return payment_summary(queryset)
+
+    def get_conditional_sources(self, queryset):
+        # user_name / recorded_by_name come from the users table
+        return [queryset, User.objects.all()]
+
     def perform_create(self, serializer):
         # 1. Extract the request_id (sent from frontend)
         request_id = serializer.validated_data.pop('request_id', None)
         
         # 2. Save the Payment Record first
         payment = serializer.save()
+        metrics.inc('cbms_payments_recorded_total', transaction_type=payment.transaction_type, source='manual')
         
         # 3. Smart Status Update Logic
         if request_id and payment.transaction_type == 'DISBURSE':
@@ -56,6 +75,15 @@ class PaymentViewSet(viewsets.ModelViewSet):
         # 4. Send Notification
         process_payment_recording(payment, self.request.user)
 
+    def destroy(self, request, *args, **kwargs):
+        payment = self.get_object()
+        if payment.is_opening_balance:
+            return Response({'error': closing.LOCKED_MESSAGE}, status=400)
+        through = closing.closed_through()
+        if through is not None and payment.date <= through:
+            return Response({'error': closing.closed_message(through)}, status=400)
+        return super().destroy(request, *args, **kwargs)
+
     def perform_update(self, serializer):
         payment = serializer.save()
         process_payment_recording(payment, self.request.user)
\ No newline at end of file
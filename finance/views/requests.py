@@ -6,8 +6,11 @@ from django.utils import timezone
 from finance.models import FundRequest
 from finance.serializers import FundRequestSerializer
 from finance.services import process_fund_approval, process_fund_rejection 
+from core.mixins import AtomicWriteMixin, SparseFieldsetMixin
+from users.hierarchy import subtree_ids
+from users.models import User
 
-class FundRequestViewSet(viewsets.ModelViewSet):
+class FundRequestViewSet(AtomicWriteMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     serializer_class = FundRequestSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -15,9 +18,9 @@ class FundRequestViewSet(viewsets.ModelViewSet):
         user = self.request.user
         if user.role == 'admin':
             return FundRequest.objects.all()
-        if user.role == 'responsible_member':
+        if user.role in User.LEADER_ROLES:
             return FundRequest.objects.filter(
-                Q(user__responsible_member=user) | Q(user=user)
+                Q(user__in=subtree_ids(user)) | Q(user=user)
             )
         return FundRequest.objects.filter(user=user)
 
@@ -30,7 +33,7 @@ class FundRequestViewSet(viewsets.ModelViewSet):
         Returns list of requests that are APPROVED but NOT YET PAID.
         Used for the 'Disburse Payment' dropdown.
         """
-        if request.user.role not in ['admin', 'responsible_member']:
+        if request.user.role not in ['admin', *User.LEADER_ROLES]:
              return Response({'error': 'Not authorized.'}, status=403)
 
         requests = FundRequest.objects.filter(
@@ -0,0 +1,103 @@
+from rest_framework import views, permissions
+from rest_framework.response import Response
+from core import search
+from finance.models import Payment, FundRequest, WalletTransaction
+from finance.views.payments import PaymentViewSet
+from finance.views.requests import FundRequestViewSet
+from finance.views.wallet import WalletTransactionViewSet
+from users.hierarchy import visible_user_ids
+from users.models import User
+from users.views.users import UserViewSet
+
+MIN_QUERY_LENGTH = 2
+MAX_RESULTS = 50
+
+
+def _name(user):
+    return user.get_full_name() or user.username
+
+
+def describe_member(user):
+    return _name(user), f"@{user.username} · {user.get_role_display()}"
+
+
+def describe_payment(payment):
+    return (
+        f"{payment.get_transaction_type_display()} ₹{payment.amount} — {_name(payment.user)}",
+        f"{payment.date} {payment.notes}".strip(),
+    )
+
+
+def describe_fund_request(fund_request):
+    return f"Fund request ₹{fund_request.amount} — {_name(fund_request.user)}", fund_request.reason
+
+
+def describe_wallet_transaction(transaction):
+    return (
+        f"{transaction.get_transaction_type_display()} ₹{transaction.amount} — {_name(transaction.user)}",
+        transaction.transaction_id,
+    )
+
+
+# {type: (model, viewset whose get_queryset scopes the results, related, describe)}
+SEARCH_TYPES = {
+    'members': (User, UserViewSet, [], describe_member),
+    'payments': (Payment, PaymentViewSet, ['user'], describe_payment),
+    'fund_requests': (FundRequest, FundRequestViewSet, ['user'], describe_fund_request),
+    'wallet_transactions': (WalletTransaction, WalletTransactionViewSet, ['user'], describe_wallet_transaction),
+}
+
+
+class SearchView(views.APIView):
+    """
+    Ranked search over member names/usernames/phones, payment notes,
+    fund request reasons and wallet transaction ids (see core.search).
+    `?q=` is required; `?types=members,payments` and `?limit=` narrow it.
+    Results are limited to what the caller's list endpoints would show.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if len(query) < MIN_QUERY_LENGTH:
+            return Response({'q': f'Enter at least {MIN_QUERY_LENGTH} characters.'}, status=400)
+
+        types = request.query_params.get('types')
+        names = [name.strip() for name in types.split(',') if name.strip()] if types else list(SEARCH_TYPES)
+        unknown = [name for name in names if name not in SEARCH_TYPES]
+        if unknown:
+            return Response({'types': f"Unknown type(s): {', '.join(unknown)}."}, status=400)
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 20)), MAX_RESULTS))
+        except ValueError:
+            return Response({'limit': 'Must be a number.'}, status=400)
+
+        # 1. Ranked hits from the index, pre-filtered by owner
+        owners = visible_user_ids(request.user)
+        scopes = {}
+        for name in names:
+            registration = search.registry[SEARCH_TYPES[name][0]._meta.label_lower]
+            if owners is None:
+                scopes[registration.label] = None
+            else:
+                scopes[registration.label] = [request.user.pk] if registration.private else owners
+        hits = search.search(query, scopes, limit=limit)
+
+        # 2. Load the rows through each viewset's queryset (exact role rules)
+        labels = {SEARCH_TYPES[name][0]._meta.label_lower: name for name in names}
+        found = {}
+        for label in {label for label, _, _ in hits}:
+            model, viewset, related, _ = SEARCH_TYPES[labels[label]]
+            view = viewset(request=request, action='list', args=(), kwargs={}, format_kwarg=None)
+            ids = [object_id for hit_label, object_id, _ in hits if hit_label == label]
+            found[label] = view.get_queryset().select_related(*related).in_bulk(ids)
+
+        results = []
+        for label, object_id, score in hits:
+            instance = found[label].get(object_id)
+            if instance is None:
+                continue
+            name = labels[label]
+            title, subtitle = SEARCH_TYPES[name][3](instance)
+            results.append({'type': name, 'id': object_id, 'title': title, 'subtitle': subtitle, 'score': round(score, 4)})
+        return Response({'query': query, 'results': results})
@@ -0,0 +1,60 @@
+from django.conf import settings
+from rest_framework import views, permissions
+from rest_framework.response import Response
+from core.sync import Feed, Section
+from finance.models import Payment, FundRequest, WalletTransaction, Notification
+from finance.views.payments import PaymentViewSet
+from finance.views.requests import FundRequestViewSet
+from finance.views.wallet import WalletTransactionViewSet
+from finance.views.dashboard import NotificationViewSet
+from users.hierarchy import visible_user_ids
+from users.models import User
+from users.views.users import UserViewSet
+
+
+def sync_audience(request):
+    return visible_user_ids(request.user)
+
+
+def payment_recorder(request):
+    # Leaders also see payments they recorded for members outside their team
+    return request.user.pk if request.user.role in User.LEADER_ROLES else None
+
+
+def own_audience(request):
+    # Notifications are only ever listed to their owner
+    return [request.user.pk]
+
+
+def wallet_audience(request):
+    # Admins see every wallet row (to approve them), others only their own
+    return None if request.user.role == 'admin' else [request.user.pk]
+
+
+feed = Feed([
+    Section('payments', Payment, PaymentViewSet, recorder=payment_recorder),
+    Section('fund_requests', FundRequest, FundRequestViewSet),
+    Section('wallet_transactions', WalletTransaction, WalletTransactionViewSet, audience=wallet_audience),
+    Section('notifications', Notification, NotificationViewSet, audience=own_audience),
+    Section('users', User, UserViewSet),
+], audience=sync_audience)
+
+
+class SyncView(views.APIView):
+    """
+    Changes since `?cursor=` for offline clients (see core.sync).
+    Start without a cursor to get everything, then keep passing back the
+    returned cursor; `?sections=payments,notifications` limits the
+    lists and `?limit=` the page size per list.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        sections = request.query_params.get('sections')
+        names = [name.strip() for name in sections.split(',') if name.strip()] if sections else None
+        try:
+            limit = int(request.query_params.get('limit', settings.SYNC_PAGE_SIZE))
+        except ValueError:
+            return Response({'limit': 'Must be a number.'}, status=400)
+        limit = max(1, min(limit, settings.SYNC_MAX_PAGE_SIZE))
+        return Response(feed.changes(request, request.query_params.get('cursor'), names, limit))
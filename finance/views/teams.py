@@ -0,0 +1,170 @@
+from decimal import Decimal
+from rest_framework import views, permissions, generics, serializers
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+from django.db.models import Sum, DecimalField, FloatField, OuterRef, Subquery, F, Case, When, Value, ExpressionWrapper
+from django.db.models.functions import Cast, Coalesce
+from django.shortcuts import get_object_or_404
+from finance.models import Payment
+from users.hierarchy import visible_user_ids
+from users.models import User
+from .dashboard import calculate_individual_target, team_rollups
+
+
+def collected_by_member():
+    """
+    Correlated subquery: total COLLECT amount for the outer User row.
+    Served from the (user, transaction_type, amount) index on Payment.
+    """
+    return Coalesce(
+        Subquery(
+            Payment.objects.filter(
+                user=OuterRef('pk'), transaction_type='COLLECT'
+            ).order_by().values('user').annotate(total=Sum('amount')).values('total'),
+            output_field=DecimalField(),
+        ),
+        Value(Decimal('0.00')),
+        output_field=DecimalField(),
+    )
+
+
+def member_target(default_target):
+    """
+    A member's own target: their assigned amount, or the system default.
+    """
+    return Case(
+        When(assigned_monthly_amount__gt=0, then=F('assigned_monthly_amount')),
+        default=Value(Decimal(str(default_target))),
+        output_field=DecimalField(),
+    )
+
+
+class TeamSummaryView(views.APIView):
+    """
+    Leaderboard: per-leader totals only, no embedded member lists.
+    Members are fetched per leader from TeamMembersView on expand.
+    Lists the leaders the caller can see (visible_user_ids).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        default_individual_target = calculate_individual_target()
+        rollups = team_rollups(default_individual_target)
+
+        # Only teams the caller can see (whole board for admins)
+        leaders = User.objects.filter(role__in=User.LEADER_ROLES)
+        visible = visible_user_ids(request.user)
+        if visible is not None:
+            leaders = leaders.filter(pk__in=visible)
+        leaders = leaders.annotate(
+            personal_paid=collected_by_member(),
+            personal_target=member_target(default_individual_target),
+        )
+
+        summary = []
+        for leader in leaders:
+            leader_paid = float(leader.personal_paid)
+            leader_target = float(leader.personal_target)
+            team = rollups.get(leader.id, {'member_count': 1, 'total_paid': leader_paid, 'total_target': leader_target})
+            total_team_paid = team['total_paid']
+            total_team_target = team['total_target']
+
+            summary.append({
+                'responsible_member': {
+                    'id': leader.id,
+                    'name': leader.get_full_name() or leader.username,
+                    'role': leader.role,
+                    'marital_status': leader.marital_status,
+                },
+                'memberCount': team['member_count'] - 1,
+                'leaderTotalPaid': leader_paid,
+                'leaderTotalTarget': leader_target,
+                'teamMembersTotalPaid': total_team_paid - leader_paid,
+                'teamTotalPaid': total_team_paid,
+                'teamTotalTarget': total_team_target,
+                'teamTotalToCollect': max(0, total_team_target - total_team_paid),
+                'teamProgress': (total_team_paid / total_team_target * 100) if total_team_target > 0 else 0,
+            })
+
+        summary.sort(key=lambda x: x['teamTotalPaid'], reverse=True)
+        return Response(summary)
+
+
+class TeamMemberSerializer(serializers.ModelSerializer):
+    name = serializers.SerializerMethodField()
+    total_paid = serializers.FloatField()
+    target = serializers.FloatField()
+    progress = serializers.FloatField()
+
+    class Meta:
+        model = User
+        fields = ['id', 'name', 'username', 'role', 'marital_status', 'total_paid', 'target', 'progress']
+
+    def get_name(self, obj):
+        return obj.get_full_name() or obj.username
+
+
+class TeamMemberPagination(CursorPagination):
+    """
+    Cursor pagination whose ordering is picked with ?sort=.
+    Accepted values: name, paid, progress (prefix with '-' for descending).
+    """
+    page_size = 25
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    sort_options = {
+        'name': ('first_name', 'last_name', 'id'),
+        'paid': ('total_paid', 'id'),
+        'progress': ('progress', 'id'),
+    }
+    default_sort = '-paid'
+
+    def get_ordering(self, request, queryset, view):
+        sort = request.query_params.get('sort', self.default_sort)
+        descending = sort.startswith('-')
+        fields = self.sort_options.get(sort.lstrip('-'))
+        if fields is None:
+            descending = True
+            fields = self.sort_options[self.default_sort.lstrip('-')]
+        if descending:
+            return tuple(f'-{field}' for field in fields)
+        return fields
+
+
+class TeamMembersView(generics.ListAPIView):
+    """
+    Direct reports of one leader, paginated and sortable. Admins see any
+    team; others only leaders in their own subtree (404 otherwise).
+    """
+    serializer_class = TeamMemberSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = TeamMemberPagination
+
+    def get_queryset(self):
+        # Leaders outside the caller's subtree look like they don't exist
+        leaders = User.objects.filter(role__in=User.LEADER_ROLES)
+        visible = visible_user_ids(self.request.user)
+        if visible is not None:
+            leaders = leaders.filter(pk__in=visible)
+        leader = get_object_or_404(leaders, pk=self.kwargs['leader_id'])
+        target = member_target(calculate_individual_target())
+
+        return User.objects.filter(
+            responsible_member=leader
+        ).exclude(
+            pk=leader.pk  # Leaders assigned to themselves are not their own members
+        ).annotate(
+            total_paid=collected_by_member(),
+            target=target,
+        ).annotate(
+            # Float division: SQLite divides the decimals as integers
+            progress=Case(
+                When(target__gt=0, then=ExpressionWrapper(
+                    Cast(F('total_paid'), FloatField()) * Value(100.0) / Cast(F('target'), FloatField()),
+                    output_field=FloatField(),
+                )),
+                default=Value(0.0),
+                output_field=FloatField(),
+            )
+        )
@@ -2,14 +2,24 @@
 
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
-from django.db import transaction
-from finance.models import WalletTransaction, Payment, Notification
+from django.db import IntegrityError, transaction
+from finance import reconciliation, references
+from finance.models import WalletTransaction, Notification
+from finance.services import approve_wallet_deposits
 from finance.serializers import WalletTransactionSerializer
+from core import metrics
+from core.mixins import AtomicWriteMixin, FilterListMixin, SparseFieldsetMixin
+from core.pagination import OptionalLimitOffsetPagination
+from finance.filters import WALLET_FILTERS, wallet_summary
 
-class WalletTransactionViewSet(viewsets.ModelViewSet):
+class WalletTransactionViewSet(AtomicWriteMixin, FilterListMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     serializer_class = WalletTransactionSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = OptionalLimitOffsetPagination
+    list_filters = WALLET_FILTERS
 
     def get_queryset(self):
         user = self.request.user
@@ -19,21 +29,29 @@ class WalletTransactionViewSet(viewsets.ModelViewSet):
         # Users only see their own
         return WalletTransaction.objects.filter(user=user).order_by('-date')
 
+    def get_summary(self, queryset):
+        return wallet_summary(queryset)
+
     def perform_create(self, serializer):
         # Force status to PENDING for all new requests
-        serializer.save(
-            user=self.request.user, 
-            recorded_by=self.request.user,
-            status='PENDING'
-        )
+        try:
+            # Savepoint: a concurrent submit of the same reference that got
+            # past validation trips wallet_unique_reference here
+            with transaction.atomic():
+                serializer.save(
+                    user=self.request.user, 
+                    recorded_by=self.request.user,
+                    status='PENDING'
+                )
+        except IntegrityError:
+            raise ValidationError({'transaction_id': references.DUPLICATE_MESSAGE})
         # Notify Admin (Optional logic here)
 
     @action(detail=True, methods=['post'])
     def approve(self, request, pk=None):
         """
-        Admin approves a deposit.
-        1. Updates WalletTransaction status to APPROVED.
-        2. Creates a real Payment record so it counts in Dashboard/Team stats.
+        Admin approves a deposit (see services.approve_wallet_deposits):
+        status APPROVED plus a real Payment so it counts in Dashboard/Team stats.
         """
         if request.user.role != 'admin':
             return Response({'error': 'Authorized personnel only.'}, status=403)
@@ -43,33 +61,54 @@ class WalletTransactionViewSet(viewsets.ModelViewSet):
         if wallet_tx.status != 'PENDING':
             return Response({'error': 'Transaction already processed.'}, status=400)
 
-        with transaction.atomic():
-            # 1. Update Wallet Status
-            wallet_tx.status = 'APPROVED'
-            wallet_tx.save()
+        approved = references.duplicates(
+            WalletTransaction, wallet_tx.payment_method, wallet_tx.transaction_id, wallet_tx.pk,
+        ).filter(status=WalletTransaction.Status.APPROVED).first()
+        if approved is not None:
+            return Response({'error': f'Reference already approved on transaction #{approved.pk}.'}, status=400)
 
-            # 2. Create the Official Payment Record
-            # This is what makes the money show up in "Collected Money" and "Team Stats"
-            Payment.objects.create(
-                user=wallet_tx.user,
-                amount=wallet_tx.amount,
-                transaction_type='COLLECT',
-                date=wallet_tx.date.date(),
-                time=wallet_tx.date.time(),
-                recorded_by=request.user,
-                notes=f"Wallet Deposit Approved (Ref: {wallet_tx.transaction_id})"
-            )
+        if not approve_wallet_deposits([wallet_tx], request.user):
+            return Response({'error': 'Transaction already processed.'}, status=400)
+        return Response({'status': 'approved'})
 
-            # 3. Notify User
-            Notification.objects.create(
-                user=wallet_tx.user,
-                title="Deposit Approved ✅",
-                message=f"Your deposit of ₹{wallet_tx.amount} has been verified and added to your total.",
-                notification_type='SUCCESS',
-                priority='MEDIUM'
-            )
+    @action(detail=False, methods=['post'], parser_classes=[MultiPartParser])
+    def reconcile(self, request):
+        """
+        Matches an uploaded bank statement (`statement`: CSV or OFX file)
+        against PENDING deposits (see finance.reconciliation). Exact
+        matches are approved unless `dry_run` is set; partial matches are
+        returned for review. `window_days` overrides the date window.
+        """
+        if request.user.role != 'admin':
+            return Response({'error': 'Authorized personnel only.'}, status=403)
+        statement = request.FILES.get('statement')
+        if statement is None:
+            return Response({'statement': 'Upload a CSV or OFX bank statement.'}, status=400)
+        statement_format = request.data.get('format') or None
+        if statement_format not in (None, 'csv', 'ofx'):
+            return Response({'format': 'Choose from: csv, ofx.'}, status=400)
+        try:
+            window_days = request.data.get('window_days')
+            window_days = None if window_days in (None, '') else max(0, int(window_days))
+        except ValueError:
+            return Response({'window_days': 'Must be a number.'}, status=400)
+        dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true', 'yes')
 
-        return Response({'status': 'approved'})
+        try:
+            lines = reconciliation.read_statement(statement.file, statement_format, statement.name)
+            report = reconciliation.reconcile(lines, window_days)
+        except reconciliation.StatementError as error:
+            return Response({'statement': str(error)}, status=400)
+
+        matched = report['matched']
+        approved = [] if dry_run else reconciliation.approve_matches(matched, request.user)
+        return Response({
+            'lines': report['lines'],
+            'matched': [{'line': line.as_dict(), 'wallet_transaction': deposit.id} for line, deposit in matched],
+            'approved': approved,
+            'review': [{'line': line.as_dict(), 'candidates': candidates} for line, candidates in report['review']],
+            'unmatched': report['unmatched'],
+        })
 
     @action(detail=True, methods=['post'])
     def reject(self, request, pk=None):
@@ -80,15 +119,17 @@ class WalletTransactionViewSet(viewsets.ModelViewSet):
         if wallet_tx.status != 'PENDING':
             return Response({'error': 'Transaction already processed.'}, status=400)
 
-        wallet_tx.status = 'REJECTED'
-        wallet_tx.save()
-        
-        Notification.objects.create(
-            user=wallet_tx.user,
-            title="Deposit Rejected ❌",
-            message=f"Your deposit of ₹{wallet_tx.amount} was rejected. Please contact admin.",
-            notification_type='ERROR',
-            priority='HIGH'
-        )
+        with transaction.atomic():
+            wallet_tx.status = 'REJECTED'
+            wallet_tx.save()
+
+            Notification.objects.create(
+                user=wallet_tx.user,
+                title="Deposit Rejected ❌",
+                message=f"Your deposit of ₹{wallet_tx.amount} was rejected. Please contact admin.",
+                notification_type='ERROR',
+                priority='HIGH'
+            )
 
+        metrics.inc('cbms_wallet_rejections_total')
         return Response({'status': 'rejected'})
\ No newline at end of file
@@ -1,6 +1,24 @@
+import re
 from django.apps import AppConfig
 
 
+def _search_text(user):
+    # Phones are also indexed as bare digits, with and without the country
+    # code, so numbers typed without spaces, dashes or +91 match too
+    digits = re.sub(r'\D', '', user.phone or '')
+    return [user.username, user.first_name, user.last_name, user.phone, digits, digits[-10:]]
+
+
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
+
+    def ready(self):
+        from core import search
+        from core.sync import track_deletes
+        from users.models import User
+        track_deletes(User, owner=lambda user: user.pk)
+        search.register(
+            User, _search_text, owner=lambda user: user.pk,
+            fields=['username', 'first_name', 'last_name', 'phone'],
+        )
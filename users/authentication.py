@@ -0,0 +1,88 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from .models import User
+
+# Claims embedded in access tokens by CustomTokenObtainPairSerializer
+ROLE_CLAIM = 'role'
+RESPONSIBLE_MEMBER_CLAIM = 'rm'
+VERSION_CLAIM = 'ver'
+
+AUTH_VERSION_CACHE_KEY = 'users:auth_version:{}'
+
+
+def cache_auth_version(user_id, version):
+    cache.set(
+        AUTH_VERSION_CACHE_KEY.format(user_id),
+        version,
+        settings.JWT_CLAIMS_VERSION_CACHE_SECONDS,
+    )
+
+
+def get_auth_version(user_id):
+    """
+    Current auth_version for a user. Served from the cache; only a miss
+    costs a (single column) query.
+    """
+    version = cache.get(AUTH_VERSION_CACHE_KEY.format(user_id))
+    if version is None:
+        version = User.objects.filter(pk=user_id, is_active=True).values_list('auth_version', flat=True).first()
+        if version is None:
+            return None
+        cache_auth_version(user_id, version)
+    return version
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    Drop-in replacement for JWTAuthentication.
+
+    With settings.JWT_CLAIMS_AUTH enabled, read-only requests are
+    authenticated from the token claims alone: request.user is a User
+    instance with only id/role/responsible_member/is_active loaded, and
+    any other field is fetched lazily on first access. The token is
+    only trusted while its version stamp matches the user's current
+    auth_version (bumped on role, team or active-status changes);
+    otherwise the request falls back to the normal database lookup.
+    """
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+
+        if settings.JWT_CLAIMS_AUTH and request.method in SAFE_METHODS:
+            user = self.get_claims_user(validated_token)
+            if user is not None:
+                return user, validated_token
+
+        return self.get_user(validated_token), validated_token
+
+    def get_claims_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+            role = validated_token[ROLE_CLAIM]
+            responsible_member_id = validated_token[RESPONSIBLE_MEMBER_CLAIM]
+            version = validated_token[VERSION_CLAIM]
+        except KeyError:
+            return None  # Token issued before claims were embedded
+
+        if get_auth_version(user_id) != version:
+            return None  # Role/team changed or user deactivated since issue
+
+        user = User.from_db(
+            DEFAULT_DB_ALIAS,
+            ['id', 'role', 'responsible_member_id', 'is_active'],
+            [user_id, role, responsible_member_id, True],
+        )
+        user._from_claims = True
+        return user
@@ -0,0 +1,27 @@
+from django.contrib.auth.backends import ModelBackend
+from .models import User
+
+
+class LoginBackend(ModelBackend):
+    """
+    ModelBackend that loads everything the login response needs in the
+    same query as the credential lookup (terms acknowledgement and the
+    responsible member's name), so building the profile costs nothing extra.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return
+        try:
+            user = User._default_manager.select_related(
+                'terms_acknowledgement', 'responsible_member'
+            ).get(**{User.USERNAME_FIELD: username})
+        except User.DoesNotExist:
+            # Run the default password hasher once to reduce the timing
+            # difference between an existing and a nonexistent user.
+            User().set_password(password)
+        else:
+            if user.check_password(password) and self.user_can_authenticate(user):
+                return user
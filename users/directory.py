@@ -0,0 +1,78 @@
+"""
+Public member directory (/api/users/all_public/) served from a cache of
+pre-rendered PublicUserSerializer entries.
+
+The entries are cached together with the data_version() of the users
+and terms acknowledgements they were rendered from. Every request
+fetches the current version (one aggregate query, which also gives the
+ETag). When it has moved, only users whose updated_at or acknowledgement
+is newer than the cached version are re-rendered, and the order and
+membership are refreshed from an id-only query. Anything that patch
+can't account for (e.g. a withdrawn acknowledgement) rebuilds the whole
+directory from a single joined query.
+"""
+import datetime
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from core.conditional import data_version
+from .models import User, TermsAcknowledgement
+from .serializers import PublicUserSerializer
+
+CACHE_KEY = 'users:directory'
+
+# Rows updated shortly before the cached version are re-rendered as
+# well, in case their transaction committed after it was taken
+PATCH_OVERLAP = datetime.timedelta(seconds=5)
+
+
+def public_users():
+    # Everyone, in directory order
+    return User.objects.order_by('first_name', 'id')
+
+
+def current_version():
+    return data_version(public_users(), TermsAcknowledgement.objects.all())
+
+
+def _render(queryset):
+    return {entry['id']: entry for entry in PublicUserSerializer().values_data(queryset)}
+
+
+def _patch(entries, cached_version, version):
+    (_, _, last_updated), (_, last_acknowledgement, _) = cached_version
+    if last_updated is None:
+        return None
+    changed = public_users().filter(
+        Q(updated_at__gte=last_updated - PATCH_OVERLAP) |
+        Q(pk__in=TermsAcknowledgement.objects.filter(pk__gt=last_acknowledgement or 0).values('user_id'))
+    )
+    entries = {**entries, **_render(changed)}
+
+    order = public_users().values_list('id', flat=True)
+    patched = {pk: entries[pk] for pk in order if pk in entries}
+    if len(patched) != version[0][0]:
+        return None
+    # Each acknowledgement belongs to exactly one listed user
+    acknowledged = sum(1 for entry in patched.values() if entry['has_acknowledged_terms'])
+    if acknowledged != version[1][0]:
+        return None
+    return patched
+
+
+def entries(version=None):
+    """
+    The directory as a list of PublicUserSerializer entries, current as of
+    `version` (current_version(), fetched if not given).
+    """
+    if version is None:
+        version = current_version()
+    state = cache.get(CACHE_KEY)
+    if state is not None and state['version'] == version:
+        return list(state['entries'].values())
+
+    patched = _patch(state['entries'], state['version'], version) if state is not None else None
+    if patched is None:
+        patched = _render(public_users())
+    cache.set(CACHE_KEY, {'version': version, 'entries': patched}, settings.PUBLIC_DIRECTORY_CACHE_SECONDS)
+    return list(patched.values())
@@ -0,0 +1,123 @@
+from django.db import transaction
+from .models import User, TeamClosure
+
+
+def subtree_ids(user, include_self=True):
+    """
+    Returns a values() queryset of every user id under `user` (any depth).
+    Meant to be used as a subquery: `filter(user__in=subtree_ids(leader))`.
+    """
+    links = TeamClosure.objects.filter(ancestor=user)
+    if not include_self:
+        links = links.filter(depth__gt=0)
+    return links.values('descendant_id')
+
+
+def visible_user_ids(user):
+    """
+    Ids of the users whose records `user` may see: everyone (None) for
+    admins, the whole subtree for leaders and coordinators, otherwise
+    just the user. Same rules as UserViewSet.get_queryset.
+    """
+    if user.role == 'admin':
+        return None
+    if user.role in User.LEADER_ROLES:
+        return sorted({user.pk, *subtree_ids(user).values_list('descendant_id', flat=True)})
+    return [user.pk]
+
+
+def is_in_subtree(node_id, ancestor_id):
+    """
+    True if `node_id` sits somewhere under `ancestor_id` (or is the same user).
+    """
+    if node_id is None or ancestor_id is None:
+        return False
+    return TeamClosure.objects.filter(ancestor_id=ancestor_id, descendant_id=node_id).exists()
+
+
+def would_create_cycle(user, new_parent_id):
+    """
+    Moving `user` under `new_parent_id` is only allowed if the new parent
+    is not already part of the user's own subtree.
+    """
+    if not user.pk or new_parent_id is None:
+        return False
+    return is_in_subtree(new_parent_id, user.pk)
+
+
+def _link_under_parent(subtree, parent_id):
+    """
+    Creates rows joining every ancestor of `parent_id` (itself included)
+    to every (descendant, depth) pair in `subtree`.
+    """
+    if parent_id is None:
+        return
+    ancestors = TeamClosure.objects.filter(descendant_id=parent_id).values_list('ancestor_id', 'depth')
+    TeamClosure.objects.bulk_create([
+        TeamClosure(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=up + down + 1)
+        for ancestor_id, up in ancestors
+        for descendant_id, down in subtree
+    ])
+
+
+def attach_node(user):
+    """
+    Registers a freshly created user: a self row plus links to every
+    ancestor of their responsible member.
+    """
+    with transaction.atomic():
+        TeamClosure.objects.get_or_create(ancestor=user, descendant=user, defaults={'depth': 0})
+        _link_under_parent([(user.pk, 0)], user.effective_parent_id)
+
+
+def move_subtree(user, new_parent_id):
+    """
+    Re-parents `user` together with everyone below them.
+    Only the links crossing the subtree boundary are rewritten.
+    """
+    with transaction.atomic():
+        subtree = list(
+            TeamClosure.objects.filter(ancestor=user).values_list('descendant_id', 'depth')
+        )
+        if not subtree:
+            # Node was never registered (e.g. created via bulk_create)
+            TeamClosure.objects.create(ancestor=user, descendant=user, depth=0)
+            subtree = [(user.pk, 0)]
+
+        member_ids = [descendant_id for descendant_id, _ in subtree]
+
+        # 1. Cut the subtree loose from its old ancestors
+        TeamClosure.objects.filter(
+            descendant_id__in=member_ids
+        ).exclude(
+            ancestor_id__in=member_ids
+        ).delete()
+
+        # 2. Hang it under the new parent's ancestor chain
+        _link_under_parent(subtree, new_parent_id)
+
+
+def rebuild_closure():
+    """
+    Recomputes the whole closure table from responsible_member links.
+    Used after bulk imports or raw updates that bypass User.save.
+    """
+    parents = {}
+    for user_id, parent_id in User.objects.values_list('id', 'responsible_member_id'):
+        parents[user_id] = parent_id if parent_id != user_id else None
+
+    rows = []
+    for user_id in parents:
+        rows.append(TeamClosure(ancestor_id=user_id, descendant_id=user_id, depth=0))
+        seen = {user_id}
+        parent_id, depth = parents[user_id], 1
+        # Walk up the chain; stop on broken links or accidental cycles
+        while parent_id is not None and parent_id in parents and parent_id not in seen:
+            rows.append(TeamClosure(ancestor_id=parent_id, descendant_id=user_id, depth=depth))
+            seen.add(parent_id)
+            parent_id, depth = parents[parent_id], depth + 1
+
+    with transaction.atomic():
+        TeamClosure.objects.all().delete()
+        TeamClosure.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
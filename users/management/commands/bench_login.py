@@ -0,0 +1,56 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from users.models import User
+from users.serializers import CustomTokenObtainPairSerializer
+
+BENCH_USERNAME = '__bench_login__'
+BENCH_PASSWORD = 'bench-Login-pass-123'
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures login throughput (full /api/token/ serializer path) for "
+        "several PBKDF2 iteration counts. Runs inside a rolled-back transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations', default='100000,320000,600000,1000000',
+            help="Comma-separated PBKDF2 iteration counts to compare."
+        )
+        parser.add_argument('--logins', type=int, default=20, help="Logins per iteration setting.")
+
+    def handle(self, *args, **options):
+        counts = [int(value) for value in options['iterations'].split(',') if value.strip()]
+        logins = options['logins']
+
+        self.stdout.write(f"{'iterations':>12} {'ms/login':>10} {'logins/s':>10} {'queries':>8}")
+        with transaction.atomic():
+            user = User.objects.create(username=BENCH_USERNAME)
+            for iterations in counts:
+                with override_settings(
+                    PASSWORD_HASH_ITERATIONS=iterations,
+                    PASSWORD_HASHERS=['users.hashers.ConfigurablePBKDF2PasswordHasher'],
+                ):
+                    # Hash at this work factor up front so login never re-encodes
+                    user.set_password(BENCH_PASSWORD)
+                    user.save(update_fields=['password'])
+                    elapsed, queries = self.run_logins(logins)
+
+                per_login = elapsed / logins
+                self.stdout.write(
+                    f"{iterations:>12} {per_login * 1000:>10.1f} {1 / per_login:>10.1f} {queries / logins:>8.1f}"
+                )
+            transaction.set_rollback(True)
+
+    def run_logins(self, logins):
+        credentials = {'username': BENCH_USERNAME, 'password': BENCH_PASSWORD}
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            for _ in range(logins):
+                serializer = CustomTokenObtainPairSerializer(data=credentials)
+                serializer.is_valid(raise_exception=True)
+            elapsed = time.perf_counter() - started
+        return elapsed, len(captured.captured_queries)
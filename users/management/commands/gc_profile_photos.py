@@ -0,0 +1,85 @@
+import os
+import time
+from django.core.management.base import BaseCommand
+from users.models import User
+from users.photos import thumbnail_names
+from users.storage import profile_photo_storage
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes profile photo files (and thumbnails) that no user references. "
+        "References are loaded once into memory; the directory tree is then "
+        "scanned in batches with os.scandir, so no per-file queries are made."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Files examined per batch.")
+        parser.add_argument(
+            '--min-age', type=int, default=3600,
+            help="Only delete files older than this many seconds (protects uploads still in flight)."
+        )
+        parser.add_argument('--dry-run', action='store_true', help="Report orphans without deleting them.")
+
+    def handle(self, *args, **options):
+        storage = profile_photo_storage
+        root = storage.path('profile_photos')
+        if not os.path.isdir(root):
+            self.stdout.write("No profile photo directory; nothing to do.")
+            return
+
+        referenced = self.referenced_paths(storage)
+        cutoff = time.time() - options['min_age']
+
+        scanned = deleted = 0
+        for batch in self.scan(root, options['batch_size']):
+            scanned += len(batch)
+            for entry in batch:
+                if entry.path in referenced:
+                    continue
+                if entry.stat(follow_symlinks=False).st_mtime > cutoff:
+                    continue
+                deleted += 1
+                if options['dry_run']:
+                    self.stdout.write(f"orphan: {os.path.relpath(entry.path, storage.location)}")
+                else:
+                    try:
+                        os.remove(entry.path)
+                    except FileNotFoundError:
+                        pass
+
+        action = "Found" if options['dry_run'] else "Deleted"
+        self.stdout.write(self.style.SUCCESS(f"Scanned {scanned} file(s). {action} {deleted} orphan(s)."))
+
+    def referenced_paths(self, storage):
+        """
+        Absolute paths of every photo and thumbnail still in use,
+        gathered from a single streamed query.
+        """
+        referenced = set()
+        rows = User.objects.exclude(profile_photo='').exclude(
+            profile_photo__isnull=True
+        ).values_list('profile_photo', 'photo_thumbnails')
+        for photo_name, thumbnails in rows.iterator(chunk_size=2000):
+            for name in [photo_name, *thumbnail_names(thumbnails)]:
+                referenced.add(storage.path(name))
+        return referenced
+
+    def scan(self, root, batch_size):
+        """
+        Yields regular files below `root` in lists of at most `batch_size`.
+        """
+        batch = []
+        pending = [root]
+        while pending:
+            with os.scandir(pending.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        batch.append(entry)
+                        if len(batch) >= batch_size:
+                            yield batch
+                            batch = []
+        if batch:
+            yield batch
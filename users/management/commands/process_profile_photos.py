@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from users.models import User
+from users.photos import process_profile_photo
+
+
+class Command(BaseCommand):
+    help = "Processes existing profile photos (EXIF strip, orientation, thumbnails)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force', action='store_true',
+            help="Reprocess photos that already have thumbnails."
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.exclude(profile_photo='').exclude(profile_photo__isnull=True)
+        if not options['force']:
+            users = users.filter(photo_thumbnails={})
+
+        processed = failed = 0
+        for user_id, photo_name in users.values_list('id', 'profile_photo').iterator():
+            if process_profile_photo(user_id, photo_name):
+                processed += 1
+            else:
+                failed += 1
+                self.stderr.write(f"Skipped user {user_id}: {photo_name}")
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} photo(s), skipped {failed}."))
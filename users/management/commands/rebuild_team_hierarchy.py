@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from users.hierarchy import rebuild_closure
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the team hierarchy closure table from responsible_member links."
+
+    def handle(self, *args, **options):
+        count = rebuild_closure()
+        self.stdout.write(self.style.SUCCESS(f"Team hierarchy rebuilt ({count} links)."))
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_closure(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    TeamClosure = apps.get_model('users', 'TeamClosure')
+
+    parents = {}
+    for user_id, parent_id in User.objects.values_list('id', 'responsible_member_id'):
+        parents[user_id] = parent_id if parent_id != user_id else None
+
+    rows = []
+    for user_id in parents:
+        rows.append(TeamClosure(ancestor_id=user_id, descendant_id=user_id, depth=0))
+        seen = {user_id}
+        parent_id, depth = parents[user_id], 1
+        while parent_id is not None and parent_id in parents and parent_id not in seen:
+            rows.append(TeamClosure(ancestor_id=parent_id, descendant_id=user_id, depth=depth))
+            seen.add(parent_id)
+            parent_id, depth = parents[parent_id], depth + 1
+
+    TeamClosure.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_alter_user_assigned_monthly_amount'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='responsible_member',
+            field=models.ForeignKey(blank=True, help_text='The leader (or regional coordinator) directly above this member', limit_choices_to={'role__in': ('coordinator', 'responsible_member')}, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='assigned_members', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='role',
+            field=models.CharField(choices=[('admin', 'Admin'), ('coordinator', 'Regional Coordinator'), ('responsible_member', 'Responsible Member'), ('member', 'Member')], default='member', help_text='Determines user permissions', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='TeamClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveSmallIntegerField()),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to=settings.AUTH_USER_MODEL)),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['descendant', 'depth'], name='team_closure_desc_depth_idx')],
+                'constraints': [models.UniqueConstraint(fields=('ancestor', 'descendant'), name='unique_team_closure_pair')],
+            },
+        ),
+        migrations.RunPython(populate_closure, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:05
+
+import users.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0007_user_photo_thumbnails'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='profile_photo',
+            field=models.ImageField(blank=True, null=True, storage=users.storage.get_profile_photo_storage, upload_to='profile_photos/'),
+        ),
+    ]
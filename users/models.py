@@ -1,15 +1,22 @@
-from django.db import models
+import copy
+from django.db import models, transaction
 from django.contrib.auth.models import AbstractUser
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
-import os
+from django.core.exceptions import ValidationError
+from .storage import get_profile_photo_storage
 
 class User(AbstractUser):
     class Roles(models.TextChoices):
         # We change these to lowercase to match your React frontend types
         ADMIN = 'admin', _('Admin')
+        COORDINATOR = 'coordinator', _('Regional Coordinator')
         RESPONSIBLE_MEMBER = 'responsible_member', _('Responsible Member')
         MEMBER = 'member', _('Member')
 
+    # Roles that sit above other members in the team hierarchy
+    LEADER_ROLES = (Roles.COORDINATOR, Roles.RESPONSIBLE_MEMBER)
+
     class MaritalStatus(models.TextChoices):
         MARRIED = 'Married', _('Married')
         UNMARRIED = 'Unmarried', _('Unmarried')
@@ -27,8 +34,8 @@ class User(AbstractUser):
         null=True,
         blank=True,
         related_name='assigned_members',
-        limit_choices_to={'role': Roles.RESPONSIBLE_MEMBER},
-        help_text="The leader responsible for collecting funds from this member"
+        limit_choices_to={'role__in': LEADER_ROLES},
+        help_text="The leader (or regional coordinator) directly above this member"
     )
 
     marital_status = models.CharField(
@@ -37,7 +44,14 @@ class User(AbstractUser):
         default=MaritalStatus.UNMARRIED
     )
     phone = models.CharField(max_length=15, blank=True)
-    profile_photo = models.ImageField(upload_to='profile_photos/', null=True, blank=True)
+    profile_photo = models.ImageField(
+        upload_to='profile_photos/',
+        storage=get_profile_photo_storage,  # Content-addressed, deduplicated
+        null=True,
+        blank=True
+    )
+    # size -> {format -> storage name}; filled in by users.photos
+    photo_thumbnails = models.JSONField(default=dict, blank=True, editable=False)
     
     assigned_monthly_amount = models.DecimalField(
         max_digits=10, 
@@ -45,31 +59,198 @@ class User(AbstractUser):
         default=0.00
     )
 
+    # Bumped whenever claims embedded in issued tokens go stale
+    auth_version = models.PositiveIntegerField(default=0, editable=False)
+    # Validator for conditional GETs (core.conditional) and delta sync (core.sync)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Members-of-leader listing, ordered by name
+            models.Index(fields=['responsible_member', 'first_name', 'last_name', 'id'], name='user_team_name_idx'),
+            # Delta sync walks rows in (updated_at, id) order (core.sync)
+            models.Index(fields=['updated_at', 'id'], name='user_updated_idx'),
+        ]
+
+    # Fields whose change invalidates claims embedded in issued tokens
+    TOKEN_CLAIM_FIELDS = ('role', 'is_active', 'responsible_member_id')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot_loaded_values()
+        return instance
+
+    def _snapshot_loaded_values(self, attnames=None):
+        """
+        Remembers the current value of every loaded field (or just
+        `attnames`), so later saves know what changed without a query.
+        """
+        if attnames is None or not hasattr(self, '_loaded_values'):
+            self._loaded_values = {}
+        for field in self._meta.concrete_fields:
+            if field.attname not in self.__dict__:
+                continue  # Deferred and never touched
+            if attnames is None or field.attname in attnames:
+                self._loaded_values[field.attname] = self._comparable_value(field)
+
+    def _comparable_value(self, field):
+        value = self.__dict__[field.attname]
+        if isinstance(field, models.FileField):
+            return getattr(value, 'name', value) or None
+        if isinstance(field, models.JSONField):
+            # A copy, so in-place edits (photo_thumbnails['x'] = ...) show as dirty
+            return copy.deepcopy(value)
+        return value
+
+    def get_dirty_fields(self):
+        """
+        Attnames of loaded fields whose value differs from the snapshot.
+        Returns None for instances that were never loaded or saved.
+        """
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None:
+            return None
+        dirty = set()
+        for field in self._meta.concrete_fields:
+            if field.primary_key or field.attname not in self.__dict__:
+                continue
+            if field.attname not in loaded or loaded[field.attname] != self._comparable_value(field):
+                dirty.add(field.attname)
+        return dirty
+
     def save(self, *args, **kwargs):
+        """
+        Writes only the dirty columns of a loaded user (get_dirty_fields).
+        When nothing changed the save is a no-op: no query, no post_save,
+        updated_at untouched. Pass update_fields or force_update to write
+        regardless.
+        """
+        from core.jobs import enqueue
+        from users.hierarchy import attach_node, move_subtree, would_create_cycle
+        from users.photos import process_profile_photo, release_photo
+
         # Auto-set Admin role if this is a superuser
         if self.is_superuser and not self.role:
             self.role = self.Roles.ADMIN
-            
-        # Check if profile_photo is being updated
-        if self.pk:  # Only for existing users
-            try:
-                old_user = User.objects.get(pk=self.pk)
-                # If the profile photo is changing, delete the old one
-                if old_user.profile_photo and self.profile_photo != old_user.profile_photo:
-                    # Delete the old profile photo file from storage
-                    if old_user.profile_photo and os.path.isfile(old_user.profile_photo.path):
-                        os.remove(old_user.profile_photo.path)
-            except User.DoesNotExist:
-                pass  # User is new, no old photo to delete
-        
-        super().save(*args, **kwargs)
+
+        is_new = self._state.adding or not self.pk
+        dirty = None if is_new else self.get_dirty_fields()
+        tracked = dirty is not None
+        update_fields = kwargs.get('update_fields')
+
+        if not is_new and dirty is None:
+            # Built by hand rather than loaded: compare against the stored row
+            previous = User.objects.filter(pk=self.pk).values(
+                'role', 'is_active', 'responsible_member_id', 'profile_photo', 'photo_thumbnails', 'auth_version'
+            ).first()
+            if previous is None:
+                is_new = True
+            else:
+                self._loaded_values = {**previous, 'profile_photo': previous['profile_photo'] or None}
+                dirty = self.get_dirty_fields() & set(previous)
+
+        changed = set()
+        if not is_new:
+            changed = set(dirty)
+            if update_fields is not None:
+                named = set(update_fields)
+                changed = {
+                    f.attname for f in self._meta.concrete_fields
+                    if f.attname in changed and (f.name in named or f.attname in named)
+                }
+            elif tracked and not kwargs.get('force_update') and not kwargs.get('force_insert'):
+                # Write only the dirty columns
+                if not changed:
+                    return  # Nothing to write: a deliberate no-op (see above)
+                kwargs['update_fields'] = changed
+
+        previous = getattr(self, '_loaded_values', {})
+
+        # A new photo invalidates the old thumbnails; fresh ones are
+        # generated in the background once this save commits.
+        photo_changed = 'profile_photo' in changed or (is_new and bool(self.profile_photo))
+        if 'profile_photo' in changed:
+            self.photo_thumbnails = {}
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = set(kwargs['update_fields']) | {'photo_thumbnails'}
+
+        # Invalidate token claims (see users.authentication)
+        version_changed = bool(changed & set(self.TOKEN_CLAIM_FIELDS))
+        if version_changed:
+            self.auth_version = previous.get('auth_version', self.auth_version) + 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = set(kwargs['update_fields']) | {'auth_version'}
+
+        # auto_now is only applied to columns named in update_fields; a bare
+        # last_login update (every login) doesn't count as a profile change
+        if kwargs.get('update_fields') is not None and set(kwargs['update_fields']) - {'last_login'}:
+            kwargs['update_fields'] = set(kwargs['update_fields']) | {'updated_at'}
+
+        parent_changed = 'responsible_member_id' in changed
+        if parent_changed and would_create_cycle(self, self.effective_parent_id):
+            raise ValidationError({'responsible_member': 'A member cannot report to someone in their own team.'})
+
+        # Keep the closure table in step with responsible_member
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if is_new:
+                attach_node(self)
+            elif parent_changed:
+                move_subtree(self, self.effective_parent_id)
+            if version_changed:
+                from users.authentication import cache_auth_version
+                transaction.on_commit(lambda: cache_auth_version(self.pk, self.auth_version))
+
+            # If the profile photo changed, release the old files once the
+            # new value is safely committed (kept if another user shares them)
+            if 'profile_photo' in changed and previous.get('profile_photo'):
+                old_photo, old_thumbnails = previous['profile_photo'], previous.get('photo_thumbnails')
+                transaction.on_commit(lambda: release_photo(old_photo, old_thumbnails))
+            if photo_changed and self.profile_photo:
+                enqueue(process_profile_photo, self.pk, self.profile_photo.name)
+
+        saved = kwargs.get('update_fields')
+        self._snapshot_loaded_values(None if saved is None else changed | {'auth_version', 'photo_thumbnails', 'updated_at'})
 
     def delete(self, *args, **kwargs):
-        # Delete profile photo file when user is deleted
-        if self.profile_photo:
-            if os.path.isfile(self.profile_photo.path):
-                os.remove(self.profile_photo.path)
-        super().delete(*args, **kwargs)
+        from users.hierarchy import move_subtree
+
+        with transaction.atomic():
+            # Direct reports become roots (SET_NULL); detach their subtrees
+            # from our ancestors before the FK is cleared.
+            children = list(self.assigned_members.exclude(pk=self.pk))
+            for child in children:
+                move_subtree(child, None)
+            result = super().delete(*args, **kwargs)
+            # SET_NULL bypasses save(); mark the children as changed for
+            # conditional GETs, the directory cache and delta sync
+            User.objects.filter(pk__in=[child.pk for child in children]).update(updated_at=timezone.now())
+
+            # Release profile photo files once the user is really gone
+            if self.profile_photo:
+                from users.photos import release_photo
+                photo, thumbnails = self.profile_photo.name, self.photo_thumbnails
+                transaction.on_commit(lambda: release_photo(photo, thumbnails))
+        return result
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        # Users built from token claims load the rest of the row on first
+        # access to any missing field, instead of one query per field.
+        if fields is not None and getattr(self, '_from_claims', False):
+            fields = set(fields) | self.get_deferred_fields()
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        self._snapshot_loaded_values(fields)
+
+    @property
+    def effective_parent_id(self):
+        """
+        The parent in the team hierarchy. Leaders who are assigned to
+        themselves are treated as top-level.
+        """
+        if self.responsible_member_id == self.pk:
+            return None
+        return self.responsible_member_id
 
     def __str__(self):
         return f"{self.username} ({self.get_role_display()})"
@@ -81,4 +262,26 @@ class TermsAcknowledgement(models.Model):
     user_agent = models.TextField(blank=True)
 
     def __str__(self):
-        return f"Terms accepted by {self.user.username}"
\ No newline at end of file
+        return f"Terms accepted by {self.user.username}"
+
+
+class TeamClosure(models.Model):
+    """
+    Closure table for the team hierarchy: one row per (ancestor, descendant)
+    pair, including a depth-0 row linking every user to themselves.
+    Maintained by users.hierarchy whenever responsible_member changes.
+    """
+    ancestor = models.ForeignKey(User, on_delete=models.CASCADE, related_name='descendant_links')
+    descendant = models.ForeignKey(User, on_delete=models.CASCADE, related_name='ancestor_links')
+    depth = models.PositiveSmallIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['ancestor', 'descendant'], name='unique_team_closure_pair'),
+        ]
+        indexes = [
+            models.Index(fields=['descendant', 'depth'], name='team_closure_desc_depth_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.ancestor_id} -> {self.descendant_id} ({self.depth})"
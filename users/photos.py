@@ -0,0 +1,110 @@
+import io
+import logging
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.utils import timezone
+from PIL import Image, ImageOps, UnidentifiedImageError
+from .models import User
+from .storage import profile_photo_storage
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_DIR = 'profile_photos/thumbs'
+
+# (key in photo_thumbnails, Pillow format, file extension, save options)
+THUMBNAIL_FORMATS = (
+    ('webp', 'WEBP', 'webp', {'quality': 80, 'method': 4}),
+    ('jpeg', 'JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+)
+
+
+def _encode(image, image_format, options):
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format, **options)
+    return ContentFile(buffer.getvalue())
+
+
+def _load(photo_name, storage):
+    """
+    Opens a stored photo with orientation applied and all metadata dropped.
+    """
+    with storage.open(photo_name, 'rb') as handle:
+        image = Image.open(handle)
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    # Re-creating the image in RGB discards EXIF, ICC and other chunks
+    return image.convert('RGB')
+
+
+def render_photo(photo_name, storage=profile_photo_storage):
+    """
+    Produces the cleaned-up original plus every thumbnail and saves them.
+    Returns (new_photo_name, thumbnails) where thumbnails maps
+    size -> {format key -> storage name}. Names are content hashes, so
+    processing the same photo twice reuses the same files.
+    """
+    image = _load(photo_name, storage)
+
+    # 1. Sanitised original, bounded to a sensible display size
+    original = image.copy()
+    original.thumbnail((settings.PROFILE_PHOTO_MAX_SIZE, settings.PROFILE_PHOTO_MAX_SIZE))
+    new_photo_name = storage.save(
+        'profile_photos/photo.jpg',
+        _encode(original, 'JPEG', {'quality': 88, 'optimize': True}),
+    )
+
+    # 2. Square avatars in every configured size and format
+    thumbnails = {}
+    for size in settings.PROFILE_PHOTO_THUMBNAIL_SIZES:
+        thumb = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+        thumbnails[str(size)] = {
+            key: storage.save(f'{THUMBNAIL_DIR}/{size}.{extension}', _encode(thumb, image_format, options))
+            for key, image_format, extension, options in THUMBNAIL_FORMATS
+        }
+    return new_photo_name, thumbnails
+
+
+def thumbnail_names(thumbnails):
+    return [name for formats in (thumbnails or {}).values() for name in formats.values()]
+
+
+def release_photo(photo_name, thumbnails=None, storage=profile_photo_storage):
+    """
+    Deletes a photo and its thumbnails unless some user still references
+    the photo (identical uploads share one file). Thumbnails are derived
+    from the photo's content, so they share its reference count.
+    """
+    if not photo_name or User.objects.filter(profile_photo=photo_name).exists():
+        return False
+    for name in [photo_name, *thumbnail_names(thumbnails)]:
+        storage.delete(name)
+    return True
+
+
+def process_profile_photo(user_id, photo_name):
+    """
+    Background job queued by User.save after a new photo is stored.
+    Swaps in the processed photo only if the user still has the photo we
+    started from; otherwise our output is released again.
+    """
+    storage = profile_photo_storage
+    try:
+        new_photo_name, thumbnails = render_photo(photo_name, storage)
+    except (FileNotFoundError, UnidentifiedImageError, OSError):
+        logger.warning("Could not process profile photo %s for user %s", photo_name, user_id, exc_info=True)
+        return False
+
+    updated = User.objects.filter(pk=user_id, profile_photo=photo_name).update(
+        profile_photo=new_photo_name,
+        photo_thumbnails=thumbnails,
+        updated_at=timezone.now(),
+    )
+
+    if not updated:
+        # Photo replaced (or user deleted) while we were working
+        release_photo(new_photo_name, thumbnails, storage)
+        return False
+
+    if new_photo_name != photo_name:
+        release_photo(photo_name, storage=storage)
+    return True
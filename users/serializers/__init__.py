@@ -1,2 +1,2 @@
-from .user import UserSerializer, TermsAcknowledgementSerializer, PublicUserSerializer
+from .user import UserSerializer, TermsAcknowledgementSerializer, PublicUserSerializer, LoginUserSerializer
 from .auth import CustomTokenObtainPairSerializer
\ No newline at end of file
@@ -1,9 +1,19 @@
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
-from .user import UserSerializer
+from .user import LoginUserSerializer
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        from users.authentication import ROLE_CLAIM, RESPONSIBLE_MEMBER_CLAIM, VERSION_CLAIM
+        token = super().get_token(user)
+        # Lets read-only requests skip the user lookup (JWT_CLAIMS_AUTH)
+        token[ROLE_CLAIM] = user.role
+        token[RESPONSIBLE_MEMBER_CLAIM] = user.responsible_member_id
+        token[VERSION_CLAIM] = user.auth_version
+        return token
+
     def validate(self, attrs):
         data = super().validate(attrs)
-        user_serializer = UserSerializer(self.user)
+        user_serializer = LoginUserSerializer(self.user)
         data['user'] = user_serializer.data
         return data
\ No newline at end of file
@@ -1,19 +1,61 @@
 from rest_framework import serializers
+from core.serializers import ValuesSerializerMixin, full_name
+from users.storage import profile_photo_storage
 from users.models import User, TermsAcknowledgement
 
-class UserSerializer(serializers.ModelSerializer):
+
+class ThumbnailsField(serializers.ReadOnlyField):
+    """
+    Renders User.photo_thumbnails as {size: {format: url}}. Empty until
+    the background job has processed the current photo.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('source', 'photo_thumbnails')
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        request = self.context.get('request')
+        thumbnails = {}
+        for size, formats in (value or {}).items():
+            thumbnails[size] = {}
+            for key, name in formats.items():
+                url = profile_photo_storage.url(name)
+                thumbnails[size][key] = request.build_absolute_uri(url) if request else url
+        return thumbnails
+
+
+# values() equivalents of the SerializerMethodFields below
+USER_VALUES_FIELDS = {
+    'name': (
+        ('first_name', 'last_name', 'username'),
+        lambda serializer, row: full_name(row['first_name'], row['last_name']) or row['username'],
+    ),
+    'has_acknowledged_terms': (
+        ('terms_acknowledgement__id',),
+        lambda serializer, row: row['terms_acknowledgement__id'] is not None,
+    ),
+    'terms_acknowledged_at': (
+        ('terms_acknowledgement__acknowledged_at',),
+        lambda serializer, row: row['terms_acknowledgement__acknowledged_at'],
+    ),
+}
+
+class UserSerializer(ValuesSerializerMixin, serializers.ModelSerializer):
     responsible_member_name = serializers.ReadOnlyField(source='responsible_member.get_full_name')
     name = serializers.SerializerMethodField()
     has_acknowledged_terms = serializers.SerializerMethodField()
     terms_acknowledged_at = serializers.SerializerMethodField()
     profile_photo = serializers.ImageField(use_url=True, required=False)  # Ensure full URL is provided
+    profile_photo_thumbnails = ThumbnailsField()
+    values_fields = USER_VALUES_FIELDS
     
     class Meta:
         model = User
         # FIX: Added 'password' to this list
         fields = [
             'id', 'username', 'password', 'name', 'first_name', 'last_name', 'email', 
-            'role', 'marital_status', 'phone', 'profile_photo', 
+            'role', 'marital_status', 'phone', 'profile_photo', 'profile_photo_thumbnails',
             'assigned_monthly_amount', 'responsible_member', 
             'responsible_member_name', 'date_joined',
             'has_acknowledged_terms', 'terms_acknowledged_at', 'is_active'
@@ -32,6 +74,13 @@ class UserSerializer(serializers.ModelSerializer):
             return obj.terms_acknowledgement.acknowledged_at
         return None
 
+    def validate_responsible_member(self, value):
+        from users.hierarchy import would_create_cycle
+        if self.instance and value and value.pk != self.instance.pk:
+            if would_create_cycle(self.instance, value.pk):
+                raise serializers.ValidationError("A member cannot report to someone in their own team.")
+        return value
+
     def create(self, validated_data):
         password = validated_data.pop('password', None)
         instance = self.Meta.model(**validated_data)
@@ -53,10 +102,12 @@ class UserSerializer(serializers.ModelSerializer):
         return instance
 
 # --- NEW SERIALIZER (Safe for Public Lists) ---
-class PublicUserSerializer(serializers.ModelSerializer):
+class PublicUserSerializer(ValuesSerializerMixin, serializers.ModelSerializer):
     name = serializers.SerializerMethodField()
     profile_photo = serializers.ImageField(use_url=True, required=False)  # Ensure full URL is provided
+    profile_photo_thumbnails = ThumbnailsField()
     has_acknowledged_terms = serializers.SerializerMethodField()
+    values_fields = USER_VALUES_FIELDS
 
     class Meta:
         model = User
@@ -66,6 +117,7 @@ class PublicUserSerializer(serializers.ModelSerializer):
             'role', 
             'marital_status', 
             'profile_photo', 
+            'profile_photo_thumbnails',
             'responsible_member',
             'has_acknowledged_terms' 
         ]
@@ -77,6 +129,20 @@ class PublicUserSerializer(serializers.ModelSerializer):
     def get_has_acknowledged_terms(self, obj):
         return hasattr(obj, 'terms_acknowledgement')
 
+class LoginUserSerializer(UserSerializer):
+    """
+    Compact profile returned with the login tokens. Expects a user loaded
+    through users.backends.LoginBackend (related rows already joined).
+    The full profile is available from /api/users/me/.
+    """
+
+    class Meta(UserSerializer.Meta):
+        fields = [
+            'id', 'username', 'name', 'email', 'role', 'marital_status',
+            'profile_photo', 'profile_photo_thumbnails', 'responsible_member', 'responsible_member_name',
+            'has_acknowledged_terms', 'terms_acknowledged_at'
+        ]
+
 class TermsAcknowledgementSerializer(serializers.ModelSerializer):
     class Meta:
         model = TermsAcknowledgement
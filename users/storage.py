@@ -0,0 +1,47 @@
+import hashlib
+import os
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stores each file under the SHA-256 of its content, sharded by the
+    first two hex digits: "profile_photos/foo.JPG" becomes
+    "profile_photos/3f/3fa9…e1.jpg". Saving identical content again
+    returns the existing name without writing, so re-uploads are free.
+    Because names are content hashes, they are safe to serve as immutable.
+    """
+
+    def __init__(self, **kwargs):
+        # Two writers racing on the same name are writing the same bytes
+        kwargs.setdefault('allow_overwrite', True)
+        super().__init__(**kwargs)
+
+    def content_name(self, name, content):
+        digest = hashlib.sha256()
+        content.seek(0)
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        digest = digest.hexdigest()
+        directory = os.path.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        return os.path.join(directory, digest[:2], f'{digest}{extension}')
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.content_name(name, content)
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length=max_length)
+
+
+def get_profile_photo_storage():
+    return profile_photo_storage
+
+
+profile_photo_storage = ContentAddressedStorage()
@@ -11,9 +11,15 @@ from django.contrib.auth.tokens import PasswordResetTokenGenerator
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes, force_str
 from django.conf import settings
-from users.serializers import UserSerializer, TermsAcknowledgementSerializer, PublicUserSerializer
-  
-class UserViewSet(viewsets.ModelViewSet):
+from users.serializers import UserSerializer, TermsAcknowledgementSerializer
+from users.hierarchy import subtree_ids
+from core import conditional
+from core.mixins import ConditionalListMixin, SparseFieldsetMixin
+from core.pagination import OptionalLimitOffsetPagination
+from users import directory
+
+
+class UserViewSet(ConditionalListMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -21,10 +27,10 @@ class UserViewSet(viewsets.ModelViewSet):
         user = self.request.user
         if user.role == 'admin':
             return User.objects.all().order_by('first_name')
-        if user.role == 'responsible_member':
+        if user.role in User.LEADER_ROLES:
             return User.objects.filter(
                 Q(id=user.id) |
-                Q(responsible_member=user)
+                Q(id__in=subtree_ids(user))
             ).order_by('first_name')
         return User.objects.filter(id=user.id)
 
@@ -36,19 +42,19 @@ class UserViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def my_members(self, request):
         """
-        Get all members assigned to the current responsible member.
+        Get all members directly assigned to the current responsible member
+        (or regional coordinator).
         """
         user = request.user
         
-        if user.role != 'responsible_member':
+        if user.role not in User.LEADER_ROLES:
             return Response(
                 {'detail': 'This endpoint is only available for responsible members.'},
                 status=403
             )
         
         members = User.objects.filter(responsible_member=user).order_by('first_name')
-        serializer = self.get_serializer(members, many=True)
-        return Response(serializer.data)
+        return Response(self.get_serializer().values_data(members))
 
     @action(detail=False, methods=['get'])
     def all_public(self, request):
@@ -56,10 +62,19 @@ class UserViewSet(viewsets.ModelViewSet):
         Returns all users for public lists (like Terms Acknowledgement).
         FIX: Uses PublicUserSerializer to prevent leaking phone/email/financials.
         """
-        users = User.objects.all().order_by('first_name')
-        # FIX: Use the safe serializer here
-        serializer = PublicUserSerializer(users, many=True)
-        return Response(serializer.data)
+        # FIX: Use the safe serializer here (PublicUserSerializer entries,
+        # pre-rendered and cached by users.directory)
+        version = directory.current_version()
+        return conditional.respond(
+            request, [], lambda: self.directory_response(request, directory.entries(version)), version=version,
+        )
+
+    def directory_response(self, request, entries):
+        paginator = OptionalLimitOffsetPagination()
+        page = paginator.paginate_queryset(entries, request, view=self)
+        if page is not None:
+            return paginator.get_paginated_response(page)
+        return Response(entries)
 
     @action(detail=False, methods=['post'], permission_classes=[permissions.AllowAny])
     def request_password_reset(self, request):